@@ -30,7 +30,7 @@ class User(UserBase, table=True):
     hashed_password: str
     
     # Relationships
-    posts: list["Post"] = Relationship(back_populates="author")
+    posts: list["Post"] = Relationship(back_populates="author", sa_relationship_kwargs={"passive_deletes": True})
 
 
 class UserCreate(SQLModel):
@@ -8,6 +8,8 @@ from typing import Optional
 from app.auth.models import User, UserCreate
 from app.auth.schemas import UserRegisterRequest, UserLoginRequest
 from app.config import settings
+from app.users.cache import user_count_cache
+from app.matching.service import matching_service
 from app.exceptions import ConflictError, UnauthorizedError, NotFoundError
 
 
@@ -72,6 +74,8 @@ class AuthService:
         session.add(user)
         await session.commit()
         await session.refresh(user)
+        user_count_cache.clear()
+        matching_service.user_registered(user)
         return user
     
     async def authenticate_user(self, session: AsyncSession, login_data: UserLoginRequest) -> User:
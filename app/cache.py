@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+
+class CacheStats:
+    """Hit/miss counters and hit latency for an in-memory cache"""
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.hit_time_total = 0.0
+
+    def record_hit(self, elapsed: float = 0.0) -> None:
+        self.hits += 1
+        self.hit_time_total += elapsed
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable view of the counters"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_hit_latency_ms": round(self.hit_time_total / self.hits * 1000, 4) if self.hits else 0.0
+        }
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live"""
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value or None if missing/expired"""
+        started = time.perf_counter()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.stats.record_miss()
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.record_hit(time.perf_counter() - started)
+        return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return cached value without touching stats or LRU order"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value, evicting the least recently used entry if full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
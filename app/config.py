@@ -26,6 +26,7 @@ class Settings(BaseSettings):
     APP_NAME: str = "FastAPI ML Project"
     VERSION: str = "1.0.0"
     ENVIRONMENT: str = "development"
+    SITE_URL: str = "http://localhost:8000"  # Public base URL used in sitemaps and feeds
     
     # CORS
     ALLOWED_HOSTS: list[str] = ["*"]
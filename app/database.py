@@ -1,8 +1,12 @@
 from sqlmodel import SQLModel
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from typing import AsyncGenerator
+from sqlalchemy.sql import Select
+from typing import AsyncGenerator, Hashable, Optional, Tuple
 
+from app.cache import TTLCache
 from app.config import settings
 
 # Create async engine
@@ -12,6 +16,14 @@ engine = create_async_engine(
     future=True
 )
 
+if engine.dialect.name == "sqlite":
+    # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless enabled per connection
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -27,6 +39,56 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def estimate_row_count(session: AsyncSession, table_name: str) -> Optional[int]:
+    """Get the query planner's row estimate for a table (PostgreSQL only)"""
+    if session.bind.dialect.name != "postgresql":
+        return None
+    
+    result = await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table_name"),
+        {"table_name": table_name}
+    )
+    estimate = result.scalar()
+    # reltuples is -1 for tables that were never analyzed
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+async def count_with_cache(
+    session: AsyncSession,
+    cache: TTLCache,
+    key: Hashable,
+    count_query: Select,
+    estimate_table: Optional[str] = None,
+    estimate_threshold: int = 0
+) -> Tuple[int, bool]:
+    """Count rows for a paginated list, reusing recent results
+    
+    When estimate_table is given (unfiltered lists) and the planner estimate is
+    at least estimate_threshold, the estimate is returned instead of running
+    COUNT. Returns (total, is_exact).
+    """
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
+    if estimate_table:
+        estimate = await estimate_row_count(session, estimate_table)
+        if estimate is not None and estimate >= estimate_threshold:
+            cache.set(key, (estimate, False))
+            return estimate, False
+    
+    total = (await session.execute(count_query)).scalar()
+    cache.set(key, (total, True))
+    return total, True
+
+
+def dialect_insert(session: AsyncSession, model):
+    """INSERT for the session's dialect, which supports ON CONFLICT upserts (PostgreSQL or SQLite)"""
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
 async def create_tables():
     """Create database tables"""
     async with engine.begin() as conn:
@@ -0,0 +1,18 @@
+# Feeds constants
+
+# Sitemap settings
+SITEMAP_SETTINGS = {
+    "MAX_URLS_PER_SHARD": 50000,  # Sitemap protocol limit per file
+    "CHANGEFREQ": "weekly",
+    "STREAM_BATCH_SIZE": 1000
+}
+
+# RSS/Atom settings
+FEED_SETTINGS = {
+    "MAX_ITEMS": 20,
+    "DESCRIPTION": "Latest posts"
+}
+
+# HTTP caching
+FEED_CACHE_CONTROL = "public, max-age=300"
+GZIP_LEVEL = 9
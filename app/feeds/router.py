@@ -0,0 +1,92 @@
+import zlib
+from fastapi import APIRouter, Header, Response, status
+from typing import Annotated, Optional
+
+from app.feeds.service import feed_service, CachedDocument
+from app.feeds.constants import FEED_CACHE_CONTROL
+from app.posts.cache import etag_matches
+from app.exceptions import NotFoundError
+
+router = APIRouter()
+
+
+def _document_response(
+    document: CachedDocument,
+    media_type: str,
+    accept_encoding: Optional[str],
+    if_none_match: Optional[str]
+) -> Response:
+    """Send a cached document gzip-encoded as stored, or inflated for clients that do not accept gzip"""
+    headers = {
+        "ETag": document.etag,
+        "Cache-Control": FEED_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(if_none_match, document.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if accept_encoding and "gzip" in accept_encoding.lower():
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=document.body, media_type=media_type, headers=headers)
+
+    return Response(content=zlib.decompress(document.body, 31), media_type=media_type, headers=headers)
+
+
+@router.get(
+    "/sitemap.xml",
+    summary="Sitemap index",
+    description="Sitemap index listing one sitemap per shard of published posts"
+)
+async def get_sitemap_index(
+    accept_encoding: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    """Get sitemap index"""
+    document = await feed_service.get_sitemap_index()
+    return _document_response(document, "application/xml", accept_encoding, if_none_match)
+
+
+@router.get(
+    "/sitemap-posts-{number}.xml",
+    summary="Posts sitemap",
+    description="One shard of published post URLs (at most 50,000 per shard)"
+)
+async def get_sitemap_shard(
+    number: int,
+    accept_encoding: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    """Get posts sitemap shard"""
+    document = await feed_service.get_sitemap_shard(number - 1)
+    if document is None:
+        raise NotFoundError("Sitemap not found")
+
+    return _document_response(document, "application/xml", accept_encoding, if_none_match)
+
+
+@router.get(
+    "/feed.rss",
+    summary="RSS feed",
+    description="RSS 2.0 feed of the latest published posts"
+)
+async def get_rss_feed(
+    accept_encoding: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    """Get RSS feed"""
+    document = await feed_service.get_rss()
+    return _document_response(document, "application/rss+xml", accept_encoding, if_none_match)
+
+
+@router.get(
+    "/feed.atom",
+    summary="Atom feed",
+    description="Atom feed of the latest published posts"
+)
+async def get_atom_feed(
+    accept_encoding: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    """Get Atom feed"""
+    document = await feed_service.get_atom()
+    return _document_response(document, "application/atom+xml", accept_encoding, if_none_match)
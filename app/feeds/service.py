@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.feeds.constants import SITEMAP_SETTINGS, FEED_SETTINGS, GZIP_LEVEL
+from app.posts.models import Post, PostStatus
+from app.posts.utils import format_post_url
+
+# (published_at, id): the order posts are laid out across sitemap shards
+ShardKey = Tuple[datetime, UUID]
+
+
+@dataclass
+class CachedDocument:
+    """Generated XML kept gzip-compressed, ready to be sent as-is"""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+class GzipWriter:
+    """Compress XML as it is produced so the uncompressed document never exists in memory"""
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        self._parts: List[bytes] = []
+        self._digest = hashlib.md5()
+
+    def write(self, text: str) -> None:
+        data = text.encode()
+        self._digest.update(data)
+        self._parts.append(self._compressor.compress(data))
+
+    def close(self, last_modified: Optional[datetime] = None) -> CachedDocument:
+        self._parts.append(self._compressor.flush())
+        return CachedDocument(
+            body=b"".join(self._parts), etag=f'"{self._digest.hexdigest()}"', last_modified=last_modified
+        )
+
+
+def _w3c_datetime(value: datetime) -> str:
+    return value.replace(tzinfo=timezone.utc).isoformat(timespec="seconds")
+
+
+class FeedService:
+    """Sitemap shards and RSS/Atom feeds, generated on first request and cached until a post changes
+
+    Sitemap shards are keyset ranges over (published_at, id) of published
+    posts. A post change only marks the shard its key falls into as stale,
+    and new posts land in the last shard, which is split when it reaches
+    MAX_URLS_PER_SHARD.
+    """
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._boundaries: Optional[List[ShardKey]] = None  # First key of shards 1..n-1
+        self._shards: List[Optional[CachedDocument]] = []
+        self._index: Optional[CachedDocument] = None
+        self._rss: Optional[CachedDocument] = None
+        self._atom: Optional[CachedDocument] = None
+
+    def post_changed(self, published_at: Optional[datetime], post_id: UUID) -> None:
+        """Mark the documents that can list a post as stale"""
+        self._rss = None
+        self._atom = None
+        if published_at is None or self._boundaries is None:
+            return
+
+        shard = bisect_right(self._boundaries, (published_at, post_id))
+        if shard < len(self._shards):
+            self._shards[shard] = None
+        self._index = None
+
+    def invalidate_all(self) -> None:
+        """Forget shard layout and every cached document (after bulk changes)"""
+        self._boundaries = None
+        self._shards = []
+        self._index = None
+        self._rss = None
+        self._atom = None
+
+    async def get_sitemap_index(self) -> CachedDocument:
+        async with self._lock:
+            async with AsyncSessionLocal() as session:
+                await self._ensure_layout(session)
+                # Shards must be current for the index to carry their lastmod (a build may also split one)
+                shard = 0
+                while shard < len(self._shards):
+                    if self._shards[shard] is None:
+                        await self._build_shard(session, shard)
+                    shard += 1
+
+            if self._index is None:
+                self._index = self._build_index()
+            return self._index
+
+    async def get_sitemap_shard(self, shard: int) -> Optional[CachedDocument]:
+        async with self._lock:
+            async with AsyncSessionLocal() as session:
+                await self._ensure_layout(session)
+                if shard < 0 or shard >= len(self._shards):
+                    return None
+                if self._shards[shard] is None:
+                    await self._build_shard(session, shard)
+            return self._shards[shard]
+
+    async def get_rss(self) -> CachedDocument:
+        async with self._lock:
+            if self._rss is None:
+                self._rss = await self._build_feed(self._render_rss)
+            return self._rss
+
+    async def get_atom(self) -> CachedDocument:
+        async with self._lock:
+            if self._atom is None:
+                self._atom = await self._build_feed(self._render_atom)
+            return self._atom
+
+    def _published(self):
+        return and_(Post.status == PostStatus.PUBLISHED, Post.published_at.is_not(None))
+
+    def _after(self, key: ShardKey):
+        published_at, post_id = key
+        return or_(Post.published_at > published_at, and_(Post.published_at == published_at, Post.id >= post_id))
+
+    def _before(self, key: ShardKey):
+        published_at, post_id = key
+        return or_(Post.published_at < published_at, and_(Post.published_at == published_at, Post.id < post_id))
+
+    async def _ensure_layout(self, session: AsyncSession) -> None:
+        """Compute shard boundaries with one index-only pass over published post keys"""
+        if self._boundaries is not None:
+            return
+
+        max_urls = SITEMAP_SETTINGS["MAX_URLS_PER_SHARD"]
+        boundaries = []
+        result = await session.stream(
+            select(Post.published_at, Post.id)
+            .where(self._published())
+            .order_by(Post.published_at, Post.id)
+            .execution_options(yield_per=SITEMAP_SETTINGS["STREAM_BATCH_SIZE"])
+        )
+        position = 0
+        async for published_at, post_id in result:
+            if position and position % max_urls == 0:
+                boundaries.append((published_at, post_id))
+            position += 1
+
+        self._boundaries = boundaries
+        self._shards = [None] * (len(boundaries) + 1)
+        self._index = None
+
+    async def _build_shard(self, session: AsyncSession, shard: int) -> None:
+        """Stream one shard's posts from a server-side cursor into a gzip-compressed urlset"""
+        max_urls = SITEMAP_SETTINGS["MAX_URLS_PER_SHARD"]
+        conditions = [self._published()]
+        if shard > 0:
+            conditions.append(self._after(self._boundaries[shard - 1]))
+        if shard < len(self._boundaries):
+            conditions.append(self._before(self._boundaries[shard]))
+
+        writer = GzipWriter()
+        writer.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                     '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        result = await session.stream(
+            select(Post.id, Post.slug, Post.published_at, func.coalesce(Post.updated_at, Post.published_at))
+            .where(*conditions)
+            .order_by(Post.published_at, Post.id)
+            .execution_options(yield_per=SITEMAP_SETTINGS["STREAM_BATCH_SIZE"])
+        )
+
+        count = 0
+        last_modified = None
+        async for post_id, slug, published_at, modified in result:
+            if count == max_urls:
+                # Shard outgrew the limit: the rest becomes a new shard
+                self._boundaries.insert(shard, (published_at, post_id))
+                self._shards.insert(shard + 1, None)
+                break
+            writer.write(
+                f"<url><loc>{escape(format_post_url(slug, settings.SITE_URL))}</loc>"
+                f"<lastmod>{_w3c_datetime(modified)}</lastmod>"
+                f"<changefreq>{SITEMAP_SETTINGS['CHANGEFREQ']}</changefreq></url>\n"
+            )
+            count += 1
+            if last_modified is None or modified > last_modified:
+                last_modified = modified
+        await result.close()
+
+        writer.write("</urlset>\n")
+        self._shards[shard] = writer.close(last_modified)
+        self._index = None
+
+    def _build_index(self) -> CachedDocument:
+        base_url = settings.SITE_URL.rstrip('/')
+        writer = GzipWriter()
+        writer.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                     '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for number, document in enumerate(self._shards, start=1):
+            entry = f"<sitemap><loc>{escape(f'{base_url}/sitemap-posts-{number}.xml')}</loc>"
+            if document.last_modified is not None:
+                entry += f"<lastmod>{_w3c_datetime(document.last_modified)}</lastmod>"
+            writer.write(entry + "</sitemap>\n")
+        writer.write("</sitemapindex>\n")
+        return writer.close()
+
+    async def _build_feed(self, render) -> CachedDocument:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    Post.id, Post.title, Post.slug, Post.excerpt, Post.auto_excerpt, Post.published_at,
+                    func.coalesce(Post.updated_at, Post.published_at).label("modified"),
+                    User.first_name, User.last_name
+                )
+                .join(User, User.id == Post.author_id)
+                .where(self._published())
+                .order_by(Post.published_at.desc(), Post.id.desc())
+                .limit(FEED_SETTINGS["MAX_ITEMS"])
+            )
+            rows = result.all()
+
+        writer = GzipWriter()
+        render(writer, rows)
+        return writer.close()
+
+    def _render_rss(self, writer: GzipWriter, rows) -> None:
+        base_url = settings.SITE_URL.rstrip('/')
+        writer.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>\n'
+            f"<title>{escape(settings.APP_NAME)}</title><link>{escape(base_url)}/</link>"
+            f"<description>{escape(FEED_SETTINGS['DESCRIPTION'])}</description>"
+            f'<atom:link href="{escape(base_url)}/feed.rss" rel="self" type="application/rss+xml"/>\n'
+        )
+        if rows:
+            writer.write(f"<lastBuildDate>{format_datetime(rows[0].published_at.replace(tzinfo=timezone.utc))}</lastBuildDate>\n")
+        for row in rows:
+            link = escape(format_post_url(row.slug, settings.SITE_URL))
+            writer.write(
+                f"<item><title>{escape(row.title)}</title><link>{link}</link>"
+                f'<guid isPermaLink="true">{link}</guid>'
+                f"<pubDate>{format_datetime(row.published_at.replace(tzinfo=timezone.utc))}</pubDate>"
+                f"<description>{escape(row.excerpt or row.auto_excerpt or '')}</description></item>\n"
+            )
+        writer.write("</channel></rss>\n")
+
+    def _render_atom(self, writer: GzipWriter, rows) -> None:
+        base_url = settings.SITE_URL.rstrip('/')
+        updated = max((row.modified for row in rows), default=datetime.utcnow())
+        writer.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+            f"<title>{escape(settings.APP_NAME)}</title><id>{escape(base_url)}/</id>"
+            f'<link href="{escape(base_url)}/"/><link href="{escape(base_url)}/feed.atom" rel="self"/>'
+            f"<updated>{_w3c_datetime(updated)}</updated>\n"
+        )
+        for row in rows:
+            link = escape(format_post_url(row.slug, settings.SITE_URL))
+            writer.write(
+                f"<entry><title>{escape(row.title)}</title>"
+                f'<link href="{link}"/><id>urn:uuid:{row.id}</id>'
+                f"<published>{_w3c_datetime(row.published_at)}</published>"
+                f"<updated>{_w3c_datetime(row.modified)}</updated>"
+                f"<author><name>{escape(f'{row.first_name} {row.last_name}')}</name></author>"
+                f"<summary>{escape(row.excerpt or row.auto_excerpt or '')}</summary></entry>\n"
+            )
+        writer.write("</feed>\n")
+
+
+feed_service = FeedService()
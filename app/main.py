@@ -4,12 +4,26 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.database import create_tables, close_db_connection
+from app.posts.constants import (
+    TAG_STATS_SETTINGS, COMMENT_COUNT_SETTINGS, HOT_FEED_SETTINGS, RELATED_POSTS_SETTINGS
+)
+from app.posts.jobs import (
+    run_periodically, reconcile_tag_counts, reconcile_comment_counts, rebuild_hot_feed, rebuild_related_posts,
+    load_duplicate_index
+)
+from app.posts.autosave import autosave_buffer
+from app.posts.view_counts import view_count_buffer
+from app.matching.constants import MATCHING_SETTINGS
+from app.matching.service import matching_service
 from app.auth.router import router as auth_router
 from app.users.router import router as users_router
 from app.posts.router import router as posts_router
 from app.preferences.router import router as preferences_router
+from app.feeds.router import router as feeds_router
+from app.matching.router import router as matching_router
 from app.exceptions import (
     ConflictError,
     ValidationError,
@@ -24,8 +38,37 @@ from app.exceptions import (
 async def lifespan(app: FastAPI):
     # Startup
     await create_tables()
+    await rebuild_hot_feed()
+    await load_duplicate_index()
+    background_tasks = [
+        asyncio.create_task(run_periodically(
+            reconcile_tag_counts, TAG_STATS_SETTINGS["RECONCILE_INTERVAL_SECONDS"]
+        )),
+        asyncio.create_task(run_periodically(
+            reconcile_comment_counts, COMMENT_COUNT_SETTINGS["RECONCILE_INTERVAL_SECONDS"]
+        )),
+        asyncio.create_task(run_periodically(
+            rebuild_hot_feed, HOT_FEED_SETTINGS["REBUILD_INTERVAL_SECONDS"]
+        )),
+        # Initial build runs in the background; refreshes are skipped until it finishes
+        asyncio.create_task(rebuild_related_posts()),
+        asyncio.create_task(run_periodically(
+            rebuild_related_posts, RELATED_POSTS_SETTINGS["REBUILD_INTERVAL_SECONDS"]
+        )),
+        asyncio.create_task(run_periodically(
+            view_count_buffer.flush, view_count_buffer.flush_interval
+        )),
+        asyncio.create_task(run_periodically(
+            matching_service.reload, MATCHING_SETTINGS["RELOAD_INTERVAL_SECONDS"]
+        ))
+    ]
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await autosave_buffer.flush_all()
+    await view_count_buffer.flush()
     await close_db_connection()
 
 
@@ -96,6 +139,8 @@ app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/users", tags=["Users"])
 app.include_router(posts_router, prefix="/posts", tags=["Posts"])
 app.include_router(preferences_router, prefix="/preferences", tags=["Preferences"])
+app.include_router(feeds_router, tags=["Feeds"])
+app.include_router(matching_router, prefix="/matching", tags=["Matching"])
 
 
 # HTML Template Routes
@@ -0,0 +1,39 @@
+# Matching constants
+
+MATCHING_SETTINGS = {
+    "DEFAULT_LIMIT": 20,
+    "MAX_LIMIT": 100,
+    "INITIAL_CAPACITY": 1024,  # Candidate rows allocated up front; doubled when full
+    "LOAD_BATCH_SIZE": 10000,  # Users streamed per batch when loading the candidate index
+    "RELOAD_INTERVAL_SECONDS": 3600  # Full reload, for writes made outside this process
+}
+
+# Weight of each compatibility component; components one side left unanswered are skipped
+COMPATIBILITY_WEIGHTS = {
+    "religion": 3.0,
+    "relationship_type": 3.0,
+    "education": 1.5,
+    "smoking": 1.5,
+    "drinking": 1.5,
+    "exercise": 1.0,
+    "hobbies": 2.0,
+    "love_language": 2.0,
+    "visual": 2.0
+}
+
+# Answers compared by closeness rather than equality (codes are in ascending order)
+ORDINAL_FIELDS = {
+    "education": 5,  # smp .. doktoral
+    "exercise": 5  # 1 .. 5
+}
+
+# Genders each gender is matched with; applied both ways
+GENDER_MATCHES = {
+    "male": ("female", "other"),
+    "female": ("male", "other"),
+    "other": ("male", "female")
+}
+
+CANDIDATE_INDEX_SETTINGS = {
+    "MERGE_THRESHOLD": 512  # Changed birth dates checked one by one before the sorted array is rebuilt
+}
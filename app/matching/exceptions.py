@@ -0,0 +1,8 @@
+from app.exceptions import BaseAPIException
+from fastapi import status
+
+
+class PreferencesRequiredError(BaseAPIException):
+    """Recommendations need the user's own questionnaire answers"""
+    def __init__(self, detail: str = "Complete the preferences questionnaire to get recommendations"):
+        super().__init__(detail=detail, status_code=status.HTTP_409_CONFLICT)
@@ -0,0 +1,256 @@
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.matching.constants import GENDER_MATCHES
+from app.users.utils import calculate_age
+
+
+def normalize_location(location: Optional[str]) -> Optional[str]:
+    """Case- and whitespace-insensitive location key"""
+    if not location:
+        return None
+    return " ".join(location.lower().split()) or None
+
+
+def _birth_bounds(today: date, age_min: int, age_max: int) -> Tuple[int, int]:
+    """Ordinal range of birth dates of people aged age_min..age_max today (0 = no bound)"""
+    def years_before(years: int) -> date:
+        try:
+            return today.replace(year=today.year - years)
+        except ValueError:  # 29 February
+            return today.replace(year=today.year - years, day=28)
+
+    latest = years_before(age_min).toordinal() if age_min else date.max.toordinal()
+    earliest = years_before(age_max + 1).toordinal() + 1 if age_max else 1
+    return earliest, latest
+
+
+class CandidateIndex:
+    """Hard-constraint pre-filter over every active user
+
+    Each user owns a position, shared with the candidate matrix. Gender,
+    location, "same location only" and "has answers to score" are packed
+    bitmaps over positions, so constraints combine with bitwise AND.
+    Birth dates are kept sorted for age range lookups; positions changed
+    since the last sort are checked directly until more than
+    merge_threshold accumulate and the sorted array is rebuilt.
+    """
+    def __init__(self, capacity: int, merge_threshold: int):
+        self.merge_threshold = merge_threshold
+        self._user_ids: List[Optional[UUID]] = []
+        self._positions: Dict[UUID, int] = {}
+        self._free: List[int] = []
+        self._genders: Dict[int, str] = {}
+        self._profile_locations: Dict[int, str] = {}
+        self._preferred_locations: Dict[int, str] = {}
+        self._locations: Dict[int, str] = {}  # Effective location key of each position
+        self._gender_bitmaps: Dict[str, np.ndarray] = {}
+        self._location_bitmaps: Dict[str, np.ndarray] = {}
+        self._sorted_births = np.zeros(0, dtype=np.int32)
+        self._sorted_positions = np.zeros(0, dtype=np.int64)
+        self._unsorted: Set[int] = set()
+        self._allocate(capacity)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._births)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def position(self, user_id: UUID) -> Optional[int]:
+        return self._positions.get(user_id)
+
+    def user_id(self, position: int) -> UUID:
+        return self._user_ids[position]
+
+    def add_user(self, user_id: UUID, gender: str, date_of_birth: Optional[date]) -> int:
+        """Add a user (or update their registration data) and return their position"""
+        position = self._positions.get(user_id)
+        if position is None:
+            if self._free:
+                position = self._free.pop()
+                self._user_ids[position] = user_id
+            else:
+                position = len(self._user_ids)
+                if position == self.capacity:
+                    self._grow()
+                self._user_ids.append(user_id)
+            self._positions[user_id] = position
+
+        self._move(self._gender_bitmaps, self._genders, position, gender)
+        self._births[position] = date_of_birth.toordinal() if date_of_birth else 0
+        self._unsorted.add(position)
+        return position
+
+    def set_profile_location(self, position: int, location: Optional[str]) -> None:
+        self._store(self._profile_locations, position, normalize_location(location))
+        self._update_location(position)
+
+    def set_preferences(self, position: int, location: Optional[str], same_location: bool,
+                        age_min: Optional[int], age_max: Optional[int]) -> None:
+        """Update the user's questionnaire constraints"""
+        self._store(self._preferred_locations, position, normalize_location(location))
+        self._update_location(position)
+        self._age_min[position] = min(age_min or 0, 255)
+        self._age_max[position] = min(age_max or 0, 255)
+        self._assign(self._same_location, position, same_location)
+
+    def set_scored(self, position: int, scored: bool) -> None:
+        """Mark whether the user has answers in the candidate matrix"""
+        self._assign(self._scored, position, scored)
+
+    def remove(self, user_id: UUID) -> None:
+        position = self._positions.pop(user_id, None)
+        if position is None:
+            return
+
+        self._move(self._gender_bitmaps, self._genders, position, None)
+        self.set_profile_location(position, None)
+        self.set_preferences(position, None, False, None, None)
+        self.set_scored(position, False)
+        self._births[position] = 0
+        self._unsorted.add(position)
+        self._user_ids[position] = None
+        self._free.append(position)
+
+    def is_scored(self, position: int) -> bool:
+        return self._test(self._scored, position)
+
+    def candidates(self, position: int) -> np.ndarray:
+        """Positions of users to score for the user at position
+
+        A candidate must satisfy the user's gender, location and age
+        constraints, and the user must satisfy the candidate's.
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        gender = self._genders.get(position)
+        if gender is None:
+            return empty
+
+        # Gender: the candidate's gender is matched with the user's, and the other way round
+        mask = self._scored.copy()
+        mask &= self._union(self._gender_bitmaps, [
+            other for other in GENDER_MATCHES.get(gender, ()) if gender in GENDER_MATCHES.get(other, ())
+        ])
+
+        # Location: candidates who require the same location need the user's,
+        # and so does every candidate if the user requires it
+        location = self._locations.get(position)
+        same_location = self._location_bitmaps.get(location) if location else None
+        if self._test(self._same_location, position):
+            if same_location is None:
+                return empty
+            mask &= same_location
+        elif same_location is not None:
+            mask &= ~self._same_location | same_location
+        else:
+            mask &= ~self._same_location
+
+        # Age: the candidate is born within the user's age range
+        age_min, age_max = int(self._age_min[position]), int(self._age_max[position])
+        if age_min or age_max:
+            mask &= self._birth_range(*_birth_bounds(date.today(), age_min, age_max))
+
+        positions = np.flatnonzero(np.unpackbits(mask, count=len(self._user_ids)))
+        positions = positions[positions != position]
+
+        # ...and the user's age is within the candidate's range
+        birth = int(self._births[position])
+        if birth:
+            age = calculate_age(date.fromordinal(birth))
+            candidate_min, candidate_max = self._age_min[positions], self._age_max[positions]
+            positions = positions[
+                ((candidate_min == 0) | (candidate_min <= age)) & ((candidate_max == 0) | (candidate_max >= age))
+            ]
+        return positions
+
+    def _birth_range(self, earliest: int, latest: int) -> np.ndarray:
+        """Packed bitmap of positions born between two ordinals, inclusive"""
+        if len(self._unsorted) > self.merge_threshold:
+            self._merge()
+
+        in_range = np.zeros(self.capacity, dtype=bool)
+        start = np.searchsorted(self._sorted_births, earliest, side='left')
+        stop = np.searchsorted(self._sorted_births, latest, side='right')
+        in_range[self._sorted_positions[start:stop]] = True
+        if self._unsorted:
+            changed = np.fromiter(self._unsorted, dtype=np.int64, count=len(self._unsorted))
+            births = self._births[changed]
+            in_range[changed] = (births >= earliest) & (births <= latest)
+        return np.packbits(in_range)
+
+    def _merge(self) -> None:
+        known = np.flatnonzero(self._births[:len(self._user_ids)])
+        self._sorted_positions = known[np.argsort(self._births[known], kind='stable')]
+        self._sorted_births = self._births[self._sorted_positions]
+        self._unsorted = set()
+
+    def _update_location(self, position: int) -> None:
+        location = self._preferred_locations.get(position) or self._profile_locations.get(position)
+        self._move(self._location_bitmaps, self._locations, position, location)
+
+    def _move(self, bitmaps: Dict[str, np.ndarray], keys: Dict[int, str], position: int, key: Optional[str]) -> None:
+        """Move a position from the bitmap of its current key to the bitmap of key"""
+        current = keys.get(position)
+        if current == key:
+            return
+        if current is not None:
+            self._assign(bitmaps[current], position, False)
+            if not bitmaps[current].any():
+                del bitmaps[current]
+        if key is not None:
+            if key not in bitmaps:
+                bitmaps[key] = np.zeros_like(self._scored)
+            self._assign(bitmaps[key], position, True)
+        self._store(keys, position, key)
+
+    def _union(self, bitmaps: Dict[str, np.ndarray], keys: List[str]) -> np.ndarray:
+        result = np.zeros_like(self._scored)
+        for key in keys:
+            if key in bitmaps:
+                result |= bitmaps[key]
+        return result
+
+    @staticmethod
+    def _store(values: Dict[int, str], position: int, value: Optional[str]) -> None:
+        if value is None:
+            values.pop(position, None)
+        else:
+            values[position] = value
+
+    @staticmethod
+    def _test(bitmap: np.ndarray, position: int) -> bool:
+        return bool(bitmap[position >> 3] & (0x80 >> (position & 7)))
+
+    @staticmethod
+    def _assign(bitmap: np.ndarray, position: int, value: bool) -> None:
+        if value:
+            bitmap[position >> 3] |= 0x80 >> (position & 7)
+        else:
+            bitmap[position >> 3] &= 0xFF ^ (0x80 >> (position & 7))
+
+    def _allocate(self, capacity: int) -> None:
+        capacity = (capacity + 7) // 8 * 8
+        self._births = np.zeros(capacity, dtype=np.int32)  # Date ordinal, 0 = unknown
+        self._age_min = np.zeros(capacity, dtype=np.uint8)  # 0 = no bound
+        self._age_max = np.zeros(capacity, dtype=np.uint8)
+        self._same_location = np.zeros(capacity // 8, dtype=np.uint8)
+        self._scored = np.zeros(capacity // 8, dtype=np.uint8)
+
+    def _grow(self) -> None:
+        size = self.capacity
+        births, age_min, age_max = self._births, self._age_min, self._age_max
+        same_location, scored = self._same_location, self._scored
+        self._allocate(size * 2)
+        self._births[:size] = births
+        self._age_min[:size] = age_min
+        self._age_max[:size] = age_max
+        self._same_location[:size // 8] = same_location
+        self._scored[:size // 8] = scored
+        for bitmaps in (self._gender_bitmaps, self._location_bitmaps):
+            for key, bitmap in bitmaps.items():
+                bitmaps[key] = np.concatenate([bitmap, np.zeros(size // 8, dtype=np.uint8)])
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated
+
+from app.database import get_session
+from app.auth.dependencies import get_current_active_user
+from app.auth.models import User
+from app.matching.constants import MATCHING_SETTINGS
+from app.matching.schemas import RecommendationsListResponse
+from app.matching.service import matching_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/recommendations",
+    response_model=RecommendationsListResponse,
+    summary="Get recommendations",
+    description="Get the most compatible candidates for the current user, scored from questionnaire answers"
+)
+async def get_recommendations(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: int = Query(MATCHING_SETTINGS["DEFAULT_LIMIT"], ge=1, le=MATCHING_SETTINGS["MAX_LIMIT"])
+):
+    """Get recommendations"""
+    return await matching_service.get_recommendations(session, current_user.id, limit)
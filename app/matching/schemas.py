@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from uuid import UUID
+
+
+class RecommendationResponse(BaseModel):
+    user_id: UUID
+    first_name: str
+    last_name: str
+    age: Optional[int] = None
+    location: Optional[str] = None
+    bio: Optional[str] = None
+    avatar_url: Optional[str] = None
+    interests: List[str] = []
+    compatibility_score: int
+
+
+class RecommendationsListResponse(BaseModel):
+    recommendations: List[RecommendationResponse]
+    candidates: int
@@ -0,0 +1,142 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.matching.constants import COMPATIBILITY_WEIGHTS, ORDINAL_FIELDS
+from app.preferences.constants import VISUAL_TEST_SETTINGS
+from app.preferences.encoding import feature_encoder
+
+_NEUTRAL_SCORE = (VISUAL_TEST_SETTINGS["MIN_SCORE"] + VISUAL_TEST_SETTINGS["MAX_SCORE"]) / 2
+
+
+def _column_slices() -> Dict[str, slice]:
+    """Byte range of each field in the packed feature vector"""
+    slices = {}
+    for position, field in enumerate(feature_encoder.columns):
+        start = slices[field].start if field in slices else position
+        slices[field] = slice(start, position + 1)
+    return slices
+
+
+class CandidateMatrix:
+    """Packed answers of every candidate, scored against one user in a single vectorized pass
+
+    Rows are addressed by the positions of the candidate index. Features
+    are kept column-major so each field is a contiguous uint8 array.
+    Visual scores are stored centered on the neutral score with
+    precomputed norms, which makes visual similarity one matrix-vector
+    product.
+    """
+    def __init__(self, capacity: int):
+        self._slices = _column_slices()
+        self._allocate(capacity)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._visual_norms)
+
+    def ensure_capacity(self, capacity: int) -> None:
+        """Grow (by doubling) until the matrix holds capacity rows"""
+        while self.capacity < capacity:
+            self._grow()
+
+    def load(self, positions: np.ndarray, features: np.ndarray, visual_positions: np.ndarray, visual: np.ndarray) -> None:
+        """Write loaded feature and visual matrices into their rows"""
+        self._features[positions] = features
+        centered = self._center_visual(visual)
+        self._visual[visual_positions] = centered
+        self._visual_norms[visual_positions] = np.linalg.norm(centered, axis=1)
+
+    def set(self, position: int, feature_vector: bytes, visual_vector: Optional[bytes]) -> None:
+        self._features[position] = np.frombuffer(feature_vector, dtype=np.uint8)
+        self._set_visual(position, visual_vector)
+
+    def clear(self, position: int) -> None:
+        self._features[position] = 0
+        self._set_visual(position, None)
+
+    def score(self, position: int, candidates: np.ndarray) -> np.ndarray:
+        """Compatibility of the user at position with each candidate position, from 0 to 1"""
+        size = len(candidates)
+        features = self._features[candidates]
+        mine = self._features[position]
+        total = np.zeros(size, dtype=np.float32)
+        weight = np.zeros(size, dtype=np.float32)
+
+        def add(name: str, similarity: np.ndarray, answered: np.ndarray) -> None:
+            component_weight = COMPATIBILITY_WEIGHTS[name] * answered
+            np.add(total, similarity * component_weight, out=total)
+            np.add(weight, component_weight, out=weight)
+
+        for field in ('religion', 'relationship_type', 'smoking', 'drinking', 'education', 'exercise'):
+            column = self._slices[field].start
+            value = mine[column]
+            if not value:
+                continue
+            theirs = features[:, column]
+            if field in ORDINAL_FIELDS:
+                levels = ORDINAL_FIELDS[field]
+                answered = (theirs != 0) & (theirs <= levels) & (value <= levels)
+                similarity = 1 - np.abs(theirs.astype(np.float32) - value) / (levels - 1)
+            else:
+                answered = theirs != 0
+                similarity = theirs == value
+            add(field, similarity, answered)
+
+        for field in ('hobbies', 'love_language'):
+            columns = self._slices[field]
+            mask = mine[columns]
+            if not mask.any():
+                continue
+            theirs = features[:, columns]
+            shared = np.bitwise_count(theirs & mask).sum(axis=1, dtype=np.float32)
+            combined = np.bitwise_count(theirs | mask).sum(axis=1, dtype=np.float32)
+            answered = theirs.any(axis=1)
+            add(field, shared / np.maximum(combined, 1), answered)
+
+        if self._visual_norms[position]:
+            visual = self._visual[candidates]
+            norms = self._visual_norms[candidates]
+            cosine = (visual @ self._visual[position]) / np.maximum(norms * self._visual_norms[position], 1e-6)
+            add('visual', (cosine + 1) / 2, norms > 0)
+
+        return np.divide(total, weight, out=np.zeros(size, dtype=np.float32), where=weight > 0)
+
+    def top(self, scores: np.ndarray, candidates: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        """Best (position, score) pairs given the scores of candidate positions, highest first"""
+        if not len(candidates) or limit <= 0:
+            return []
+        if len(candidates) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(candidates[i]), float(scores[i])) for i in best]
+
+    def _set_visual(self, position: int, visual_vector: Optional[bytes]) -> None:
+        if visual_vector is None:
+            self._visual[position] = 0
+            self._visual_norms[position] = 0
+            return
+        centered = self._center_visual(np.frombuffer(visual_vector, dtype=np.uint8))
+        self._visual[position] = centered
+        self._visual_norms[position] = np.linalg.norm(centered)
+
+    @staticmethod
+    def _center_visual(scores: np.ndarray) -> np.ndarray:
+        """Scores relative to the neutral answer, unanswered items at 0"""
+        scores = scores.astype(np.float32)
+        return np.where(scores > 0, scores - _NEUTRAL_SCORE, 0)
+
+    def _allocate(self, capacity: int) -> None:
+        self._features = np.zeros((capacity, feature_encoder.width), dtype=np.uint8, order='F')
+        self._visual = np.zeros((capacity, VISUAL_TEST_SETTINGS["ITEM_COUNT"]), dtype=np.float32)
+        self._visual_norms = np.zeros(capacity, dtype=np.float32)
+
+    def _grow(self) -> None:
+        size = self.capacity
+        features, visual, norms = self._features, self._visual, self._visual_norms
+        self._allocate(size * 2)
+        self._features[:size] = features
+        self._visual[:size] = visual
+        self._visual_norms[:size] = norms
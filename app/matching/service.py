@@ -0,0 +1,224 @@
+import asyncio
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.matching.constants import CANDIDATE_INDEX_SETTINGS, MATCHING_SETTINGS
+from app.matching.exceptions import PreferencesRequiredError
+from app.matching.index import CandidateIndex
+from app.matching.schemas import RecommendationResponse, RecommendationsListResponse
+from app.matching.scoring import CandidateMatrix
+from app.preferences.encoding import feature_encoder, load_feature_matrix, load_visual_matrix, split_answers
+from app.preferences.models import UserPreferences
+from app.users.models import UserProfile
+from app.users.utils import calculate_age
+
+
+def _as_date(value: Optional[datetime]) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class MatchingService:
+    """Recommendations scored in memory against the candidates that pass each user's hard constraints
+
+    The candidate index (gender, location and age constraints) and the
+    candidate matrix (packed answers) are loaded on first use and then kept
+    current by registrations, profile and preference writes and user
+    deletes, so a request costs a few bitmap operations, one vectorized
+    scoring pass over the remaining candidates and a single query for the
+    returned profiles.
+    """
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._index: Optional[CandidateIndex] = None
+        self._matrix: Optional[CandidateMatrix] = None
+        # Changes made while loading, replayed once the index is built
+        self._pending: Optional[List[Callable[[CandidateIndex, CandidateMatrix], None]]] = None
+
+    def user_registered(self, user: User) -> None:
+        """Add a new user to the index (they are scored once they answer the questionnaire)"""
+        user_id, gender, date_of_birth = user.id, user.gender.value, _as_date(user.date_of_birth)
+
+        def change(index: CandidateIndex, matrix: CandidateMatrix) -> None:
+            index.add_user(user_id, gender, date_of_birth)
+            matrix.ensure_capacity(index.capacity)
+        self._apply(change)
+
+    def profile_changed(self, profile: UserProfile) -> None:
+        """Refresh a user's profile location after a profile write"""
+        user_id, location = profile.user_id, profile.location
+
+        def change(index: CandidateIndex, matrix: CandidateMatrix) -> None:
+            position = index.position(user_id)
+            if position is not None:
+                index.set_profile_location(position, location)
+        self._apply(change)
+
+    def preferences_changed(self, preferences: UserPreferences) -> None:
+        """Refresh a user's constraints and answers after a preferences write"""
+        user_id = preferences.user_id
+        constraints = (preferences.location, preferences.same_location == 'yes', preferences.age_min, preferences.age_max)
+        if preferences.feature_vector is None or preferences.feature_version != feature_encoder.version:
+            vectors = None
+        else:
+            vectors = (preferences.feature_vector, preferences.visual_vector)
+
+        def change(index: CandidateIndex, matrix: CandidateMatrix) -> None:
+            position = index.position(user_id)
+            if position is None:
+                return
+            index.set_preferences(position, *constraints)
+            index.set_scored(position, vectors is not None)
+            if vectors is None:
+                matrix.clear(position)
+            else:
+                matrix.set(position, *vectors)
+        self._apply(change)
+
+    def user_removed(self, user_id: UUID) -> None:
+        """Drop a deactivated or deleted user from the candidates"""
+        def change(index: CandidateIndex, matrix: CandidateMatrix) -> None:
+            position = index.position(user_id)
+            if position is not None:
+                index.remove(user_id)
+                matrix.clear(position)
+        self._apply(change)
+
+    def invalidate(self) -> None:
+        """Reload every candidate on next use (after bulk imports)"""
+        self._index = None
+        self._matrix = None
+
+    def _apply(self, change: Callable[[CandidateIndex, CandidateMatrix], None]) -> None:
+        if self._pending is not None:
+            self._pending.append(change)
+        if self._index is not None:
+            change(self._index, self._matrix)
+
+    async def get_recommendations(self, session: AsyncSession, user_id: UUID, limit: int) -> RecommendationsListResponse:
+        """Top candidates for a user by compatibility score"""
+        index, matrix = await self._ensure_loaded()
+        position = index.position(user_id)
+        if position is None or not index.is_scored(position):
+            raise PreferencesRequiredError()
+
+        candidates = index.candidates(position)
+        best = matrix.top(matrix.score(position, candidates), candidates, limit)
+
+        recommendations = await self._load_profiles(
+            session, [(index.user_id(candidate), score) for candidate, score in best]
+        )
+        return RecommendationsListResponse(recommendations=recommendations, candidates=len(candidates))
+
+    async def _load_profiles(self, session: AsyncSession, ranked: List[tuple]) -> List[RecommendationResponse]:
+        if not ranked:
+            return []
+
+        result = await session.execute(
+            select(
+                User.id, User.first_name, User.last_name, User.date_of_birth,
+                UserProfile.bio, UserProfile.avatar_url, UserProfile.location,
+                UserPreferences.location.label("preferred_location"), UserPreferences.hobbies
+            )
+            .outerjoin(UserProfile, UserProfile.user_id == User.id)
+            .outerjoin(UserPreferences, UserPreferences.user_id == User.id)
+            .where(User.id.in_([user_id for user_id, _ in ranked]), User.is_active.is_(True))
+        )
+        rows = {row.id: row for row in result.all()}
+
+        recommendations = []
+        for user_id, score in ranked:
+            row = rows.get(user_id)
+            if row is None:
+                continue
+            recommendations.append(RecommendationResponse(
+                user_id=user_id,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                age=calculate_age(row.date_of_birth.date()) if row.date_of_birth else None,
+                location=row.location or row.preferred_location,
+                bio=row.bio,
+                avatar_url=row.avatar_url,
+                interests=split_answers(row.hobbies),
+                compatibility_score=round(score * 100)
+            ))
+        return recommendations
+
+    async def reload(self, force: bool = True) -> None:
+        """Rebuild the candidate index and matrix from the database and swap them in
+
+        Also picks up writes made by other processes (imports, migrations).
+        Changes applied while loading are replayed on the new index.
+        """
+        async with self._lock:
+            if not force and self._index is not None:
+                return
+            self._pending = []
+            try:
+                index = CandidateIndex(
+                    capacity=MATCHING_SETTINGS["INITIAL_CAPACITY"],
+                    merge_threshold=CANDIDATE_INDEX_SETTINGS["MERGE_THRESHOLD"]
+                )
+                async with AsyncSessionLocal() as session:
+                    await self._load_index(session, index)
+                    user_ids, features = await load_feature_matrix(session)
+                    visual_ids, visual = await load_visual_matrix(session)
+
+                matrix = CandidateMatrix(capacity=index.capacity)
+                feature_rows, feature_positions = self._positions(index, user_ids)
+                visual_rows, visual_positions = self._positions(index, visual_ids)
+                matrix.load(feature_positions, features[feature_rows], visual_positions, visual[visual_rows])
+                for position in feature_positions:
+                    index.set_scored(int(position), True)
+
+                for change in self._pending:
+                    change(index, matrix)
+                self._index, self._matrix = index, matrix
+            finally:
+                self._pending = None
+
+    async def _load_index(self, session: AsyncSession, index: CandidateIndex) -> None:
+        """Add every active user with their profile location and questionnaire constraints"""
+        result = await session.stream(
+            select(
+                User.id, User.gender, User.date_of_birth, UserProfile.location,
+                UserPreferences.location.label("preferred_location"), UserPreferences.same_location,
+                UserPreferences.age_min, UserPreferences.age_max
+            )
+            .outerjoin(UserProfile, UserProfile.user_id == User.id)
+            .outerjoin(UserPreferences, UserPreferences.user_id == User.id)
+            .where(User.is_active.is_(True))
+            .execution_options(yield_per=MATCHING_SETTINGS["LOAD_BATCH_SIZE"])
+        )
+        async for partition in result.partitions():
+            for row in partition:
+                position = index.add_user(row.id, row.gender.value, _as_date(row.date_of_birth))
+                index.set_profile_location(position, row.location)
+                index.set_preferences(
+                    position, row.preferred_location, row.same_location == 'yes',
+                    row.age_min, row.age_max
+                )
+
+    @staticmethod
+    def _positions(index: CandidateIndex, user_ids: List[UUID]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of loaded vectors that belong to indexed users, and those users' positions"""
+        matched = [(row, index.position(user_id)) for row, user_id in enumerate(user_ids)]
+        matched = [(row, position) for row, position in matched if position is not None]
+        if not matched:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        rows, positions = map(np.array, zip(*matched))
+        return rows, positions
+
+    async def _ensure_loaded(self) -> Tuple[CandidateIndex, CandidateMatrix]:
+        if self._index is None:
+            await self.reload(force=False)
+        return self._index, self._matrix
+
+
+matching_service = MatchingService()
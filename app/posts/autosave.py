@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.posts.cache import post_detail_cache, post_count_cache
+from app.posts.constants import AUTOSAVE_SETTINGS
+from app.posts.duplicates import min_hasher, duplicate_index
+from app.posts.exceptions import PostNotFoundError, StaleVersionError
+from app.posts.models import Post, PostStatus, PostSignature
+from app.posts.schemas import AutosaveRequest
+from app.posts.utils import compute_content_fields
+from app.exceptions import UnauthorizedError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingAutosave:
+    """Latest unsaved draft state of one post"""
+    post_id: UUID
+    author_id: UUID
+    slug: str
+    stored_version: int  # Version the UPDATE expects to find
+    version: int  # Version handed to the editor after the last patch
+    flush_at: datetime
+    editor_id: Optional[UUID] = None  # Last user whose patch was accepted
+    values: Dict[str, str] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class AutosaveBuffer:
+    """Coalesce draft autosaves in memory and write each post once per window
+
+    Every accepted patch bumps the version returned to the editor, and a
+    patch is only accepted against the latest version, so a second editor
+    working from an older copy gets a conflict. The buffered state is
+    written with one UPDATE guarded by the version the row had when the
+    window opened; if anything else wrote the post meanwhile the buffered
+    draft is dropped and the editor's next autosave is rejected. A write
+    that fails is put back in the buffer and retried after another window.
+    """
+    def __init__(self, coalesce_seconds: float):
+        self.coalesce_seconds = coalesce_seconds
+        self._pending: Dict[UUID, PendingAutosave] = {}
+        self._flushing: Dict[UUID, PendingAutosave] = {}
+
+    async def submit(self, post_id: UUID, patch: AutosaveRequest, user: User) -> PendingAutosave:
+        """Buffer a patch and return the pending state (with the new version)"""
+        entry = self._pending.get(post_id)
+        if entry is None:
+            entry = await self._open(post_id, user)
+        else:
+            self._check_author(entry.author_id, user)
+
+        if patch.version != entry.version:
+            raise StaleVersionError(entry.version)
+
+        entry.values.update(patch.model_dump(exclude_unset=True, exclude={'version'}))
+        entry.version += 1
+        entry.editor_id = user.id
+        if entry.task is None:
+            entry.task = asyncio.create_task(self._flush_later(entry))
+        return entry
+
+    async def flush(self, post_id: UUID) -> bool:
+        """Write a post's buffered draft now (before a full update, for instance)
+
+        Returns True if the post row was changed.
+        """
+        entry = self._pending.get(post_id)
+        if entry is None:
+            return False
+
+        if entry.task is not None:
+            entry.task.cancel()
+        return await self._write(entry)
+
+    async def flush_all(self) -> None:
+        for post_id in list(self._pending):
+            await self.flush(post_id)
+
+    def discard(self, post_id: UUID) -> None:
+        entry = self._pending.pop(post_id, None)
+        if entry is not None and entry.task is not None:
+            entry.task.cancel()
+
+    @staticmethod
+    def _check_author(author_id: UUID, user: User) -> None:
+        if author_id != user.id and not user.is_superuser:
+            raise UnauthorizedError("Not enough permissions")
+
+    async def _open(self, post_id: UUID, user: User) -> PendingAutosave:
+        """Start a coalescing window, reading the current version unless a write for the post is in flight"""
+        in_flight = self._flushing.get(post_id)
+        if in_flight is not None:
+            author_id, slug, version = in_flight.author_id, in_flight.slug, in_flight.version
+        else:
+            async with AsyncSessionLocal() as session:
+                row = (await session.execute(
+                    select(Post.author_id, Post.slug, Post.status, Post.version).where(Post.id == post_id)
+                )).first()
+            if row is None:
+                raise PostNotFoundError()
+            if row.status != PostStatus.DRAFT:
+                raise ValidationError("Only draft posts can be autosaved")
+            author_id, slug, version = row.author_id, row.slug, row.version
+        self._check_author(author_id, user)
+
+        # Another request may have opened the window while we were reading
+        entry = self._pending.get(post_id)
+        if entry is None:
+            entry = PendingAutosave(
+                post_id=post_id, author_id=author_id, slug=slug,
+                stored_version=version, version=version,
+                flush_at=datetime.utcnow() + timedelta(seconds=self.coalesce_seconds)
+            )
+            self._pending[post_id] = entry
+        return entry
+
+    async def _flush_later(self, entry: PendingAutosave) -> None:
+        await asyncio.sleep(self.coalesce_seconds)
+        try:
+            await self._write(entry)
+        except Exception:
+            logger.exception("Autosave of post %s failed", entry.post_id)
+
+    def _restore(self, entry: PendingAutosave) -> None:
+        """Put back a draft whose write failed, under any patches buffered since, and schedule a retry"""
+        newer = self._pending.get(entry.post_id)
+        if newer is not None:
+            # The newer window started from this draft's version, which never reached the row
+            entry.values.update(newer.values)
+            entry.version, entry.editor_id = newer.version, newer.editor_id or entry.editor_id
+            if newer.task is not None:
+                newer.task.cancel()
+        self._pending[entry.post_id] = entry
+        entry.flush_at = datetime.utcnow() + timedelta(seconds=self.coalesce_seconds)
+        entry.task = asyncio.create_task(self._flush_later(entry))
+
+    async def _write(self, entry: PendingAutosave) -> bool:
+        # Imported here: the service module imports this one
+        from app.posts.service import revision_service
+
+        if self._pending.get(entry.post_id) is entry:
+            del self._pending[entry.post_id]
+        self._flushing[entry.post_id] = entry
+        try:
+            values = dict(entry.values)
+            signature = None
+            if 'content' in values:
+                values.update(compute_content_fields(values['content']))
+                signature = min_hasher.signature(values['plain_text'])
+            values.update(version=entry.version, updated_at=datetime.utcnow())
+
+            async with AsyncSessionLocal() as session:
+                post = (await session.execute(
+                    select(Post).where(
+                        Post.id == entry.post_id,
+                        Post.version == entry.stored_version,
+                        Post.status == PostStatus.DRAFT
+                    )
+                )).scalar_one_or_none()
+                if post is None:
+                    # Written elsewhere since the window opened; the buffered draft is stale
+                    return False
+                previous_text = (post.title, post.content, post.updated_at or post.created_at)
+
+                result = await session.execute(
+                    update(Post)
+                    .where(
+                        Post.id == entry.post_id,
+                        Post.version == entry.stored_version,
+                        Post.status == PostStatus.DRAFT
+                    )
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if not result.rowcount:
+                    return False
+
+                for name in ('title', 'content'):
+                    if name in values:
+                        set_committed_value(post, name, values[name])
+                if (post.title, post.content) != previous_text[:2]:
+                    await revision_service.record_revision(
+                        session, post, entry.editor_id or entry.author_id, previous=previous_text
+                    )
+
+                if 'content' in values:
+                    await session.execute(delete(PostSignature).where(PostSignature.post_id == entry.post_id))
+                    if signature is not None:
+                        session.add(PostSignature(post_id=entry.post_id, signature=min_hasher.to_bytes(signature)))
+                await session.commit()
+
+            post_detail_cache.invalidate(entry.post_id, entry.slug)
+            post_count_cache.clear()
+            if 'content' in values:
+                if signature is not None:
+                    duplicate_index.add(entry.post_id, signature)
+                else:
+                    duplicate_index.remove(entry.post_id)
+            return True
+        except Exception:
+            self._restore(entry)
+            raise
+        finally:
+            if self._flushing.get(entry.post_id) is entry:
+                del self._flushing[entry.post_id]
+
+
+autosave_buffer = AutosaveBuffer(coalesce_seconds=AUTOSAVE_SETTINGS["COALESCE_SECONDS"])
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.posts.cache import post_detail_cache, post_count_cache
+from app.posts.constants import BULK_SETTINGS
+from app.posts.duplicates import duplicate_index
+from app.feeds.service import feed_service
+from app.posts.jobs import reconcile_tag_counts, rebuild_hot_feed
+from app.posts.models import Comment, Post, PostStatus
+from app.posts.related import refresh_related_posts
+from app.posts.schemas import (
+    BulkPostAction, BulkPostActionRequest,
+    BulkCommentAction, BulkCommentActionRequest
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkJob:
+    """Progress of a bulk moderation job"""
+    target: str
+    action: str
+    total: int = 0
+    processed: int = 0
+    affected: int = 0
+    status: str = "pending"
+    error: Optional[str] = None
+    id: UUID = field(default_factory=uuid4)
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+_jobs: "OrderedDict[UUID, BulkJob]" = OrderedDict()
+
+
+def get_bulk_job(job_id: UUID) -> Optional[BulkJob]:
+    """Get a tracked bulk job by ID"""
+    return _jobs.get(job_id)
+
+
+def _track(job: BulkJob) -> None:
+    """Track a new job, forgetting the oldest finished jobs beyond MAX_TRACKED_JOBS
+
+    Running jobs are never evicted: the tracked job holds the only
+    reference to its task.
+    """
+    _jobs[job.id] = job
+    excess = len(_jobs) - BULK_SETTINGS["MAX_TRACKED_JOBS"]
+    if excess > 0:
+        finished = [job_id for job_id, tracked in _jobs.items() if tracked.finished_at is not None]
+        for job_id in finished[:excess]:
+            del _jobs[job_id]
+
+
+def _chunks(ids: List[UUID], size: int) -> List[List[UUID]]:
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+async def _iter_id_chunks(session: AsyncSession, id_column, conditions: list, size: int) -> AsyncIterator[List[UUID]]:
+    """Yield matching IDs in primary key order, one chunk at a time (keyset pagination)"""
+    last_id = None
+    while True:
+        query = select(id_column).where(*conditions).order_by(id_column).limit(size)
+        if last_id is not None:
+            query = query.where(id_column > last_id)
+
+        ids = list((await session.execute(query)).scalars().all())
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+async def _run(
+    job: BulkJob,
+    count_query,
+    chunk_source,
+    apply_chunk: Callable[[AsyncSession, List[UUID]], Awaitable[Tuple[int, List[UUID]]]],
+    after_commit: Callable[[List[UUID]], None],
+    refresh: Callable[[], Awaitable]
+) -> None:
+    """Drive a job: apply each chunk as set-based statements and commit per chunk
+
+    apply_chunk returns (affected rows, IDs of the posts it changed);
+    after_commit gets those IDs once the chunk is committed, so caches and
+    in-memory indexes never see a change before it is visible or after it
+    was rolled back. refresh rebuilds derived data afterwards, also when a
+    chunk failed (earlier chunks are committed). The job is finished only
+    once it has run; failures of either step are reported in the job status.
+    """
+    job.status = "running"
+    errors = []
+    try:
+        async with AsyncSessionLocal() as session:
+            if count_query is not None:
+                job.total = (await session.execute(count_query)).scalar()
+
+            async for chunk in chunk_source(session):
+                affected, changed_post_ids = await apply_chunk(session, chunk)
+                await session.commit()
+                job.affected += affected
+                job.processed += len(chunk)
+                after_commit(changed_post_ids)
+    except Exception as e:
+        logger.exception("Bulk %s job %s failed", job.target, job.id)
+        errors.append(str(e))
+
+    try:
+        await refresh()
+    except Exception as e:
+        logger.exception("Refreshing derived data after bulk %s job %s failed", job.target, job.id)
+        errors.append(f"Refreshing derived data failed: {e}")
+
+    job.status = "failed" if errors else "completed"
+    job.error = "; ".join(errors) or None
+    job.finished_at = datetime.utcnow()
+
+
+def _post_conditions(request: BulkPostActionRequest) -> list:
+    criteria = request.filter
+    conditions = []
+    if criteria.status:
+        conditions.append(Post.status == criteria.status)
+    if criteria.author_id:
+        conditions.append(Post.author_id == criteria.author_id)
+    if criteria.created_before:
+        conditions.append(Post.created_at < criteria.created_before)
+    return conditions
+
+
+def _invalidate_details(post_ids: List[UUID]) -> None:
+    for post_id in post_ids:
+        post_detail_cache.invalidate(post_id)
+
+
+async def _apply_post_chunk(
+    session: AsyncSession, action: BulkPostAction, post_ids: List[UUID]
+) -> Tuple[int, List[UUID]]:
+    now = datetime.utcnow()
+
+    if action == BulkPostAction.DELETE:
+        # Dependent rows are removed by ON DELETE CASCADE
+        result = await session.execute(delete(Post).where(Post.id.in_(post_ids)).returning(Post.id))
+    else:
+        new_status = PostStatus.PUBLISHED if action == BulkPostAction.PUBLISH else PostStatus.ARCHIVED
+        values = {"status": new_status, "updated_at": now, "version": Post.version + 1}
+        if new_status == PostStatus.PUBLISHED:
+            values["published_at"] = func.coalesce(Post.published_at, now)
+
+        result = await session.execute(
+            update(Post)
+            .where(Post.id.in_(post_ids), Post.status != new_status)
+            .values(**values)
+            .returning(Post.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    changed_post_ids = list(result.scalars().all())
+    return len(changed_post_ids), changed_post_ids
+
+
+async def _apply_comment_chunk(
+    session: AsyncSession, action: BulkCommentAction, comment_ids: List[UUID]
+) -> Tuple[int, List[UUID]]:
+    approved = action == BulkCommentAction.APPROVE
+    result = await session.execute(
+        update(Comment)
+        .where(Comment.id.in_(comment_ids), Comment.is_approved != approved)
+        .values(is_approved=approved, updated_at=datetime.utcnow())
+        .returning(Comment.post_id)
+        .execution_options(synchronize_session=False)
+    )
+    changed_post_ids = result.scalars().all()
+    if not changed_post_ids:
+        return 0, []
+    post_ids = set(changed_post_ids)
+
+    # Recount approved comments only for the posts this chunk touched
+    approved_count = (
+        select(func.count())
+        .select_from(Comment)
+        .where(Comment.post_id == Post.id, Comment.is_approved == True)
+        .scalar_subquery()
+    )
+    await session.execute(
+        update(Post)
+        .where(Post.id.in_(post_ids))
+        .values(comment_count=approved_count)
+        .execution_options(synchronize_session=False)
+    )
+    return len(changed_post_ids), list(post_ids)
+
+
+def start_post_job(request: BulkPostActionRequest) -> BulkJob:
+    """Start archiving/publishing/deleting posts in the background"""
+    job = BulkJob(target="posts", action=request.action.value)
+    chunk_size = BULK_SETTINGS["CHUNK_SIZE"]
+
+    if request.ids is not None:
+        ids = list(dict.fromkeys(request.ids))
+        job.total = len(ids)
+        count_query = None
+
+        async def chunk_source(session):
+            for chunk in _chunks(ids, chunk_size):
+                yield chunk
+    else:
+        conditions = _post_conditions(request)
+        count_query = select(func.count(Post.id)).where(*conditions)
+
+        def chunk_source(session):
+            return _iter_id_chunks(session, Post.id, conditions, chunk_size)
+
+    changed_post_ids: List[UUID] = []
+
+    def after_commit(post_ids: List[UUID]) -> None:
+        _invalidate_details(post_ids)
+        if request.action == BulkPostAction.DELETE:
+            for post_id in post_ids:
+                duplicate_index.remove(post_id)
+        changed_post_ids.extend(post_ids)
+
+    async def refresh():
+        post_count_cache.clear()
+        feed_service.invalidate_all()
+        await reconcile_tag_counts()
+        await rebuild_hot_feed()
+        # Only the changed posts; the periodic rebuild refits the model
+        await refresh_related_posts(changed_post_ids)
+
+    job.task = asyncio.create_task(_run(
+        job, count_query, chunk_source,
+        lambda session, chunk: _apply_post_chunk(session, request.action, chunk), after_commit, refresh
+    ))
+    _track(job)
+    return job
+
+
+def start_comment_job(request: BulkCommentActionRequest) -> BulkJob:
+    """Start approving/rejecting comments in the background"""
+    job = BulkJob(target="comments", action=request.action.value)
+    chunk_size = BULK_SETTINGS["CHUNK_SIZE"]
+
+    if request.ids is not None:
+        ids = list(dict.fromkeys(request.ids))
+        job.total = len(ids)
+        count_query = None
+
+        async def chunk_source(session):
+            for chunk in _chunks(ids, chunk_size):
+                yield chunk
+    else:
+        criteria = request.filter
+        conditions = []
+        if criteria.post_id:
+            conditions.append(Comment.post_id == criteria.post_id)
+        if criteria.author_id:
+            conditions.append(Comment.author_id == criteria.author_id)
+        if criteria.is_approved is not None:
+            conditions.append(Comment.is_approved == criteria.is_approved)
+        count_query = select(func.count(Comment.id)).where(*conditions)
+
+        def chunk_source(session):
+            return _iter_id_chunks(session, Comment.id, conditions, chunk_size)
+
+    job.task = asyncio.create_task(_run(
+        job, count_query, chunk_source,
+        lambda session, chunk: _apply_comment_chunk(session, request.action, chunk),
+        _invalidate_details, rebuild_hot_feed
+    ))
+    _track(job)
+    return job
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from uuid import UUID
+import hashlib
+
+from app.cache import CacheStats, TTLCache
+from app.posts.constants import POST_CACHE_SETTINGS, COUNT_CACHE_SETTINGS
+from app.posts.models import Post, Tag
+from app.posts.schemas import PostDetailResponse, TagDetailResponse
+from app.posts.utils import generate_content_hash
+
+
+# Counters change on every view or comment, so they are left out of the cached body
+LIVE_COUNTER_FIELDS = {'view_count', 'comment_count'}
+
+
+@dataclass
+class CachedPostDetail:
+    """Serialized post detail, without its counters, ready to be written to the response
+
+    view_count is bumped in place on every served view; comment changes
+    invalidate the entry.
+    """
+    post_id: UUID
+    slug: str
+    status: str
+    body: bytes
+    etag: str
+    view_count: int
+    comment_count: int
+
+    def render(self) -> bytes:
+        """Response body with the current counters appended"""
+        return self.body[:-1] + f',"view_count":{self.view_count},"comment_count":{self.comment_count}}}'.encode()
+
+
+def generate_post_etag(post: Post) -> str:
+    """Build a strong ETag from post identity, last modification and content hash
+
+    View and comment counters are not part of the ETag, so a 304 can be
+    answered while they have moved on.
+    """
+    modified = post.updated_at or post.created_at
+    content_hash = post.content_hash or generate_content_hash(post.content)
+    digest = hashlib.md5(f"{post.id}:{modified.isoformat()}:{content_hash}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+class PostDetailCache:
+    """In-memory cache of serialized post details, addressable by ID or slug"""
+    def __init__(self, ttl: float, max_entries: int):
+        self._entries = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._slug_index: Dict[str, UUID] = {}
+
+    @property
+    def stats(self):
+        return self._entries.stats
+
+    def get(self, identifier: str) -> Optional[CachedPostDetail]:
+        """Look up by UUID string or slug"""
+        try:
+            post_id = UUID(identifier)
+        except ValueError:
+            post_id = self._slug_index.get(identifier)
+            if post_id is None:
+                self._entries.stats.record_miss()
+                return None
+
+        entry = self._entries.get(post_id)
+        if entry is None:
+            self._slug_index.pop(identifier, None)
+        return entry
+
+    def store(self, post: Post, pending_views: int = 0) -> CachedPostDetail:
+        """Serialize post and cache it under both ID and slug
+
+        pending_views are views counted but not yet written to the row.
+        """
+        entry = CachedPostDetail(
+            post_id=post.id,
+            slug=post.slug,
+            status=post.status,
+            body=PostDetailResponse.model_validate(post).model_dump_json(exclude=LIVE_COUNTER_FIELDS).encode(),
+            etag=generate_post_etag(post),
+            view_count=post.view_count + pending_views,
+            comment_count=post.comment_count
+        )
+        self._entries.set(post.id, entry)
+        self._slug_index[post.slug] = post.id
+        return entry
+
+    def invalidate(self, post_id: UUID, slug: Optional[str] = None) -> None:
+        """Drop cached detail for a post (and any slug pointing at it)"""
+        entry = self._entries.peek(post_id)
+        self._entries.invalidate(post_id)
+        for stale_slug in {slug, entry.slug if entry else None}:
+            if stale_slug and self._slug_index.get(stale_slug) == post_id:
+                del self._slug_index[stale_slug]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._slug_index.clear()
+
+    def snapshot(self) -> dict:
+        return {**self._entries.stats.snapshot(), "entries": len(self._entries)}
+
+
+post_detail_cache = PostDetailCache(
+    ttl=POST_CACHE_SETTINGS["DETAIL_TTL"],
+    max_entries=POST_CACHE_SETTINGS["DETAIL_MAX_ENTRIES"]
+)
+
+
+class TagListCache:
+    """All tags with their published post counts, sorted by popularity"""
+    def __init__(self):
+        self.stats = CacheStats()
+        self.generation = 0  # Bumped on every invalidation
+        self._tags: Optional[List[TagDetailResponse]] = None
+
+    def get(self) -> Optional[List[TagDetailResponse]]:
+        """Return the sorted tag list, or None if it has to be reloaded"""
+        if self._tags is None:
+            self.stats.record_miss()
+            return None
+
+        self.stats.record_hit()
+        return self._tags
+
+    def store(self, tags: List[Tag], generation: int) -> List[TagDetailResponse]:
+        """Sort tags by post count (descending), then name, and cache them
+
+        generation is the value read before loading the tags; if the cache
+        was invalidated since, the loaded counts may predate that write
+        and are returned without being cached.
+        """
+        sorted_tags = sorted(
+            (TagDetailResponse.model_validate(tag) for tag in tags),
+            key=lambda tag: (-tag.post_count, tag.name)
+        )
+        if generation == self.generation:
+            self._tags = sorted_tags
+        return sorted_tags
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._tags = None
+
+
+tag_list_cache = TagListCache()
+
+
+# Totals for paginated post lists, keyed by normalized filter set
+post_count_cache = TTLCache(
+    ttl=COUNT_CACHE_SETTINGS["TTL"],
+    max_entries=COUNT_CACHE_SETTINGS["MAX_ENTRIES"]
+)
@@ -16,6 +16,10 @@ MAX_TAG_SLUG_LENGTH = 60
 MAX_COMMENT_LENGTH = 1000
 DEFAULT_COMMENT_APPROVAL = True
 
+COMMENT_COUNT_SETTINGS = {
+    "RECONCILE_INTERVAL_SECONDS": 3600
+}
+
 # Pagination settings
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
@@ -115,6 +119,95 @@ VIEW_TRACKING = {
     "VIEW_COUNT_CACHE_TTL": 300  # 5 minutes
 }
 
+# Post detail response cache
+POST_CACHE_SETTINGS = {
+    "DETAIL_TTL": VIEW_TRACKING["VIEW_COUNT_CACHE_TTL"],
+    "DETAIL_MAX_ENTRIES": 5000,
+    "CACHE_CONTROL": "public, max-age=60, must-revalidate"
+}
+
+# Paginated list totals
+COUNT_CACHE_SETTINGS = {
+    "TTL": 30,
+    "MAX_ENTRIES": 1000,
+    "ESTIMATE_THRESHOLD": 100000  # Use planner estimates for unfiltered lists above this size
+}
+
+# Tag facet counts returned with post lists
+TAG_FACET_SETTINGS = {
+    "MAX_FILTER_TAGS": 10,
+    "MAX_FACETS": 50
+}
+
+# Hot feed ranking
+HOT_FEED_SETTINGS = {
+    "VIEW_WEIGHT": 1,
+    "COMMENT_WEIGHT": 5,
+    "DECAY_SECONDS": 45000,  # 10x engagement outweighs being this much older
+    "REBUILD_INTERVAL_SECONDS": 900,
+    "MAX_LIMIT": 50
+}
+
+# Bulk moderation
+BULK_SETTINGS = {
+    "CHUNK_SIZE": 1000,
+    "MAX_TRACKED_JOBS": 100
+}
+
+# Related posts (TF-IDF over post text plus tag one-hots)
+RELATED_POSTS_SETTINGS = {
+    "TOP_K": 10,
+    "MAX_FEATURES": 5000,
+    "MIN_DF": 2,
+    "MAX_DF_RATIO": 0.5,
+    "TAG_WEIGHT": 0.5,  # Norm of the tag part relative to the unit-norm text part
+    "MIN_SCORE": 0.05,
+    "BLOCK_SIZE": 1024,
+    "REBUILD_INTERVAL_SECONDS": 86400
+}
+
+# Near-duplicate detection (MinHash LSH)
+DUPLICATE_DETECTION_SETTINGS = {
+    "ENABLED": True,
+    "SHINGLE_SIZE": 5,  # Words per shingle
+    "NUM_PERM": 128,
+    "BANDS": 16,  # 16 bands x 8 rows: candidates start around 0.7 similarity
+    "SIMILARITY_THRESHOLD": 0.8,
+    "MERGE_THRESHOLD": 10000,  # Recent inserts kept in a dict before merging into sorted arrays
+    "SEED": 42
+}
+
+# Revision history
+REVISION_SETTINGS = {
+    "SNAPSHOT_INTERVAL": 10,  # Max deltas to apply when reconstructing a revision
+    "MAX_DELTA_RATIO": 0.5,  # Store a snapshot instead when the delta is not much smaller
+    "COMPRESSION_LEVEL": 6
+}
+
+# NDJSON import/export
+TRANSFER_SETTINGS = {
+    "IMPORT_CHUNK_SIZE": 1000,
+    "EXPORT_BATCH_SIZE": 1000,
+    "MAX_REPORTED_ERRORS": 100,
+    "MAX_LINE_BYTES": 1024 * 1024  # Longer import lines are rejected without being buffered
+}
+
+# Post view counting
+VIEW_COUNT_SETTINGS = {
+    "FLUSH_INTERVAL_SECONDS": 30  # Views are buffered in memory and written once per interval
+}
+
+# Draft autosave
+AUTOSAVE_SETTINGS = {
+    "COALESCE_SECONDS": 10  # Patches within this window are written as one UPDATE
+}
+
+# Tag statistics
+TAG_STATS_SETTINGS = {
+    "POPULAR_TAGS_LIMIT": 20,
+    "RECONCILE_INTERVAL_SECONDS": 3600
+}
+
 # Search settings
 SEARCH_SETTINGS = {
     "MIN_SEARCH_LENGTH": 3,
@@ -1,11 +1,13 @@
 from fastapi import Depends, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 from uuid import UUID
 
 from app.database import get_session
 from app.posts.service import post_service
 from app.posts.models import Post, PostStatus
+from app.posts.schemas import TagMatchMode
+from app.posts.constants import TAG_FACET_SETTINGS
 from app.auth.models import User
 from app.auth.dependencies import get_current_active_user
 from app.exceptions import NotFoundError, UnauthorizedError
@@ -50,17 +52,17 @@ def validate_user_access_to_post(post: Post, user: User) -> None:
 
 
 async def get_post_by_id_or_slug(
-    identifier: Annotated[str, Path(description="Post ID or slug")],
+    post_id_or_slug: Annotated[str, Path(description="Post ID or slug")],
     session: Annotated[AsyncSession, Depends(get_session)]
 ) -> Post:
     """Get post by ID or slug dependency"""
     # Try to parse as UUID first
     try:
-        post_id = UUID(identifier)
+        post_id = UUID(post_id_or_slug)
         post = await post_service.get_post_by_id(session, post_id)
     except ValueError:
         # If not a valid UUID, treat as slug
-        post = await post_service.get_post_by_slug(session, identifier)
+        post = await post_service.get_post_by_slug(session, post_id_or_slug)
     
     if not post:
         raise NotFoundError("Post not found")
@@ -89,14 +91,28 @@ class PostFilterParams:
         status: Optional[PostStatus] = Query(None, description="Filter by post status"),
         author_id: Optional[UUID] = Query(None, description="Filter by author ID"),
         tag_slug: Optional[str] = Query(None, description="Filter by tag slug"),
+        tags: Optional[List[str]] = Query(
+            None, max_length=TAG_FACET_SETTINGS["MAX_FILTER_TAGS"], description="Filter by tag slugs (repeatable)"
+        ),
+        tag_mode: TagMatchMode = Query(TagMatchMode.ALL, description="Require all tags or any of them"),
         search: Optional[str] = Query(None, description="Search in title, content, and excerpt"),
-        is_featured: Optional[bool] = Query(None, description="Filter by featured status")
+        is_featured: Optional[bool] = Query(None, description="Filter by featured status"),
+        facets: bool = Query(False, description="Include per-tag facet counts")
     ):
         self.status = status
         self.author_id = author_id
         self.tag_slug = tag_slug
+        self.tags = tags
+        self.tag_mode = tag_mode
         self.search = search
         self.is_featured = is_featured
+        self.facets = facets
+    
+    @property
+    def tag_slugs(self) -> List[str]:
+        """Tag slugs from both the single and the repeatable parameter, deduplicated"""
+        slugs = ([self.tag_slug] if self.tag_slug else []) + (self.tags or [])
+        return list(dict.fromkeys(slugs))
 
 
 class PaginationParams:
@@ -116,16 +132,24 @@ def get_post_filter_params(
     status: Optional[PostStatus] = Query(None, description="Filter by post status"),
     author_id: Optional[UUID] = Query(None, description="Filter by author ID"),
     tag_slug: Optional[str] = Query(None, description="Filter by tag slug"),
+    tags: Optional[List[str]] = Query(
+        None, max_length=TAG_FACET_SETTINGS["MAX_FILTER_TAGS"], description="Filter by tag slugs (repeatable)"
+    ),
+    tag_mode: TagMatchMode = Query(TagMatchMode.ALL, description="Require all tags or any of them"),
     search: Optional[str] = Query(None, description="Search in title, content, and excerpt"),
-    is_featured: Optional[bool] = Query(None, description="Filter by featured status")
+    is_featured: Optional[bool] = Query(None, description="Filter by featured status"),
+    facets: bool = Query(False, description="Include per-tag facet counts")
 ) -> PostFilterParams:
     """Get post filtering parameters"""
     return PostFilterParams(
         status=status,
         author_id=author_id,
         tag_slug=tag_slug,
+        tags=tags,
+        tag_mode=tag_mode,
         search=search,
-        is_featured=is_featured
+        is_featured=is_featured,
+        facets=facets
     )
 
 
@@ -139,14 +163,22 @@ def get_pagination_params(
 
 def get_public_post_filter_params(
     tag_slug: Optional[str] = Query(None, description="Filter by tag slug"),
+    tags: Optional[List[str]] = Query(
+        None, max_length=TAG_FACET_SETTINGS["MAX_FILTER_TAGS"], description="Filter by tag slugs (repeatable)"
+    ),
+    tag_mode: TagMatchMode = Query(TagMatchMode.ALL, description="Require all tags or any of them"),
     search: Optional[str] = Query(None, description="Search in title, content, and excerpt"),
-    is_featured: Optional[bool] = Query(None, description="Filter by featured status")
+    is_featured: Optional[bool] = Query(None, description="Filter by featured status"),
+    facets: bool = Query(False, description="Include per-tag facet counts")
 ) -> PostFilterParams:
     """Get post filtering parameters for public access (only published posts)"""
     return PostFilterParams(
         status=PostStatus.PUBLISHED,
         author_id=None,
         tag_slug=tag_slug,
+        tags=tags,
+        tag_mode=tag_mode,
         search=search,
-        is_featured=is_featured
+        is_featured=is_featured,
+        facets=facets
     )
\ No newline at end of file
@@ -0,0 +1,223 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.posts.constants import DUPLICATE_DETECTION_SETTINGS
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = (1 << 31) - 1
+_MAX_HASH = _PRIME - 1
+
+
+class MinHasher:
+    """MinHash signatures over word shingles"""
+    def __init__(self, num_perm: int, shingle_size: int, seed: int):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = _WORD_RE.findall(text.lower())
+        size = self.shingle_size
+        hashes = {
+            zlib.crc32(" ".join(words[i:i + size]).encode()) & _MAX_HASH
+            for i in range(len(words) - size + 1)
+        }
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Return the signature, or None if the text is shorter than one shingle"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        # a, b, x < 2^31, so a * x + b fits in uint64
+        return ((self._a * shingles + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def to_bytes(signature: np.ndarray) -> bytes:
+        return signature.astype("<u4").tobytes()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype="<u4").astype(np.uint32)
+
+
+class DuplicateIndex:
+    """LSH band index over MinHash signatures with compact in-memory storage
+
+    Each post costs one 32-bit key and slot per band plus a one-byte
+    fingerprint per permutation (b-bit MinHash), around 256 bytes with the
+    default settings. Keys live in per-band sorted NumPy arrays searched
+    with searchsorted. Recent inserts sit in a small dict until
+    merge_threshold of them have accumulated, and removed posts are
+    tombstoned until the next merge, which compacts the surviving slots.
+    """
+    def __init__(self, num_perm: int, bands: int, threshold: float, merge_threshold: int, seed: int):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.merge_threshold = merge_threshold
+        rng = np.random.default_rng(seed + 1)
+        self._multipliers = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self.clear()
+
+    def clear(self) -> None:
+        self._post_ids: List[Optional[UUID]] = []
+        self._slots: Dict[UUID, int] = {}
+        self._fingerprints = np.empty((0, self.num_perm), dtype=np.uint8)
+        self._band_keys = [np.empty(0, dtype=np.uint32) for _ in range(self.bands)]
+        self._band_slots = [np.empty(0, dtype=np.uint32) for _ in range(self.bands)]
+        self._pending: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._pending_count = 0
+        self._removed: Set[int] = set()
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Hash each band of (n, num_perm) signatures to a 32-bit key, shape (n, bands)"""
+        bands = signatures[:, :self.bands * self.rows].astype(np.uint64).reshape(-1, self.bands, self.rows)
+        # uint64 arithmetic wraps, which is what we want for hashing
+        return ((bands * self._multipliers).sum(axis=2) >> np.uint64(32)).astype(np.uint32)
+
+    def add(self, post_id: UUID, signature: np.ndarray) -> None:
+        self.remove(post_id)
+        slot = self._append(post_id, signature[None, :])[0]
+        for band, key in enumerate(self.band_keys(signature[None, :])[0]):
+            self._pending[band].setdefault(int(key), []).append(slot)
+
+        self._pending_count += 1
+        if self._pending_count >= self.merge_threshold:
+            self._merge()
+
+    def add_many(self, post_ids: List[UUID], signatures: np.ndarray) -> None:
+        """Bulk insert, merging straight into the sorted arrays"""
+        if not post_ids:
+            return
+
+        for post_id in post_ids:
+            self.remove(post_id)
+        slots = self._append(post_ids, signatures)
+        keys = self.band_keys(signatures)
+        self._merge(extra=(keys, slots))
+
+    def remove(self, post_id: UUID) -> None:
+        slot = self._slots.pop(post_id, None)
+        if slot is not None:
+            self._removed.add(slot)
+            self._post_ids[slot] = None
+
+    def find_similar(self, signature: np.ndarray, exclude: Optional[UUID] = None) -> List[Tuple[UUID, float]]:
+        """Indexed posts whose estimated Jaccard similarity reaches the threshold, most similar first"""
+        keys = self.band_keys(signature[None, :])[0]
+        candidates = set()
+        for band, key in enumerate(keys):
+            band_keys = self._band_keys[band]
+            start = np.searchsorted(band_keys, key, side="left")
+            stop = np.searchsorted(band_keys, key, side="right")
+            candidates.update(self._band_slots[band][start:stop].tolist())
+            candidates.update(self._pending[band].get(int(key), ()))
+
+        candidates -= self._removed
+        if exclude is not None:
+            candidates.discard(self._slots.get(exclude))
+        if not candidates:
+            return []
+
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        fingerprint = (signature & 0xFF).astype(np.uint8)
+        agreement = (self._fingerprints[slots] == fingerprint).mean(axis=1)
+        # b-bit MinHash: unrelated values still agree on the low byte 1/256 of the time
+        similarity = (agreement - 1 / 256) / (1 - 1 / 256)
+
+        matches = [
+            (self._post_ids[slot], float(score))
+            for slot, score in zip(slots.tolist(), similarity.tolist())
+            if score >= self.threshold
+        ]
+        return sorted(matches, key=lambda match: -match[1])
+
+    def indexed_post_ids(self) -> List[UUID]:
+        return list(self._slots)
+
+    def _append(self, post_ids, signatures: np.ndarray) -> List[int]:
+        if isinstance(post_ids, UUID):
+            post_ids = [post_ids]
+        start = len(self._post_ids)
+        needed = start + len(post_ids)
+        if needed > len(self._fingerprints):
+            grown = np.empty((max(needed, 2 * len(self._fingerprints), 1024), self.num_perm), dtype=np.uint8)
+            grown[:start] = self._fingerprints[:start]
+            self._fingerprints = grown
+
+        self._fingerprints[start:needed] = (signatures & 0xFF).astype(np.uint8)
+        for offset, post_id in enumerate(post_ids):
+            self._post_ids.append(post_id)
+            self._slots[post_id] = start + offset
+        return list(range(start, needed))
+
+    def _merge(self, extra: Optional[Tuple[np.ndarray, List[int]]] = None) -> None:
+        """Fold pending inserts (and an optional bulk batch) into the sorted arrays, dropping tombstones"""
+        remap = self._compact() if self._removed else None
+        for band in range(self.bands):
+            key_parts = [self._band_keys[band]]
+            slot_parts = [self._band_slots[band]]
+
+            pending = self._pending[band]
+            if pending:
+                key_parts.append(np.fromiter(
+                    (key for key, slots in pending.items() for _ in slots), dtype=np.uint32
+                ))
+                slot_parts.append(np.fromiter(
+                    (slot for slots in pending.values() for slot in slots), dtype=np.uint32
+                ))
+            if extra is not None:
+                key_parts.append(extra[0][:, band])
+                slot_parts.append(np.asarray(extra[1], dtype=np.uint32))
+
+            keys = np.concatenate(key_parts)
+            slots = np.concatenate(slot_parts)
+            if remap is not None:
+                slots = remap[slots]
+                keep = slots >= 0
+                keys, slots = keys[keep], slots[keep].astype(np.uint32)
+
+            order = np.argsort(keys, kind="stable")
+            self._band_keys[band] = keys[order]
+            self._band_slots[band] = slots[order]
+            self._pending[band] = {}
+
+        self._pending_count = 0
+
+    def _compact(self) -> np.ndarray:
+        """Move live rows to the front and return the old slot -> new slot map (-1 = removed)"""
+        live = np.fromiter(sorted(self._slots.values()), dtype=np.int64, count=len(self._slots))
+        remap = np.full(len(self._post_ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+
+        self._fingerprints = self._fingerprints[live]
+        self._post_ids = [self._post_ids[slot] for slot in live.tolist()]
+        self._slots = {post_id: slot for slot, post_id in enumerate(self._post_ids)}
+        self._removed = set()
+        return remap
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+min_hasher = MinHasher(
+    num_perm=DUPLICATE_DETECTION_SETTINGS["NUM_PERM"],
+    shingle_size=DUPLICATE_DETECTION_SETTINGS["SHINGLE_SIZE"],
+    seed=DUPLICATE_DETECTION_SETTINGS["SEED"]
+)
+
+duplicate_index = DuplicateIndex(
+    num_perm=DUPLICATE_DETECTION_SETTINGS["NUM_PERM"],
+    bands=DUPLICATE_DETECTION_SETTINGS["BANDS"],
+    threshold=DUPLICATE_DETECTION_SETTINGS["SIMILARITY_THRESHOLD"],
+    merge_threshold=DUPLICATE_DETECTION_SETTINGS["MERGE_THRESHOLD"],
+    seed=DUPLICATE_DETECTION_SETTINGS["SEED"]
+)
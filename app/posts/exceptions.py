@@ -1,3 +1,5 @@
+from typing import Optional
+
 from app.exceptions import BaseAPIException
 from fastapi import status
 
@@ -20,6 +22,15 @@ class CommentNotFoundError(BaseAPIException):
         super().__init__(detail=detail, status_code=status.HTTP_404_NOT_FOUND)
 
 
+class StaleVersionError(BaseAPIException):
+    """Post changed since the version the client sent"""
+    def __init__(self, current_version: Optional[int] = None):
+        detail = "Post has been modified"
+        if current_version is not None:
+            detail += f" (current version is {current_version})"
+        super().__init__(detail=detail, status_code=status.HTTP_409_CONFLICT)
+
+
 class PostSlugExistsError(BaseAPIException):
     """Post slug already exists exception"""
     def __init__(self, detail: str = "Post with this slug already exists"):
@@ -131,4 +142,21 @@ class SearchQueryTooShortError(BaseAPIException):
 class SearchQueryTooLongError(BaseAPIException):
     """Search query too long exception"""
     def __init__(self, detail: str = "Search query is too long"):
-        super().__init__(detail=detail, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
\ No newline at end of file
+        super().__init__(detail=detail, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+class BulkJobNotFoundError(BaseAPIException):
+    """Bulk job not found exception"""
+    def __init__(self, detail: str = "Bulk job not found"):
+        super().__init__(detail=detail, status_code=status.HTTP_404_NOT_FOUND)
+
+
+class RevisionNotFoundError(BaseAPIException):
+    """Post revision not found exception"""
+    def __init__(self, detail: str = "Revision not found"):
+        super().__init__(detail=detail, status_code=status.HTTP_404_NOT_FOUND)
+
+
+class DuplicatePostError(BaseAPIException):
+    """Near-duplicate post exception"""
+    def __init__(self, detail: str = "A very similar post already exists"):
+        super().__init__(detail=detail, status_code=status.HTTP_409_CONFLICT)
@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, insert, update, func
+
+from app.database import AsyncSessionLocal
+from app.posts.cache import tag_list_cache
+from app.posts.feed import hot_feed
+from app.posts.duplicates import min_hasher, duplicate_index
+from app.posts.models import Comment, Post, PostStatus, PostTagLink, PostSignature, Tag
+from app.posts.related import related_posts_engine, load_documents, store_neighbours
+from app.posts.utils import compute_content_fields
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(job: Callable[[], Awaitable], interval: float) -> None:
+    """Run a job forever with a fixed delay between runs (until cancelled)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Periodic job %s failed", job.__name__)
+
+
+def _compute_chunk(contents: List[str]) -> List[dict]:
+    """Compute derived content fields for a chunk of posts (runs in a worker process)"""
+    return [compute_content_fields(content) for content in contents]
+
+
+async def backfill_content_fields(chunk_size: int = 500, workers: Optional[int] = None) -> int:
+    """Populate derived content fields for posts that were written before they existed
+
+    Rows are read with keyset pagination, split into chunks that are processed
+    in parallel by a process pool, and written back with a bulk UPDATE by
+    primary key, committing once per batch.
+    """
+    loop = asyncio.get_running_loop()
+    processed = 0
+    last_id = None
+
+    workers = workers or os.cpu_count() or 1
+    batch_size = chunk_size * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        async with AsyncSessionLocal() as session:
+            while True:
+                query = (
+                    select(Post.id, Post.content)
+                    .where(Post.content_hash.is_(None))
+                    .order_by(Post.id)
+                    .limit(batch_size)
+                )
+                if last_id is not None:
+                    query = query.where(Post.id > last_id)
+
+                rows = (await session.execute(query)).all()
+                if not rows:
+                    break
+
+                chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+                results = await asyncio.gather(*[
+                    loop.run_in_executor(pool, _compute_chunk, [row.content for row in chunk])
+                    for chunk in chunks
+                ])
+
+                values = [
+                    {"id": row.id, **fields}
+                    for chunk, chunk_fields in zip(chunks, results)
+                    for row, fields in zip(chunk, chunk_fields)
+                ]
+                await session.execute(update(Post), values)
+                await session.commit()
+
+                processed += len(values)
+                last_id = rows[-1].id
+
+    return processed
+
+
+def _id_batches(ids: Optional[List[UUID]], size: int = 1000) -> Iterator[Optional[List[UUID]]]:
+    """Split ids into IN-list batches; None (all rows) is a single batch"""
+    if ids is None:
+        yield None
+        return
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+async def reconcile_tag_counts(tag_ids: Optional[List[UUID]] = None) -> int:
+    """Recompute published post counters for every tag (or only tag_ids) and fix any drift
+
+    Runs as one set-based UPDATE (per 1000 tag_ids) and returns the number of tags corrected.
+    """
+    published_count = (
+        select(func.count())
+        .select_from(PostTagLink)
+        .join(Post, Post.id == PostTagLink.post_id)
+        .where(PostTagLink.tag_id == Tag.id, Post.status == PostStatus.PUBLISHED)
+        .scalar_subquery()
+    )
+
+    corrected = 0
+    async with AsyncSessionLocal() as session:
+        for batch in _id_batches(tag_ids):
+            query = update(Tag).where(Tag.post_count != published_count)
+            if batch is not None:
+                query = query.where(Tag.id.in_(batch))
+            result = await session.execute(
+                query.values(post_count=published_count).execution_options(synchronize_session=False)
+            )
+            corrected += result.rowcount
+        await session.commit()
+
+    if corrected:
+        tag_list_cache.invalidate()
+    return corrected
+
+
+async def reconcile_comment_counts(post_ids: Optional[List[UUID]] = None) -> int:
+    """Recompute approved comment counters for every post (or only post_ids) and fix any drift
+
+    Runs as one set-based UPDATE (per 1000 post_ids) and returns the number of posts corrected.
+    """
+    approved_count = (
+        select(func.count())
+        .select_from(Comment)
+        .where(Comment.post_id == Post.id, Comment.is_approved == True)
+        .scalar_subquery()
+    )
+
+    corrected = 0
+    async with AsyncSessionLocal() as session:
+        for batch in _id_batches(post_ids):
+            query = update(Post).where(Post.comment_count != approved_count)
+            if batch is not None:
+                query = query.where(Post.id.in_(batch))
+            result = await session.execute(
+                query.values(comment_count=approved_count).execution_options(synchronize_session=False)
+            )
+            corrected += result.rowcount
+        await session.commit()
+
+    return corrected
+
+
+async def rebuild_hot_feed() -> int:
+    """Reload the hot feed ranking from the database, discarding any drift
+
+    Returns the number of ranked posts.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Post.id, Post.view_count, Post.comment_count, Post.published_at, Post.is_featured)
+            .where(Post.status == PostStatus.PUBLISHED, Post.published_at.is_not(None))
+        )
+        hot_feed.rebuild(result.all())
+
+    return len(hot_feed)
+
+
+async def rebuild_related_posts() -> int:
+    """Refit the related posts model on all published posts and rewrite every neighbour list
+
+    Returns the number of posts in the corpus.
+    """
+    async with related_posts_engine.lock:
+        async with AsyncSessionLocal() as session:
+            documents = await load_documents(session)
+            neighbours = await asyncio.to_thread(related_posts_engine.build, documents)
+            await store_neighbours(session, neighbours, replace_all=True)
+            await session.commit()
+
+    return len(documents)
+
+
+async def load_duplicate_index(batch_size: int = 10000) -> int:
+    """Load stored MinHash signatures into the in-memory LSH index
+
+    Returns the number of indexed posts.
+    """
+    duplicate_index.clear()
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(PostSignature.post_id, PostSignature.signature).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            duplicate_index.add_many(
+                [row.post_id for row in rows],
+                np.stack([min_hasher.from_bytes(row.signature) for row in rows])
+            )
+
+    return len(duplicate_index)
+
+
+async def cluster_duplicate_posts(chunk_size: int = 1000) -> int:
+    """Sign posts that have no signature yet, then group near-duplicates into clusters
+
+    Every post in a cluster gets the ID of the cluster's oldest post as
+    cluster_id; posts without near-duplicates get NULL. Returns the number
+    of clusters found.
+    """
+    async with AsyncSessionLocal() as session:
+        # Backfill signatures with keyset pagination over unsigned posts
+        last_id = None
+        while True:
+            query = (
+                select(Post.id, Post.plain_text, Post.content)
+                .outerjoin(PostSignature, PostSignature.post_id == Post.id)
+                .where(PostSignature.post_id.is_(None))
+                .order_by(Post.id)
+                .limit(chunk_size)
+            )
+            if last_id is not None:
+                query = query.where(Post.id > last_id)
+
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+
+            signed = []
+            for row in rows:
+                text = row.plain_text if row.plain_text is not None else compute_content_fields(row.content)["plain_text"]
+                signature = min_hasher.signature(text)
+                if signature is not None:
+                    signed.append((row.id, signature))
+
+            if signed:
+                await session.execute(insert(PostSignature), [
+                    {"post_id": post_id, "signature": min_hasher.to_bytes(signature)} for post_id, signature in signed
+                ])
+                await session.commit()
+                duplicate_index.add_many([post_id for post_id, _ in signed], np.stack([signature for _, signature in signed]))
+            last_id = rows[-1].id
+
+        # Union-find over LSH matches
+        parents: Dict[UUID, UUID] = {}
+
+        def find(post_id: UUID) -> UUID:
+            root = post_id
+            while parents.get(root, root) != root:
+                root = parents[root]
+            while post_id != root:
+                parents[post_id], post_id = root, parents.get(post_id, root)
+            return root
+
+        last_id = None
+        while True:
+            query = select(PostSignature.post_id, PostSignature.signature).order_by(PostSignature.post_id).limit(chunk_size)
+            if last_id is not None:
+                query = query.where(PostSignature.post_id > last_id)
+
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+
+            for row in rows:
+                for other_id, _ in duplicate_index.find_similar(min_hasher.from_bytes(row.signature), exclude=row.post_id):
+                    root, other_root = find(row.post_id), find(other_id)
+                    if root != other_root:
+                        parents[other_root] = root
+            last_id = rows[-1].post_id
+
+        clusters: Dict[UUID, List[UUID]] = {}
+        for post_id in list(parents):
+            clusters.setdefault(find(post_id), []).append(post_id)
+        for root, members in clusters.items():
+            if root not in members:
+                members.append(root)
+
+        # The oldest post of each cluster is its representative
+        created: Dict[UUID, datetime] = {}
+        clustered_ids = [post_id for members in clusters.values() for post_id in members]
+        for start in range(0, len(clustered_ids), chunk_size):
+            result = await session.execute(
+                select(Post.id, Post.created_at).where(Post.id.in_(clustered_ids[start:start + chunk_size]))
+            )
+            created.update(result.all())
+
+        await session.execute(update(PostSignature).values(cluster_id=None).where(PostSignature.cluster_id.is_not(None)))
+        values = []
+        for members in clusters.values():
+            representative = min(members, key=lambda post_id: (created[post_id], post_id))
+            values.extend({"post_id": post_id, "cluster_id": representative} for post_id in members)
+        for start in range(0, len(values), chunk_size):
+            await session.execute(update(PostSignature), values[start:start + chunk_size])
+        await session.commit()
+
+    return len(clusters)
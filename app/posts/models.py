@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Column, ForeignKey, Index, LargeBinary, UniqueConstraint
+from sqlmodel.sql.sqltypes import GUID
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID, uuid4
@@ -15,9 +17,13 @@ class PostStatus(str, Enum):
 # Link table for many-to-many relationship between posts and tags
 class PostTagLink(SQLModel, table=True):
     __tablename__ = "post_tags"
+    __table_args__ = (
+        # The primary key covers post -> tags; this covers tag -> posts for tag filters and facets
+        Index("ix_post_tags_tag_id_post_id", "tag_id", "post_id"),
+    )
     
-    post_id: UUID = Field(foreign_key="posts.id", primary_key=True)
-    tag_id: UUID = Field(foreign_key="tags.id", primary_key=True)
+    post_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True))
+    tag_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True))
 
 
 class PostBase(SQLModel):
@@ -35,14 +41,25 @@ class Post(PostBase, table=True):
     __tablename__ = "posts"
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    author_id: UUID = Field(foreign_key="users.id")
+    author_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True))
     slug: str = Field(unique=True, index=True)
     view_count: int = Field(default=0)
+    comment_count: int = Field(default=0)  # Approved comments, maintained with each comment write
+    version: int = Field(default=1)  # Bumped on every write, for optimistic concurrency checks
     
-    # Relationships
+    # Derived from content at write time
+    plain_text: Optional[str] = Field(default=None)
+    word_count: int = Field(default=0)
+    reading_time: int = Field(default=0)
+    auto_excerpt: Optional[str] = Field(default=None, max_length=500)
+    content_hash: Optional[str] = Field(default=None, max_length=32)
+    
+    # Relationships (dependent rows are removed by ON DELETE CASCADE, not loaded and deleted by the ORM)
     author: "User" = Relationship(back_populates="posts")
-    tags: List["Tag"] = Relationship(back_populates="posts", link_model=PostTagLink)
-    comments: List["Comment"] = Relationship(back_populates="post")
+    tags: List["Tag"] = Relationship(
+        back_populates="posts", link_model=PostTagLink, sa_relationship_kwargs={"passive_deletes": True}
+    )
+    comments: List["Comment"] = Relationship(back_populates="post", sa_relationship_kwargs={"passive_deletes": True})
 
 
 class PostCreate(SQLModel):
@@ -59,6 +76,10 @@ class PostRead(PostBase):
     author_id: UUID
     slug: str
     view_count: int
+    comment_count: int = 0
+    word_count: int = 0
+    reading_time: int = 0
+    auto_excerpt: Optional[str] = None
 
 
 class PostUpdate(SQLModel):
@@ -78,10 +99,13 @@ class Tag(SQLModel, table=True):
     name: str = Field(unique=True, index=True, max_length=50)
     slug: str = Field(unique=True, index=True)
     description: Optional[str] = Field(default=None, max_length=200)
+    post_count: int = Field(default=0)  # Published posts, maintained incrementally
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
-    posts: List[Post] = Relationship(back_populates="tags", link_model=PostTagLink)
+    posts: List[Post] = Relationship(
+        back_populates="tags", link_model=PostTagLink, sa_relationship_kwargs={"passive_deletes": True}
+    )
 
 
 class TagCreate(SQLModel):
@@ -94,15 +118,19 @@ class TagRead(SQLModel):
     name: str
     slug: str
     description: Optional[str] = None
+    post_count: int = 0
     created_at: datetime
 
 
 class Comment(SQLModel, table=True):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_id_created_at", "post_id", "created_at"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    post_id: UUID = Field(foreign_key="posts.id")
-    author_id: UUID = Field(foreign_key="users.id")
+    post_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("posts.id", ondelete="CASCADE"), nullable=False))
+    author_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True))
     content: str = Field(max_length=1000)
     is_approved: bool = Field(default=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -113,6 +141,54 @@ class Comment(SQLModel, table=True):
     author: "User" = Relationship()
 
 
+class RelatedPost(SQLModel, table=True):
+    """Precomputed nearest neighbours of a published post, best first"""
+    __tablename__ = "related_posts"
+    __table_args__ = (
+        Index("ix_related_posts_post_id_rank", "post_id", "rank"),
+    )
+    
+    post_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True))
+    related_post_id: UUID = Field(
+        sa_column=Column(GUID(), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True, index=True)
+    )
+    rank: int
+    score: float
+
+
+class PostSignature(SQLModel, table=True):
+    """MinHash signature of a post's text, used for near-duplicate detection"""
+    __tablename__ = "post_signatures"
+    
+    post_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True))
+    signature: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    cluster_id: Optional[UUID] = Field(default=None, index=True)  # Oldest post of its near-duplicate cluster
+
+
+class PostRevision(SQLModel, table=True):
+    """One saved version of a post: full snapshot, delta against an earlier revision, or reference to an identical one"""
+    __tablename__ = "post_revisions"
+    __table_args__ = (
+        UniqueConstraint("post_id", "number", name="uq_post_revisions_post_id_number"),
+        Index("ix_post_revisions_post_id_content_hash", "post_id", "content_hash"),
+    )
+    
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    post_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("posts.id", ondelete="CASCADE"), nullable=False))
+    number: int
+    kind: str = Field(max_length=10)  # snapshot, delta or ref
+    base_number: Optional[int] = Field(default=None)  # Revision the delta applies to, or the identical revision for refs
+    chain_length: int = Field(default=0)  # Deltas between this revision and its snapshot
+    title: str = Field(max_length=200)
+    payload: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    content_hash: str = Field(max_length=32)
+    content_length: int
+    author_id: Optional[UUID] = Field(
+        default=None, sa_column=Column(GUID(), ForeignKey("users.id", ondelete="SET NULL"), index=True)
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class CommentCreate(SQLModel):
     content: str = Field(max_length=1000)
 
@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.posts.constants import RELATED_POSTS_SETTINGS
+from app.posts.models import Post, PostStatus, PostTagLink, RelatedPost
+from app.posts.utils import extract_text_from_html
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+# (post_id, text, tag_ids) of a published post
+Document = Tuple[UUID, str, List[UUID]]
+# Sparse row: (column indices, L2-normalized weights)
+SparseVector = Tuple[np.ndarray, np.ndarray]
+Neighbours = List[Tuple[UUID, float]]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class RelatedPostsModel:
+    """Vocabulary, IDF weights and tag columns fitted on the published corpus"""
+    vocabulary: Dict[str, int]
+    idf: np.ndarray
+    tag_columns: Dict[UUID, int]
+    tag_weight: float
+
+    @property
+    def n_features(self) -> int:
+        return len(self.vocabulary) + len(self.tag_columns)
+
+    @classmethod
+    def fit(cls, documents: List[Document], max_features: int, min_df: int, max_df_ratio: float, tag_weight: float) -> "RelatedPostsModel":
+        document_frequency = Counter()
+        tag_ids = set()
+        for _, text, doc_tag_ids in documents:
+            document_frequency.update(set(tokenize(text)))
+            tag_ids.update(doc_tag_ids)
+
+        max_df = max(min_df, int(max_df_ratio * len(documents)))
+        terms = [term for term, df in document_frequency.items() if min_df <= df <= max_df]
+        terms = sorted(terms, key=lambda term: (-document_frequency[term], term))[:max_features]
+
+        n_documents = len(documents)
+        idf = np.array(
+            [math.log((1 + n_documents) / (1 + document_frequency[term])) + 1 for term in terms],
+            dtype=np.float32
+        )
+        vocabulary = {term: column for column, term in enumerate(terms)}
+        tag_columns = {tag_id: len(vocabulary) + i for i, tag_id in enumerate(sorted(tag_ids))}
+        return cls(vocabulary, idf, tag_columns, tag_weight)
+
+    def vectorize(self, text: str, tag_ids: List[UUID]) -> SparseVector:
+        """Sublinear TF-IDF of the text (unit norm) plus tag one-hots (norm tag_weight), renormalized"""
+        counts = Counter(token for token in tokenize(text) if token in self.vocabulary)
+        term_columns = np.array([self.vocabulary[term] for term in counts], dtype=np.int32)
+        term_weights = np.array([1 + math.log(count) for count in counts.values()], dtype=np.float32)
+        term_weights *= self.idf[term_columns]
+        term_norm = np.linalg.norm(term_weights)
+        if term_norm:
+            term_weights /= term_norm
+
+        tag_columns = np.array(
+            sorted({self.tag_columns[tag_id] for tag_id in tag_ids if tag_id in self.tag_columns}),
+            dtype=np.int32
+        )
+        tag_weights = np.full(len(tag_columns), self.tag_weight / math.sqrt(max(len(tag_columns), 1)), dtype=np.float32)
+
+        columns = np.concatenate([term_columns, tag_columns])
+        weights = np.concatenate([term_weights, tag_weights])
+        norm = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+        return columns, weights
+
+
+class RelatedPostsEngine:
+    """Top-K cosine neighbours of every published post, maintained incrementally
+
+    Vectors are kept sparse and densified one block of rows at a time, so a
+    full build is a sequence of (block x features) @ (features x block)
+    products with a running top-K per row. A single post change costs one
+    row against all rows, plus recomputing the rows it can enter or leave.
+    """
+    def __init__(self, top_k: int, min_score: float, block_size: int):
+        self.top_k = top_k
+        self.min_score = min_score
+        self.block_size = block_size
+        self.model: Optional[RelatedPostsModel] = None
+        self.lock = asyncio.Lock()
+        self._post_ids: List[UUID] = []
+        self._positions: Dict[UUID, int] = {}
+        self._vectors: List[SparseVector] = []
+        self._neighbours: Dict[UUID, Neighbours] = {}
+        self._referrers: Dict[UUID, Set[UUID]] = {}
+
+    @property
+    def is_built(self) -> bool:
+        return self.model is not None
+
+    def build(self, documents: List[Document]) -> Dict[UUID, Neighbours]:
+        """Fit the model on all documents and compute every neighbour list"""
+        self.model = RelatedPostsModel.fit(
+            documents,
+            max_features=RELATED_POSTS_SETTINGS["MAX_FEATURES"],
+            min_df=RELATED_POSTS_SETTINGS["MIN_DF"],
+            max_df_ratio=RELATED_POSTS_SETTINGS["MAX_DF_RATIO"],
+            tag_weight=RELATED_POSTS_SETTINGS["TAG_WEIGHT"]
+        )
+        self._post_ids = [post_id for post_id, _, _ in documents]
+        self._positions = {post_id: position for position, post_id in enumerate(self._post_ids)}
+        self._vectors = [self.model.vectorize(text, tag_ids) for _, text, tag_ids in documents]
+        self._neighbours = {}
+        self._referrers = {}
+
+        for start in range(0, len(self._post_ids), self.block_size):
+            positions = list(range(start, min(start + self.block_size, len(self._post_ids))))
+            self._compute_neighbours(positions)
+        return dict(self._neighbours)
+
+    def update(self, post_id: UUID, document: Optional[Document]) -> Dict[UUID, Neighbours]:
+        """Apply a post change (None = deleted or unpublished) and return the changed neighbour lists
+
+        Terms outside the fitted vocabulary are ignored until the next build.
+        """
+        affected = set(self._referrers.get(post_id, ()))
+        changes: Dict[UUID, Neighbours] = {}
+
+        if document is None:
+            self._remove(post_id)
+            changes[post_id] = []
+        else:
+            vector = self.model.vectorize(document[1], document[2])
+            position = self._positions.get(post_id)
+            if position is None:
+                position = len(self._post_ids)
+                self._positions[post_id] = position
+                self._post_ids.append(post_id)
+                self._vectors.append(vector)
+            else:
+                self._vectors[position] = vector
+            affected.add(post_id)
+
+            # Rows whose weakest neighbour the changed post now beats
+            query = self._dense([vector])
+            for start, scores in self._block_scores(query):
+                for offset in np.nonzero(scores[0] > self.min_score)[0]:
+                    other_id = self._post_ids[start + offset]
+                    if other_id != post_id and scores[0, offset] > self._kth_score(other_id):
+                        affected.add(other_id)
+
+        if document is None:
+            affected.discard(post_id)
+        positions = [self._positions[other_id] for other_id in affected if other_id in self._positions]
+        for start in range(0, len(positions), self.block_size):
+            self._compute_neighbours(positions[start:start + self.block_size])
+
+        changes.update((other_id, self._neighbours.get(other_id, [])) for other_id in affected)
+        return changes
+
+    def _kth_score(self, post_id: UUID) -> float:
+        neighbours = self._neighbours.get(post_id, [])
+        return neighbours[-1][1] if len(neighbours) >= self.top_k else self.min_score
+
+    def _remove(self, post_id: UUID) -> None:
+        position = self._positions.pop(post_id, None)
+        if position is None:
+            return
+
+        # Swap-remove to keep positions dense
+        last_id = self._post_ids.pop()
+        last_vector = self._vectors.pop()
+        if last_id != post_id:
+            self._post_ids[position] = last_id
+            self._vectors[position] = last_vector
+            self._positions[last_id] = position
+
+        self._set_neighbours(post_id, [])
+        self._referrers.pop(post_id, None)
+
+    def _dense(self, vectors: List[SparseVector]) -> np.ndarray:
+        block = np.zeros((len(vectors), self.model.n_features), dtype=np.float32)
+        for row, (columns, weights) in enumerate(vectors):
+            block[row, columns] = weights
+        return block
+
+    def _block_scores(self, query: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (block start, query @ block.T) over all rows, one block at a time"""
+        for start in range(0, len(self._vectors), self.block_size):
+            block = self._dense(self._vectors[start:start + self.block_size])
+            yield start, query @ block.T
+
+    def _compute_neighbours(self, positions: List[int]) -> None:
+        if not positions:
+            return
+
+        k = self.top_k
+        query = self._dense([self._vectors[position] for position in positions])
+        best_scores = np.full((len(positions), k), -np.inf, dtype=np.float32)
+        best_columns = np.full((len(positions), k), -1, dtype=np.int64)
+        rows = np.arange(len(positions))
+
+        for start, scores in self._block_scores(query):
+            # A post is never its own neighbour
+            own = np.array(positions) - start
+            inside = (own >= 0) & (own < scores.shape[1])
+            scores[rows[inside], own[inside]] = -np.inf
+
+            candidate_scores = np.hstack([best_scores, scores])
+            candidate_columns = np.hstack([
+                best_columns,
+                np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            ])
+            top = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(candidate_scores, top, axis=1)
+            best_columns = np.take_along_axis(candidate_columns, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_columns = np.take_along_axis(best_columns, order, axis=1)
+
+        for row, position in enumerate(positions):
+            self._set_neighbours(self._post_ids[position], [
+                (self._post_ids[column], float(score))
+                for column, score in zip(best_columns[row], best_scores[row])
+                if column >= 0 and score > self.min_score
+            ])
+
+    def _set_neighbours(self, post_id: UUID, neighbours: Neighbours) -> None:
+        for other_id, _ in self._neighbours.get(post_id, []):
+            self._referrers.get(other_id, set()).discard(post_id)
+        for other_id, _ in neighbours:
+            self._referrers.setdefault(other_id, set()).add(post_id)
+
+        if neighbours:
+            self._neighbours[post_id] = neighbours
+        else:
+            self._neighbours.pop(post_id, None)
+
+
+related_posts_engine = RelatedPostsEngine(
+    top_k=RELATED_POSTS_SETTINGS["TOP_K"],
+    min_score=RELATED_POSTS_SETTINGS["MIN_SCORE"],
+    block_size=RELATED_POSTS_SETTINGS["BLOCK_SIZE"]
+)
+
+
+async def load_documents(session: AsyncSession, post_ids: Optional[List[UUID]] = None) -> List[Document]:
+    """Load title + plain text and tag IDs of published posts"""
+    query = (
+        select(Post.id, Post.title, Post.plain_text, Post.content)
+        .where(Post.status == PostStatus.PUBLISHED)
+        .order_by(Post.id)
+    )
+    tag_query = (
+        select(PostTagLink.post_id, PostTagLink.tag_id)
+        .join(Post, Post.id == PostTagLink.post_id)
+        .where(Post.status == PostStatus.PUBLISHED)
+    )
+    if post_ids is not None:
+        query = query.where(Post.id.in_(post_ids))
+        tag_query = tag_query.where(PostTagLink.post_id.in_(post_ids))
+
+    tags: Dict[UUID, List[UUID]] = {}
+    for post_id, tag_id in (await session.execute(tag_query)).all():
+        tags.setdefault(post_id, []).append(tag_id)
+
+    return [
+        (row.id, f"{row.title} {row.plain_text if row.plain_text is not None else extract_text_from_html(row.content)}", tags.get(row.id, []))
+        for row in (await session.execute(query)).all()
+    ]
+
+
+async def store_neighbours(session: AsyncSession, changes: Dict[UUID, Neighbours], replace_all: bool = False) -> None:
+    """Replace stored neighbour rows of the given posts (caller commits)"""
+    if replace_all:
+        await session.execute(delete(RelatedPost))
+    else:
+        post_ids = list(changes)
+        for start in range(0, len(post_ids), 1000):
+            await session.execute(delete(RelatedPost).where(RelatedPost.post_id.in_(post_ids[start:start + 1000])))
+
+    rows = [
+        {"post_id": post_id, "related_post_id": related_id, "rank": rank, "score": score}
+        for post_id, neighbours in changes.items()
+        for rank, (related_id, score) in enumerate(neighbours)
+    ]
+    for start in range(0, len(rows), 5000):
+        await session.execute(insert(RelatedPost), rows[start:start + 5000])
+
+
+def _apply_updates(post_ids: List[UUID], documents: Dict[UUID, Document]) -> Dict[UUID, Neighbours]:
+    changes: Dict[UUID, Neighbours] = {}
+    for post_id in post_ids:
+        changes.update(related_posts_engine.update(post_id, documents.get(post_id)))
+    return changes
+
+
+async def refresh_related_posts(post_ids: List[UUID]) -> None:
+    """Recompute neighbour lists affected by changes to the given posts"""
+    async with related_posts_engine.lock:
+        if not related_posts_engine.is_built:
+            return  # The pending build will include these changes
+
+        async with AsyncSessionLocal() as session:
+            documents = {}
+            for start in range(0, len(post_ids), 1000):
+                documents.update(
+                    (document[0], document)
+                    for document in await load_documents(session, post_ids[start:start + 1000])
+                )
+            changes = await asyncio.to_thread(_apply_updates, post_ids, documents)
+            await store_neighbours(session, changes)
+            await session.commit()
+
+
+_pending_refreshes: Set[asyncio.Task] = set()
+
+
+def schedule_related_refresh(post_id: UUID) -> None:
+    """Refresh related posts for a changed post in the background"""
+    async def run():
+        try:
+            await refresh_related_posts([post_id])
+        except Exception:
+            logger.exception("Related posts refresh for %s failed", post_id)
+
+    task = asyncio.create_task(run())
+    _pending_refreshes.add(task)
+    task.add_done_callback(_pending_refreshes.discard)
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import re
+import zlib
+from typing import List
+
+_TOKEN_RE = re.compile(r"\s+|\w+|[^\w\s]")
+
+# Tokens per window used to find copyable runs in the base revision
+DELTA_WINDOW = 8
+
+
+def tokenize_content(content: str) -> List[str]:
+    """Split content into word, whitespace and punctuation tokens ("".join restores it exactly)"""
+    return _TOKEN_RE.findall(content)
+
+
+def revision_content_hash(content: str) -> str:
+    """Exact content hash (unlike generate_content_hash, whitespace and case matter here)"""
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+def encode_snapshot(content: str, level: int = 6) -> bytes:
+    return zlib.compress(content.encode(), level)
+
+
+def decode_snapshot(payload: bytes) -> str:
+    return zlib.decompress(payload).decode()
+
+
+def encode_delta(base: str, target: str, level: int = 6) -> bytes:
+    """Encode target as copy ranges of base tokens and inserted text, compressed
+
+    Runs of target tokens are located in base through an index of
+    DELTA_WINDOW-token windows and extended greedily in both directions, so
+    encoding is linear in the document size. The result grows with the size
+    of the edit, not of the document.
+    """
+    base_tokens = tokenize_content(base)
+    target_tokens = tokenize_content(target)
+    window = DELTA_WINDOW
+
+    positions = {}
+    for i in range(len(base_tokens) - window + 1):
+        positions.setdefault(tuple(base_tokens[i:i + window]), i)
+
+    operations = []
+
+    def emit_copy(start: int, stop: int) -> None:
+        last = operations[-1] if operations else None
+        if isinstance(last, list) and last[1] == start:
+            last[1] = stop
+        else:
+            operations.append([start, stop])
+
+    literal_start = 0
+    j = 0
+    while j <= len(target_tokens) - window:
+        i = positions.get(tuple(target_tokens[j:j + window]))
+        if i is None:
+            j += 1
+            continue
+
+        # Extend the match backwards into the pending literal, then forwards
+        while i > 0 and j > literal_start and base_tokens[i - 1] == target_tokens[j - 1]:
+            i -= 1
+            j -= 1
+        length = window
+        while i + length < len(base_tokens) and j + length < len(target_tokens) \
+                and base_tokens[i + length] == target_tokens[j + length]:
+            length += 1
+
+        if j > literal_start:
+            operations.append("".join(target_tokens[literal_start:j]))
+        emit_copy(i, i + length)
+        j += length
+        literal_start = j
+
+    if literal_start < len(target_tokens):
+        operations.append("".join(target_tokens[literal_start:]))
+    return zlib.compress(json.dumps(operations, separators=(",", ":")).encode(), level)
+
+
+def apply_delta(base: str, payload: bytes) -> str:
+    base_tokens = tokenize_content(base)
+    parts = []
+    for operation in json.loads(zlib.decompress(payload)):
+        if isinstance(operation, list):
+            parts.append("".join(base_tokens[operation[0]:operation[1]]))
+        else:
+            parts.append(operation)
+    return "".join(parts)
@@ -1,22 +1,43 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Header, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
+from uuid import UUID
 
 from app.database import get_session
 from app.posts.schemas import (
     PostCreateRequest,
     PostUpdateRequest,
     PostDetailResponse,
+    PostListResponse,
     PostsListResponse,
+    HotPostsResponse,
+    RelatedPostResponse,
+    PostRevisionResponse,
+    PostRevisionDetailResponse,
     TagCreateRequest,
     TagDetailResponse,
     TagsListResponse,
     CommentCreateRequest,
     CommentResponse,
     CommentsListResponse,
+    CacheStatsResponse,
+    BulkPostActionRequest,
+    BulkCommentActionRequest,
+    BulkJobResponse,
+    PostImportResponse,
+    AutosaveRequest,
+    AutosaveResponse,
     MessageResponse
 )
-from app.posts.service import post_service
+from app.posts.service import post_service, comment_service, revision_service
+from app.posts.autosave import autosave_buffer
+from app.posts.view_counts import view_count_buffer
+from app.posts.bulk import start_post_job, start_comment_job, get_bulk_job
+from app.posts.transfer import iter_ndjson_lines, import_posts_ndjson, export_posts_ndjson
+from app.posts.exceptions import BulkJobNotFoundError, RevisionNotFoundError
+from app.posts.cache import post_detail_cache, etag_matches
+from app.posts.constants import POST_CACHE_SETTINGS, TAG_STATS_SETTINGS, HOT_FEED_SETTINGS, RELATED_POSTS_SETTINGS
 from app.posts.dependencies import (
     get_post_by_id_or_slug,
     validate_user_access_to_post,
@@ -24,9 +45,9 @@ from app.posts.dependencies import (
     PostFilterParams,
     PaginationParams
 )
-from app.auth.dependencies import get_current_active_user, get_current_user
+from app.auth.dependencies import get_current_active_user, get_current_user, get_current_superuser
 from app.auth.models import User
-from app.posts.models import Post
+from app.posts.models import Post, PostStatus
 
 
 router = APIRouter()
@@ -45,7 +66,7 @@ async def create_post(
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """Create a new post"""
-    post = await post_service.create_post(session, post_data, current_user.id)
+    post = await post_service.create_post(session, post_data, current_user)
     return PostDetailResponse.model_validate(post)
 
 
@@ -62,36 +83,240 @@ async def get_posts(
     current_user: Annotated[Optional[User], Depends(get_current_user)] = None
 ):
     """Get posts list with filtering and pagination"""
-    posts, total = await post_service.get_posts_list(
-        session, filters, pagination, current_user
+    filter_values = dict(
+        status=filters.status,
+        author_id=filters.author_id,
+        tag_slugs=filters.tag_slugs,
+        tag_mode=filters.tag_mode,
+        search=filters.search,
+        is_featured=filters.is_featured
     )
+    posts, total, total_is_exact = await post_service.get_posts(
+        session,
+        skip=pagination.skip,
+        limit=pagination.limit,
+        **filter_values
+    )
+    
+    facets = None
+    if filters.facets:
+        facets = await post_service.get_tag_facets(session, **filter_values)
     
     return PostsListResponse(
-        posts=[PostDetailResponse.model_validate(post) for post in posts],
+        posts=[PostListResponse.model_validate(post) for post in posts],
         total=total,
+        total_is_exact=total_is_exact,
         page=pagination.page,
-        per_page=pagination.per_page,
-        pages=(total + pagination.per_page - 1) // pagination.per_page
+        size=pagination.size,
+        pages=(total + pagination.size - 1) // pagination.size,
+        facets=facets
     )
 
 
+@router.get(
+    "/hot",
+    response_model=HotPostsResponse,
+    summary="Get hot posts",
+    description="Get published posts ranked by views, comments and recency, featured posts first"
+)
+async def get_hot_posts(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: int = Query(20, ge=1, le=HOT_FEED_SETTINGS["MAX_LIMIT"])
+):
+    """Get hot posts feed"""
+    posts = await post_service.get_hot_posts(session, limit)
+    return HotPostsResponse(
+        posts=[PostListResponse.model_validate(post) for post in posts],
+        size=len(posts)
+    )
+
+
+# Tag endpoints
+@router.post(
+    "/tags",
+    response_model=TagDetailResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a new tag",
+    description="Create a new tag"
+)
+async def create_tag(
+    tag_data: TagCreateRequest,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    """Create a new tag"""
+    tag = await post_service.create_tag(session, tag_data)
+    return TagDetailResponse.model_validate(tag)
+
+
+@router.get(
+    "/tags",
+    response_model=TagsListResponse,
+    summary="Get tags list",
+    description="Get a list of all tags with published post counts, most used first"
+)
+async def get_tags(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    pagination: Annotated[PaginationParams, Depends()]
+):
+    """Get tags list"""
+    tags, total = await post_service.get_tags_list(session, pagination.skip, pagination.limit)
+    
+    return TagsListResponse(
+        tags=tags,
+        total=total,
+        page=pagination.page,
+        size=pagination.size,
+        pages=(total + pagination.size - 1) // pagination.size
+    )
+
+
+@router.get(
+    "/tags/popular",
+    response_model=List[TagDetailResponse],
+    summary="Get popular tags",
+    description="Get the most used tags for a tag cloud"
+)
+async def get_popular_tags(
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: int = Query(TAG_STATS_SETTINGS["POPULAR_TAGS_LIMIT"], ge=1, le=100)
+):
+    """Get popular tags"""
+    tags, _ = await post_service.get_tags_list(session, 0, limit)
+    return tags
+
+
+@router.get(
+    "/cache/stats",
+    response_model=CacheStatsResponse,
+    summary="Get post cache statistics",
+    description="Get hit ratio and hit latency of the post detail cache (superuser only)"
+)
+async def get_post_cache_stats(
+    current_user: Annotated[User, Depends(get_current_superuser)]
+):
+    """Get post detail cache statistics"""
+    return CacheStatsResponse(**post_detail_cache.snapshot())
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Bulk update posts",
+    description="Publish, archive or delete posts by ID list or filter in the background (superuser only)"
+)
+async def bulk_update_posts(
+    request: BulkPostActionRequest,
+    current_user: Annotated[User, Depends(get_current_superuser)]
+):
+    """Start a bulk post job"""
+    job = start_post_job(request)
+    return BulkJobResponse.model_validate(job)
+
+
+@router.post(
+    "/comments/bulk",
+    response_model=BulkJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Bulk moderate comments",
+    description="Approve or reject comments by ID list or filter in the background (superuser only)"
+)
+async def bulk_moderate_comments(
+    request: BulkCommentActionRequest,
+    current_user: Annotated[User, Depends(get_current_superuser)]
+):
+    """Start a bulk comment moderation job"""
+    job = start_comment_job(request)
+    return BulkJobResponse.model_validate(job)
+
+
+@router.post(
+    "/import",
+    response_model=PostImportResponse,
+    summary="Import posts",
+    description="Import posts with tags from an NDJSON body, one post per line (superuser only)"
+)
+async def import_posts(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_superuser)]
+):
+    """Import posts from NDJSON"""
+    return await import_posts_ndjson(iter_ndjson_lines(request.stream()), current_user)
+
+
+@router.get(
+    "/export",
+    summary="Export posts",
+    description="Stream all posts with tag names as NDJSON (superuser only)"
+)
+async def export_posts(
+    current_user: Annotated[User, Depends(get_current_superuser)],
+    post_status: Optional[PostStatus] = Query(None, alias="status", description="Filter by status")
+):
+    """Export posts as NDJSON"""
+    return StreamingResponse(
+        export_posts_ndjson(post_status),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="posts.ndjson"'}
+    )
+
+
+@router.get(
+    "/bulk/{job_id}",
+    response_model=BulkJobResponse,
+    summary="Get bulk job status",
+    description="Get progress of a bulk post or comment job (superuser only)"
+)
+async def get_bulk_job_status(
+    job_id: UUID,
+    current_user: Annotated[User, Depends(get_current_superuser)]
+):
+    """Get bulk job progress"""
+    job = get_bulk_job(job_id)
+    if not job:
+        raise BulkJobNotFoundError()
+    return BulkJobResponse.model_validate(job)
+
+
 @router.get(
     "/{post_id_or_slug}",
     response_model=PostDetailResponse,
     summary="Get post by ID or slug",
-    description="Get a specific post by its ID or slug"
+    description="Get a specific post by its ID or slug. Published posts support conditional GET via ETag."
 )
 async def get_post(
-    post: Annotated[Post, Depends(get_post_by_id_or_slug)],
+    post_id_or_slug: str,
     session: Annotated[AsyncSession, Depends(get_session)],
+    if_none_match: Annotated[Optional[str], Header()] = None,
     current_user: Annotated[Optional[User], Depends(get_current_user)] = None
 ):
     """Get post by ID or slug"""
-    # Increment view count if post is published
-    if post.status == "published":
-        await post_service.increment_view_count(session, post.id)
+    cached = post_detail_cache.get(post_id_or_slug)
+    cache_status = "HIT"
     
-    return PostDetailResponse.model_validate(post)
+    if cached is None:
+        cache_status = "MISS"
+        post = await get_post_by_id_or_slug(post_id_or_slug, session)
+        
+        # Only published posts are cached and counted as views
+        if post.status != PostStatus.PUBLISHED:
+            return PostDetailResponse.model_validate(post)
+        
+        cached = post_detail_cache.store(post, view_count_buffer.pending(post.id))
+    
+    view_count_buffer.record(cached.post_id)
+    cached.view_count += 1
+    
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": POST_CACHE_SETTINGS["CACHE_CONTROL"],
+        "X-Cache": cache_status
+    }
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=cached.render(), media_type="application/json", headers=headers)
 
 
 @router.put(
@@ -110,10 +335,26 @@ async def update_post(
     # Validate user access
     validate_user_access_to_post(post, current_user)
     
-    updated_post = await post_service.update_post(session, post.id, post_data)
+    updated_post = await post_service.update_post(session, post, post_data, current_user)
     return PostDetailResponse.model_validate(updated_post)
 
 
+@router.put(
+    "/{post_id}/autosave",
+    response_model=AutosaveResponse,
+    summary="Autosave draft",
+    description="Buffer draft changes; they are written to the database once per coalescing window"
+)
+async def autosave_post(
+    post_id: UUID,
+    autosave_data: AutosaveRequest,
+    current_user: Annotated[User, Depends(get_current_active_user)]
+):
+    """Autosave draft post"""
+    pending = await autosave_buffer.submit(post_id, autosave_data, current_user)
+    return AutosaveResponse(post_id=post_id, version=pending.version, flush_at=pending.flush_at)
+
+
 @router.delete(
     "/{post_id_or_slug}",
     response_model=MessageResponse,
@@ -129,49 +370,133 @@ async def delete_post(
     # Validate user access
     validate_user_access_to_post(post, current_user)
     
-    await post_service.delete_post(session, post.id)
+    await post_service.delete_post(session, post, current_user)
     return MessageResponse(
         message="Post deleted successfully",
         success=True
     )
 
 
-# Tag endpoints
-@router.post(
-    "/tags",
-    response_model=TagDetailResponse,
-    status_code=status.HTTP_201_CREATED,
-    summary="Create a new tag",
-    description="Create a new tag"
+@router.get(
+    "/{post_id_or_slug}/related",
+    response_model=List[RelatedPostResponse],
+    summary="Get related posts",
+    description="Get published posts most similar to this one by content and tags"
 )
-async def create_tag(
-    tag_data: TagCreateRequest,
+async def get_related_posts(
+    post_id_or_slug: str,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    limit: int = Query(5, ge=1, le=RELATED_POSTS_SETTINGS["TOP_K"])
+):
+    """Get related posts"""
+    return await post_service.get_related_posts(session, post_id_or_slug, limit)
+
+
+@router.get(
+    "/{post_id_or_slug}/revisions",
+    response_model=List[PostRevisionResponse],
+    summary="Get post revisions",
+    description="Get the revision history of a post, newest first (author or superuser)"
+)
+async def get_post_revisions(
+    post: Annotated[Post, Depends(get_post_by_id_or_slug)],
     current_user: Annotated[User, Depends(get_current_active_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    """Create a new tag"""
-    tag = await post_service.create_tag(session, tag_data)
-    return TagDetailResponse.model_validate(tag)
+    """Get post revisions"""
+    validate_user_access_to_post(post, current_user)
+    return await revision_service.get_revisions(session, post.id)
 
 
 @router.get(
-    "/tags",
-    response_model=TagsListResponse,
-    summary="Get tags list",
-    description="Get a list of all tags"
+    "/{post_id_or_slug}/revisions/{number}",
+    response_model=PostRevisionDetailResponse,
+    summary="Get post revision",
+    description="Get the full title and content of one revision (author or superuser)"
 )
-async def get_tags(
+async def get_post_revision(
+    number: int,
+    post: Annotated[Post, Depends(get_post_by_id_or_slug)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    """Get post revision content"""
+    validate_user_access_to_post(post, current_user)
+    
+    found = await revision_service.get_revision_content(session, post.id, number)
+    if not found:
+        raise RevisionNotFoundError()
+    
+    revision, content = found
+    return PostRevisionDetailResponse(
+        number=revision.number,
+        title=revision.title,
+        content=content,
+        content_hash=revision.content_hash,
+        author_id=revision.author_id,
+        created_at=revision.created_at
+    )
+
+
+# Comment endpoints
+@router.get(
+    "/{post_id_or_slug}/comments",
+    response_model=CommentsListResponse,
+    summary="Get post comments",
+    description="Get approved comments of a published post using cursor pagination"
+)
+async def get_post_comments(
+    post: Annotated[Post, Depends(get_post_by_id_or_slug)],
     session: Annotated[AsyncSession, Depends(get_session)],
-    page: int = Query(1, ge=1),
-    per_page: int = Query(20, ge=1, le=100)
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    size: int = Query(20, ge=1, le=100, description="Page size")
 ):
-    """Get tags list"""
-    tags, total = await post_service.get_tags_list(session, page, per_page)
+    """Get post comments"""
+    validate_post_is_published(post)
     
-    return TagsListResponse(
-        tags=[TagDetailResponse.model_validate(tag) for tag in tags],
-        total=total,
-        page=page,
-        per_page=per_page,
-        pages=(total + per_page - 1) // per_page
-    )
\ No newline at end of file
+    comments, next_cursor = await comment_service.get_comments(session, post.id, cursor, size)
+    return CommentsListResponse(
+        comments=[CommentResponse.model_validate(comment) for comment in comments],
+        total=post.comment_count,
+        size=size,
+        next_cursor=next_cursor
+    )
+
+
+@router.post(
+    "/{post_id_or_slug}/comments",
+    response_model=CommentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a comment",
+    description="Add a comment to a published post"
+)
+async def create_comment(
+    comment_data: CommentCreateRequest,
+    post: Annotated[Post, Depends(get_post_by_id_or_slug)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    """Create a comment"""
+    validate_post_is_published(post)
+    
+    comment = await comment_service.create_comment(session, post, comment_data, current_user)
+    return CommentResponse.model_validate(comment)
+
+
+@router.delete(
+    "/comments/{comment_id}",
+    response_model=MessageResponse,
+    summary="Delete comment",
+    description="Delete a comment (comment author, post author or superuser)"
+)
+async def delete_comment(
+    comment_id: UUID,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    """Delete comment"""
+    await comment_service.delete_comment(session, comment_id, current_user)
+    return MessageResponse(
+        message="Comment deleted successfully",
+        success=True
+    )
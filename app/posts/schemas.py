@@ -1,10 +1,23 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, model_validator
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
 
 from app.posts.models import PostStatus
+from app.posts.constants import MAX_TAGS_PER_POST, MAX_TAG_NAME_LENGTH
+
+
+def clean_tag_names(tag_names: Optional[List[str]]) -> Optional[List[str]]:
+    """Strip and deduplicate tag names, enforcing the per-post limit and name length"""
+    if tag_names is None:
+        return None
+    tag_names = list(set([tag.strip() for tag in tag_names if tag.strip()]))
+    if len(tag_names) > MAX_TAGS_PER_POST:
+        raise ValueError(f'Maximum {MAX_TAGS_PER_POST} tags allowed')
+    if any(len(tag) > MAX_TAG_NAME_LENGTH for tag in tag_names):
+        raise ValueError(f'Tag names must be at most {MAX_TAG_NAME_LENGTH} characters')
+    return tag_names
 
 
 class PostCreateRequest(BaseModel):
@@ -17,13 +30,7 @@ class PostCreateRequest(BaseModel):
     
     @validator('tag_names')
     def validate_tag_names(cls, v):
-        if v is not None:
-            # Remove duplicates and empty strings
-            v = list(set([tag.strip() for tag in v if tag.strip()]))
-            # Limit number of tags
-            if len(v) > 10:
-                raise ValueError('Maximum 10 tags allowed')
-        return v
+        return clean_tag_names(v)
 
 
 class PostUpdateRequest(BaseModel):
@@ -33,14 +40,11 @@ class PostUpdateRequest(BaseModel):
     status: Optional[PostStatus] = None
     is_featured: Optional[bool] = None
     tag_names: Optional[List[str]] = Field(default=None)
+    version: Optional[int] = Field(None, ge=1, description="Version being edited; stale versions are rejected")
     
     @validator('tag_names')
     def validate_tag_names(cls, v):
-        if v is not None:
-            v = list(set([tag.strip() for tag in v if tag.strip()]))
-            if len(v) > 10:
-                raise ValueError('Maximum 10 tags allowed')
-        return v
+        return clean_tag_names(v)
 
 
 class AuthorResponse(BaseModel):
@@ -69,6 +73,10 @@ class PostListResponse(BaseModel):
     is_featured: bool
     slug: str
     view_count: int
+    comment_count: int = 0
+    word_count: int = 0
+    reading_time: int = 0
+    auto_excerpt: Optional[str] = None
     author: AuthorResponse
     tags: List[TagResponse] = []
     created_at: datetime
@@ -87,23 +95,135 @@ class PostDetailResponse(BaseModel):
     is_featured: bool
     slug: str
     view_count: int
+    comment_count: int = 0
+    word_count: int = 0
+    reading_time: int = 0
+    auto_excerpt: Optional[str] = None
     author_id: UUID
     author: AuthorResponse
     tags: List[TagResponse] = []
     created_at: datetime
     updated_at: Optional[datetime] = None
     published_at: Optional[datetime] = None
+    version: int = 1
     
     class Config:
         from_attributes = True
 
 
+class AutosaveRequest(BaseModel):
+    version: int = Field(ge=1, description="Version the editor last saw")
+    title: Optional[str] = Field(None, min_length=1, max_length=200)
+    content: Optional[str] = Field(None, min_length=1)
+    excerpt: Optional[str] = Field(None, max_length=500)
+
+
+class AutosaveResponse(BaseModel):
+    post_id: UUID
+    version: int
+    flush_at: datetime
+
+
+class TagMatchMode(str, Enum):
+    ALL = "all"
+    ANY = "any"
+
+
+class TagFacetResponse(BaseModel):
+    id: UUID
+    name: str
+    slug: str
+    count: int
+
+
 class PostsListResponse(BaseModel):
     posts: List[PostListResponse]
     total: int
+    total_is_exact: bool = True
     page: int
     size: int
     pages: int
+    facets: Optional[List[TagFacetResponse]] = None
+
+
+class PostImportRecord(BaseModel):
+    title: str = Field(min_length=1, max_length=200)
+    content: str = Field(min_length=1)
+    excerpt: Optional[str] = Field(None, max_length=500)
+    slug: Optional[str] = Field(None, max_length=100)
+    status: PostStatus = PostStatus.DRAFT
+    tag_names: Optional[List[str]] = Field(default=None)
+    author_id: Optional[UUID] = None
+    view_count: int = Field(0, ge=0)
+    created_at: Optional[datetime] = None
+    published_at: Optional[datetime] = None
+    
+    @validator('tag_names')
+    def validate_tag_names(cls, v):
+        return clean_tag_names(v)
+
+
+class PostExportRecord(BaseModel):
+    id: UUID
+    title: str
+    content: str
+    excerpt: Optional[str] = None
+    slug: str
+    status: PostStatus
+    is_featured: bool
+    author_id: UUID
+    view_count: int
+    tag_names: List[str] = []
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    published_at: Optional[datetime] = None
+
+
+class PostImportError(BaseModel):
+    line: int
+    error: str
+
+
+class PostImportResponse(BaseModel):
+    created: int
+    failed: int
+    errors: List[PostImportError] = []
+
+
+class RelatedPostResponse(BaseModel):
+    id: UUID
+    title: str
+    slug: str
+    excerpt: Optional[str] = None
+    auto_excerpt: Optional[str] = None
+    published_at: Optional[datetime] = None
+    score: float
+
+
+class PostRevisionResponse(BaseModel):
+    number: int
+    kind: str
+    base_number: Optional[int] = None
+    title: str
+    content_hash: str
+    content_length: int
+    stored_size: int
+    author_id: Optional[UUID] = None
+    created_at: datetime
+
+
+class PostRevisionDetailResponse(BaseModel):
+    number: int
+    title: str
+    content: str
+    content_hash: str
+    author_id: Optional[UUID] = None
+    created_at: datetime
+
+
+class HotPostsResponse(BaseModel):
+    posts: List[PostListResponse]
+    size: int
 
 
 class TagCreateRequest(BaseModel):
@@ -161,9 +281,8 @@ class CommentResponse(BaseModel):
 class CommentsListResponse(BaseModel):
     comments: List[CommentResponse]
     total: int
-    page: int
     size: int
-    pages: int
+    next_cursor: Optional[str] = None
 
 
 class PostStatsResponse(BaseModel):
@@ -175,6 +294,91 @@ class PostStatsResponse(BaseModel):
     total_comments: int
 
 
+class BulkPostAction(str, Enum):
+    PUBLISH = "publish"
+    ARCHIVE = "archive"
+    DELETE = "delete"
+
+
+class BulkCommentAction(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+
+
+class BulkPostFilter(BaseModel):
+    status: Optional[PostStatus] = None
+    author_id: Optional[UUID] = None
+    created_before: Optional[datetime] = None
+    
+    @model_validator(mode='after')
+    def validate_criteria(self):
+        # An empty filter would match every post
+        if self.status is None and self.author_id is None and self.created_before is None:
+            raise ValueError('Filter needs at least one criterion')
+        return self
+
+
+class BulkCommentFilter(BaseModel):
+    post_id: Optional[UUID] = None
+    author_id: Optional[UUID] = None
+    is_approved: Optional[bool] = None
+    
+    @model_validator(mode='after')
+    def validate_criteria(self):
+        # An empty filter would match every comment
+        if self.post_id is None and self.author_id is None and self.is_approved is None:
+            raise ValueError('Filter needs at least one criterion')
+        return self
+
+
+class BulkPostActionRequest(BaseModel):
+    action: BulkPostAction
+    ids: Optional[List[UUID]] = None
+    filter: Optional[BulkPostFilter] = None
+    
+    @model_validator(mode='after')
+    def validate_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Provide either ids or filter')
+        return self
+
+
+class BulkCommentActionRequest(BaseModel):
+    action: BulkCommentAction
+    ids: Optional[List[UUID]] = None
+    filter: Optional[BulkCommentFilter] = None
+    
+    @model_validator(mode='after')
+    def validate_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Provide either ids or filter')
+        return self
+
+
+class BulkJobResponse(BaseModel):
+    id: UUID
+    target: str
+    action: str
+    status: str
+    total: int
+    processed: int
+    affected: int
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+    avg_hit_latency_ms: float
+    entries: int
+
+
 class MessageResponse(BaseModel):
     message: str
     success: bool = True
\ No newline at end of file
@@ -1,24 +1,46 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
-from sqlalchemy.orm import selectinload
-from typing import Optional, List, Tuple
-from uuid import UUID
+from sqlalchemy import select, insert, update, delete, func, and_, or_, false
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Optional, List, Dict, Set, Tuple
+from uuid import UUID, uuid4
 from datetime import datetime
+from collections import Counter, defaultdict
 import re
 
 from app.posts.models import (
     Post, PostCreate, PostUpdate, PostStatus,
     Tag, TagCreate,
     Comment, CommentCreate,
-    PostTagLink
+    PostTagLink, RelatedPost, PostSignature, PostRevision
 )
 from app.posts.schemas import (
     PostCreateRequest, PostUpdateRequest,
     TagCreateRequest, TagUpdateRequest,
-    CommentCreateRequest
+    CommentCreateRequest,
+    TagDetailResponse,
+    TagFacetResponse,
+    TagMatchMode,
+    PostImportRecord
 )
+from app.posts.cache import post_detail_cache, tag_list_cache, post_count_cache
+from app.posts.feed import hot_feed
+from app.posts.autosave import autosave_buffer
+from app.posts.related import schedule_related_refresh
+from app.posts.duplicates import min_hasher, duplicate_index
+from app.posts.exceptions import DuplicatePostError, StaleVersionError
+from app.posts.revisions import (
+    revision_content_hash, encode_snapshot, decode_snapshot, encode_delta, apply_delta
+)
+from app.posts.constants import (
+    COUNT_CACHE_SETTINGS, FEATURED_POST_SETTINGS, DUPLICATE_DETECTION_SETTINGS, REVISION_SETTINGS,
+    TAG_FACET_SETTINGS
+)
+from app.posts.utils import compute_content_fields, encode_cursor, decode_cursor
+from app.feeds.service import feed_service
 from app.auth.models import User
-from app.exceptions import NotFoundError, UnauthorizedError, ConflictError
+from app.database import count_with_cache
+from app.exceptions import NotFoundError, UnauthorizedError, ConflictError, ValidationError
 
 
 class PostService:
@@ -97,8 +119,240 @@ class PostService:
             slug = f"{base_slug}-{counter}"
             counter += 1
     
+    async def _adjust_tag_counts(self, session: AsyncSession, tag_ids: Set[UUID], delta: int) -> None:
+        """Add delta to the published post counter of the given tags"""
+        if not tag_ids:
+            return
+        
+        await session.execute(
+            update(Tag)
+            .where(Tag.id.in_(tag_ids))
+            .values(post_count=Tag.post_count + delta)
+        )
+    
+    async def _apply_tag_count_changes(
+        self,
+        session: AsyncSession,
+        old_tag_ids: Set[UUID],
+        was_published: bool,
+        new_tag_ids: Set[UUID],
+        is_published: bool
+    ) -> bool:
+        """Update tag counters for a post moving between tag sets/statuses
+        
+        Returns True if any counter changed.
+        """
+        counted_before = old_tag_ids if was_published else set()
+        counted_after = new_tag_ids if is_published else set()
+        
+        removed = counted_before - counted_after
+        added = counted_after - counted_before
+        await self._adjust_tag_counts(session, removed, -1)
+        await self._adjust_tag_counts(session, added, 1)
+        return bool(removed or added)
+    
+    async def _allocate_unique_slugs(self, session: AsyncSession, column, base_slugs: List[str]) -> List[str]:
+        """Make a batch of slugs unique with at most two queries
+        
+        Suffixed variants are only fetched for bases that already exist or
+        repeat within the batch; numbering then continues in memory.
+        """
+        if not base_slugs:
+            return []
+        
+        result = await session.execute(select(column).where(column.in_(set(base_slugs))))
+        taken = set(result.scalars().all())
+        
+        repeated = {slug for slug, count in Counter(base_slugs).items() if count > 1}
+        colliding = taken | repeated
+        if colliding:
+            result = await session.execute(
+                select(column).where(or_(*[column.like(f"{base}-%") for base in colliding]))
+            )
+            taken.update(result.scalars().all())
+        
+        slugs = []
+        for base in base_slugs:
+            slug = base
+            counter = 1
+            while slug in taken:
+                slug = f"{base}-{counter}"
+                counter += 1
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+    
+    async def _upsert_tags_by_name(self, session: AsyncSession, tag_names: Set[str]) -> Dict[str, UUID]:
+        """Resolve tag names to IDs, inserting the missing tags in one statement"""
+        if not tag_names:
+            return {}
+        
+        result = await session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(tag_names)))
+        tag_ids = {name: tag_id for name, tag_id in result.all()}
+        
+        missing = sorted(tag_names - tag_ids.keys())
+        if missing:
+            slugs = await self._allocate_unique_slugs(
+                session, Tag.slug, [self._generate_slug(name) for name in missing]
+            )
+            now = datetime.utcnow()
+            rows = [
+                {"id": uuid4(), "name": name, "slug": slug, "post_count": 0, "created_at": now}
+                for name, slug in zip(missing, slugs)
+            ]
+            await session.execute(insert(Tag), rows)
+            tag_ids.update((row["name"], row["id"]) for row in rows)
+        
+        return tag_ids
+    
+    async def bulk_create_posts(self, session: AsyncSession, records: List[PostImportRecord], default_author: User) -> List[UUID]:
+        """Insert a batch of imported posts with their tags (caller commits)
+        
+        Slugs, authors and tags are resolved with a handful of queries for the
+        whole batch, and posts, tag links and tag counters are written with
+        one statement each. Imported posts are never featured.
+        """
+        if not records:
+            return []
+        
+        author_ids = {record.author_id for record in records if record.author_id}
+        known_authors = set()
+        if author_ids:
+            result = await session.execute(select(User.id).where(User.id.in_(author_ids)))
+            known_authors = set(result.scalars().all())
+        
+        slugs = await self._allocate_unique_slugs(
+            session, Post.slug,
+            [self._generate_slug(record.slug or record.title) or "post" for record in records]
+        )
+        tag_ids = await self._upsert_tags_by_name(
+            session, {name.lower() for record in records for name in record.tag_names or []}
+        )
+        
+        now = datetime.utcnow()
+        post_rows = []
+        link_rows = []
+        signature_rows = []
+        published_tag_counts = Counter()
+        for record, slug in zip(records, slugs):
+            post_id = uuid4()
+            published_at = None
+            if record.status == PostStatus.PUBLISHED:
+                published_at = record.published_at or record.created_at or now
+            
+            content_fields = compute_content_fields(record.content)
+            post_rows.append({
+                "id": post_id,
+                "title": record.title,
+                "content": record.content,
+                "excerpt": record.excerpt,
+                "status": record.status,
+                "is_featured": False,
+                "slug": slug,
+                "author_id": record.author_id if record.author_id in known_authors else default_author.id,
+                "view_count": record.view_count,
+                "comment_count": 0,
+                "published_at": published_at,
+                "created_at": record.created_at or now,
+                **content_fields
+            })
+            
+            signature = min_hasher.signature(content_fields["plain_text"])
+            if signature is not None:
+                signature_rows.append({"post_id": post_id, "signature": min_hasher.to_bytes(signature)})
+            
+            post_tag_ids = {tag_ids[name.lower()] for name in record.tag_names or []}
+            link_rows.extend({"post_id": post_id, "tag_id": tag_id} for tag_id in post_tag_ids)
+            if published_at:
+                published_tag_counts.update(post_tag_ids)
+        
+        await session.execute(insert(Post), post_rows)
+        if link_rows:
+            await session.execute(insert(PostTagLink), link_rows)
+        if signature_rows:
+            await session.execute(insert(PostSignature), signature_rows)
+        
+        # One counter UPDATE per distinct increment rather than per tag
+        tags_by_delta = defaultdict(set)
+        for tag_id, delta in published_tag_counts.items():
+            tags_by_delta[delta].add(tag_id)
+        for delta, delta_tag_ids in tags_by_delta.items():
+            await self._adjust_tag_counts(session, delta_tag_ids, delta)
+        
+        return [row["id"] for row in post_rows]
+    
+    async def create_tag(self, session: AsyncSession, tag_data: TagCreateRequest) -> Tag:
+        """Create a new tag"""
+        tag_name = tag_data.name.strip().lower()
+        
+        result = await session.execute(select(Tag).where(Tag.name == tag_name))
+        if result.scalar_one_or_none():
+            raise ConflictError("Tag with this name already exists")
+        
+        tag_slug = await self._ensure_unique_tag_slug(session, self._generate_slug(tag_name))
+        tag = Tag(name=tag_name, slug=tag_slug, description=tag_data.description)
+        
+        session.add(tag)
+        await session.commit()
+        await session.refresh(tag)
+        tag_list_cache.invalidate()
+        return tag
+    
+    async def get_tags_list(self, session: AsyncSession, skip: int = 0, limit: int = 20) -> Tuple[List[TagDetailResponse], int]:
+        """Get tags sorted by published post count, served from memory"""
+        tags = tag_list_cache.get()
+        if tags is None:
+            generation = tag_list_cache.generation
+            result = await session.execute(select(Tag))
+            tags = tag_list_cache.store(result.scalars().all(), generation)
+        
+        return tags[skip:skip + limit], len(tags)
+    
+    async def _enforce_featured_limit(self, session: AsyncSession, post_id: UUID) -> List[UUID]:
+        """Make room for a newly featured post within MAX_FEATURED_POSTS
+        
+        Older featured posts are unfeatured when AUTO_UNFEATURE_OLDER is set,
+        otherwise the request is rejected. Returns the unfeatured post IDs.
+        """
+        max_featured = FEATURED_POST_SETTINGS["MAX_FEATURED_POSTS"]
+        others = and_(Post.is_featured == True, Post.id != post_id)
+        
+        if not FEATURED_POST_SETTINGS["AUTO_UNFEATURE_OLDER"]:
+            featured_count = await session.scalar(select(func.count(Post.id)).where(others))
+            if featured_count >= max_featured:
+                raise ValidationError(f"Maximum {max_featured} featured posts allowed")
+            return []
+        
+        keep = (
+            select(Post.id)
+            .where(others)
+            .order_by(func.coalesce(Post.published_at, Post.created_at).desc())
+            .limit(max_featured - 1)
+        )
+        result = await session.execute(
+            update(Post)
+            .where(others, Post.id.not_in(keep))
+            .values(is_featured=False, version=Post.version + 1)
+            .returning(Post.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars().all())
+    
+    def _apply_unfeatured(self, post_ids: List[UUID]) -> None:
+        for post_id in post_ids:
+            post_detail_cache.invalidate(post_id)
+        hot_feed.unfeature(post_ids)
+    
     async def create_post(self, session: AsyncSession, post_data: PostCreateRequest, author: User) -> Post:
         """Create a new post"""
+        content_fields = compute_content_fields(post_data.content)
+        
+        # Reject near-duplicates of existing posts before doing any other work
+        signature = min_hasher.signature(content_fields["plain_text"])
+        if signature is not None and DUPLICATE_DETECTION_SETTINGS["ENABLED"]:
+            if duplicate_index.find_similar(signature):
+                raise DuplicatePostError()
+        
         # Generate slug
         slug = self._generate_slug(post_data.title)
         slug = await self._ensure_unique_slug(session, slug)
@@ -106,6 +360,11 @@ class PostService:
         # Set published_at if status is published
         published_at = datetime.utcnow() if post_data.status == PostStatus.PUBLISHED else None
         
+        # Handle tags (resolved before the post is persisted so assignment needs no lazy load)
+        tags = []
+        if post_data.tag_names:
+            tags = await self._get_or_create_tags(session, post_data.tag_names)
+        
         # Create post
         post = Post(
             title=post_data.title,
@@ -115,19 +374,37 @@ class PostService:
             is_featured=post_data.is_featured,
             slug=slug,
             author_id=author.id,
-            published_at=published_at
+            published_at=published_at,
+            tags=tags,
+            **content_fields
         )
         
         session.add(post)
-        await session.flush()  # Get the post ID
+        # Insert the post first: signature and revision rows reference it and have no ORM relationship to order by
+        await session.flush()
+        if signature is not None:
+            session.add(PostSignature(post_id=post.id, signature=min_hasher.to_bytes(signature)))
+        await revision_service.record_revision(session, post, author.id, is_new=True)
         
-        # Handle tags
-        if post_data.tag_names:
-            tags = await self._get_or_create_tags(session, post_data.tag_names)
-            post.tags = tags
+        tag_ids = {tag.id for tag in tags}
+        if post.status == PostStatus.PUBLISHED:
+            await self._adjust_tag_counts(session, tag_ids, 1)
+        
+        unfeatured_ids = await self._enforce_featured_limit(session, post.id) if post.is_featured else []
         
         await session.commit()
-        await session.refresh(post)
+        post_count_cache.clear()
+        if tag_ids:
+            tag_list_cache.invalidate()
+        self._apply_unfeatured(unfeatured_ids)
+        if signature is not None:
+            duplicate_index.add(post.id, signature)
+        
+        post = await self.get_post_by_id(session, post.id)
+        hot_feed.sync(post)
+        feed_service.post_changed(post.published_at, post.id)
+        if post.status == PostStatus.PUBLISHED:
+            schedule_related_refresh(post.id)
         return post
     
     async def get_post_by_id(self, session: AsyncSession, post_id: UUID) -> Optional[Post]:
@@ -135,7 +412,7 @@ class PostService:
         query = select(Post).options(
             selectinload(Post.author),
             selectinload(Post.tags)
-        ).where(Post.id == post_id)
+        ).where(Post.id == post_id).execution_options(populate_existing=True)
         
         result = await session.execute(query)
         return result.scalar_one_or_none()
@@ -157,17 +434,107 @@ class PostService:
         limit: int = 20,
         status: Optional[PostStatus] = None,
         author_id: Optional[UUID] = None,
-        tag_slug: Optional[str] = None,
+        tag_slugs: Optional[List[str]] = None,
+        tag_mode: TagMatchMode = TagMatchMode.ALL,
         search: Optional[str] = None,
         is_featured: Optional[bool] = None
-    ) -> Tuple[List[Post], int]:
-        """Get posts with filters and pagination"""
+    ) -> Tuple[List[Post], int, bool]:
+        """Get posts with filters and pagination
+        
+        Returns (posts, total, total_is_exact).
+        """
         query = select(Post).options(
             selectinload(Post.author),
             selectinload(Post.tags)
         )
         
         # Apply filters
+        conditions = self._post_filter_conditions(status, author_id, search, is_featured)
+        if tag_slugs:
+            conditions.append(await self._tag_filter_condition(session, tag_slugs, tag_mode))
+        
+        if conditions:
+            query = query.where(and_(*conditions))
+        
+        # Get total count
+        count_query = select(func.count(Post.id))
+        if conditions:
+            count_query = count_query.where(and_(*conditions))
+        
+        filter_key = self._filter_key(status, author_id, tag_slugs, tag_mode, search, is_featured)
+        total, total_is_exact = await count_with_cache(
+            session, post_count_cache, filter_key, count_query,
+            estimate_table=None if filter_key else Post.__tablename__,
+            estimate_threshold=COUNT_CACHE_SETTINGS["ESTIMATE_THRESHOLD"]
+        )
+        
+        # Get posts with pagination
+        query = query.offset(skip).limit(limit).order_by(Post.created_at.desc())
+        result = await session.execute(query)
+        posts = result.scalars().all()
+        
+        return list(posts), total, total_is_exact
+    
+    async def get_tag_facets(
+        self,
+        session: AsyncSession,
+        status: Optional[PostStatus] = None,
+        author_id: Optional[UUID] = None,
+        tag_slugs: Optional[List[str]] = None,
+        tag_mode: TagMatchMode = TagMatchMode.ALL,
+        search: Optional[str] = None,
+        is_featured: Optional[bool] = None
+    ) -> List[TagFacetResponse]:
+        """Count matching posts per tag, most used tags first
+        
+        In "any" mode the tag filter itself is left out, so each count is
+        what selecting that tag would add (disjunctive facets). In "all"
+        mode counts are taken within the current result.
+        """
+        if tag_mode == TagMatchMode.ANY:
+            tag_slugs = None
+        
+        cache_key = ("facets",) + self._filter_key(status, author_id, tag_slugs, tag_mode, search, is_featured)
+        cached = post_count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        conditions = self._post_filter_conditions(status, author_id, search, is_featured)
+        if tag_slugs:
+            conditions.append(await self._tag_filter_condition(session, tag_slugs, tag_mode))
+        
+        if status == PostStatus.PUBLISHED and len(conditions) == 1:
+            # Published counts per tag are maintained on the tag rows
+            query = (
+                select(Tag.id, Tag.name, Tag.slug, Tag.post_count.label("count"))
+                .where(Tag.post_count > 0)
+                .order_by(Tag.post_count.desc(), Tag.name)
+            )
+        else:
+            post_count = func.count(PostTagLink.post_id)
+            query = (
+                select(Tag.id, Tag.name, Tag.slug, post_count.label("count"))
+                .select_from(PostTagLink)
+                .join(Tag, Tag.id == PostTagLink.tag_id)
+                .group_by(Tag.id, Tag.name, Tag.slug)
+                .order_by(post_count.desc(), Tag.name)
+            )
+            if conditions:
+                query = query.join(Post, Post.id == PostTagLink.post_id).where(and_(*conditions))
+        
+        result = await session.execute(query.limit(TAG_FACET_SETTINGS["MAX_FACETS"]))
+        facets = [TagFacetResponse(id=row.id, name=row.name, slug=row.slug, count=row.count) for row in result]
+        post_count_cache.set(cache_key, facets)
+        return facets
+    
+    def _post_filter_conditions(
+        self,
+        status: Optional[PostStatus],
+        author_id: Optional[UUID],
+        search: Optional[str],
+        is_featured: Optional[bool]
+    ) -> list:
+        """Conditions on post columns shared by post lists and facet counts"""
         conditions = []
         
         if status:
@@ -179,10 +546,6 @@ class PostService:
         if is_featured is not None:
             conditions.append(Post.is_featured == is_featured)
         
-        if tag_slug:
-            # Join with tags to filter by tag slug
-            query = query.join(Post.tags).where(Tag.slug == tag_slug)
-        
         if search:
             search_term = f"%{search}%"
             conditions.append(
@@ -193,94 +556,509 @@ class PostService:
                 )
             )
         
-        if conditions:
-            query = query.where(and_(*conditions))
-        
-        # Get total count
-        count_query = select(func.count(Post.id))
-        if conditions:
-            count_query = count_query.where(and_(*conditions))
-        if tag_slug:
-            count_query = count_query.join(Post.tags).where(Tag.slug == tag_slug)
-        
-        total_result = await session.execute(count_query)
-        total = total_result.scalar()
+        return conditions
+    
+    async def _tag_filter_condition(self, session: AsyncSession, tag_slugs: List[str], tag_mode: TagMatchMode):
+        """Post.id IN (post_tags lookup) condition for a tag filter
         
-        # Get posts with pagination
-        query = query.offset(skip).limit(limit).order_by(Post.created_at.desc())
-        result = await session.execute(query)
-        posts = result.scalars().unique().all()
+        Slugs are resolved to IDs first so the subquery is a range scan on
+        the (tag_id, post_id) index; "all" keeps posts linked to every tag.
+        """
+        result = await session.execute(select(Tag.id).where(Tag.slug.in_(tag_slugs)))
+        tag_ids = result.scalars().all()
+        if not tag_ids or (tag_mode == TagMatchMode.ALL and len(tag_ids) < len(set(tag_slugs))):
+            return false()
         
-        return list(posts), total
+        matching = select(PostTagLink.post_id).where(PostTagLink.tag_id.in_(tag_ids))
+        if tag_mode == TagMatchMode.ALL and len(tag_ids) > 1:
+            matching = matching.group_by(PostTagLink.post_id).having(func.count() == len(tag_ids))
+        elif len(tag_ids) > 1:
+            matching = matching.distinct()
+        return Post.id.in_(matching)
+    
+    def _filter_key(
+        self,
+        status: Optional[PostStatus],
+        author_id: Optional[UUID],
+        tag_slugs: Optional[List[str]],
+        tag_mode: TagMatchMode,
+        search: Optional[str],
+        is_featured: Optional[bool]
+    ) -> tuple:
+        """Normalized filter set used as a cache key"""
+        tags = (tag_mode.value,) + tuple(sorted(set(tag_slugs))) if tag_slugs else None
+        return tuple(
+            (name, str(value)) for name, value in (
+                ("status", status), ("author_id", author_id), ("tags", tags),
+                ("search", search), ("is_featured", is_featured)
+            ) if value is not None
+        )
     
     async def update_post(
         self,
         session: AsyncSession,
-        post_id: UUID,
+        post: Post,
         post_data: PostUpdateRequest,
         current_user: User
     ) -> Post:
-        """Update post"""
-        post = await self.get_post_by_id(session, post_id)
-        if not post:
-            raise NotFoundError("Post not found")
+        """Update post with one version-checked UPDATE of the changed columns
+        
+        post is the row loaded for the request, with author and tags. The
+        UPDATE only matches while the row still has the version the client
+        sent (or the loaded one), so concurrent editors get a 409 instead of
+        a lost update. Tag changes are applied as a diff on post_tags.
+        """
+        # A buffered autosave is older than this update, so it is written first
+        if await autosave_buffer.flush(post.id):
+            post = await self.get_post_by_id(session, post.id)
         
         # Check permissions
         if post.author_id != current_user.id and not current_user.is_superuser:
             raise UnauthorizedError("Not enough permissions")
         
-        # Update fields
-        update_data = post_data.model_dump(exclude_unset=True, exclude={'tag_names'})
+        expected_version = post.version if post_data.version is None else post_data.version
+        if expected_version != post.version:
+            raise StaleVersionError(post.version)
+        
+        previous_slug = post.slug
+        was_published = post.status == PostStatus.PUBLISHED
+        was_featured = post.is_featured
+        old_tag_ids = {tag.id for tag in post.tags}
+        previous_text = (post.title, post.content)
+        previous_modified = post.updated_at or post.created_at
+        
+        # Only columns whose value actually changes are written
+        update_data = {
+            field: value
+            for field, value in post_data.model_dump(exclude_unset=True, exclude={'tag_names', 'version'}).items()
+            if getattr(post, field) != value
+        }
         
         # Handle slug update if title changed
         if 'title' in update_data:
             new_slug = self._generate_slug(update_data['title'])
             if new_slug != post.slug:
-                new_slug = await self._ensure_unique_slug(session, new_slug, post.id)
-                update_data['slug'] = new_slug
+                update_data['slug'] = await self._ensure_unique_slug(session, new_slug, post.id)
+        
+        # Recompute derived content fields only when content actually changed
+        signature = None
+        content_changed = 'content' in update_data
+        if content_changed:
+            update_data.update(compute_content_fields(update_data['content']))
+            signature = min_hasher.signature(update_data['plain_text'])
         
         # Handle status change to published
-        if 'status' in update_data and update_data['status'] == PostStatus.PUBLISHED and post.status != PostStatus.PUBLISHED:
+        if update_data.get('status') == PostStatus.PUBLISHED:
             update_data['published_at'] = datetime.utcnow()
         
-        # Update post fields
-        if update_data:
-            update_data['updated_at'] = datetime.utcnow()
-            for field, value in update_data.items():
-                setattr(post, field, value)
+        new_tag_names = None
+        if post_data.tag_names is not None:
+            tag_names = {name.strip().lower() for name in post_data.tag_names if name.strip()}
+            if tag_names != {tag.name for tag in post.tags}:
+                new_tag_names = tag_names
+        
+        if not update_data and new_tag_names is None:
+            return post
+        
+        update_data['updated_at'] = datetime.utcnow()
+        result = await session.execute(
+            update(Post)
+            .where(Post.id == post.id, Post.version == expected_version)
+            .values(**update_data, version=Post.version + 1)
+            .returning(Post.version)
+            .execution_options(synchronize_session=False)
+        )
+        new_version = result.scalar_one_or_none()
+        if new_version is None:
+            post_id = post.id
+            await session.rollback()
+            current_version = (await session.execute(select(Post.version).where(Post.id == post_id))).scalar()
+            raise StaleVersionError(current_version)
+        
+        # Mirror the written values on the loaded instance without marking it dirty
+        update_data['version'] = new_version
+        for field, value in update_data.items():
+            set_committed_value(post, field, value)
+        
+        if content_changed:
+            await session.execute(delete(PostSignature).where(PostSignature.post_id == post.id))
+            if signature is not None:
+                session.add(PostSignature(post_id=post.id, signature=min_hasher.to_bytes(signature)))
         
         # Handle tags
-        if post_data.tag_names is not None:
-            tags = await self._get_or_create_tags(session, post_data.tag_names)
-            post.tags = tags
+        if new_tag_names is not None:
+            new_tag_ids = set((await self._upsert_tags_by_name(session, new_tag_names)).values())
+            removed_tag_ids = old_tag_ids - new_tag_ids
+            added_tag_ids = new_tag_ids - old_tag_ids
+            if removed_tag_ids:
+                await session.execute(delete(PostTagLink).where(
+                    PostTagLink.post_id == post.id, PostTagLink.tag_id.in_(removed_tag_ids)
+                ))
+            if added_tag_ids:
+                await session.execute(
+                    insert(PostTagLink), [{"post_id": post.id, "tag_id": tag_id} for tag_id in added_tag_ids]
+                )
+            
+            tags = []
+            if new_tag_ids:
+                tags = (await session.execute(select(Tag).where(Tag.id.in_(new_tag_ids)))).scalars().all()
+            set_committed_value(post, 'tags', list(tags))
+        
+        if (post.title, post.content) != previous_text:
+            await revision_service.record_revision(
+                session, post, current_user.id, previous=(*previous_text, previous_modified)
+            )
+        
+        tags_changed = await self._apply_tag_count_changes(
+            session,
+            old_tag_ids, was_published,
+            {tag.id for tag in post.tags}, post.status == PostStatus.PUBLISHED
+        )
+        
+        unfeatured_ids = []
+        if post.is_featured and not was_featured:
+            unfeatured_ids = await self._enforce_featured_limit(session, post.id)
         
         await session.commit()
-        await session.refresh(post)
+        post_detail_cache.invalidate(post.id, previous_slug)
+        post_count_cache.clear()
+        if tags_changed or new_tag_names is not None:
+            tag_list_cache.invalidate()
+        self._apply_unfeatured(unfeatured_ids)
+        if content_changed:
+            if signature is not None:
+                duplicate_index.add(post.id, signature)
+            else:
+                duplicate_index.remove(post.id)
+        
+        hot_feed.sync(post)
+        feed_service.post_changed(post.published_at, post.id)
+        
+        is_published = post.status == PostStatus.PUBLISHED
+        related_inputs_changed = (
+            (post.title, post.content) != previous_text
+            or {tag.id for tag in post.tags} != old_tag_ids
+        )
+        if was_published != is_published or (is_published and related_inputs_changed):
+            schedule_related_refresh(post.id)
         return post
     
-    async def delete_post(self, session: AsyncSession, post_id: UUID, current_user: User) -> bool:
-        """Delete post"""
-        post = await self.get_post_by_id(session, post_id)
-        if not post:
-            raise NotFoundError("Post not found")
+    async def delete_post(self, session: AsyncSession, post: Post, current_user: User) -> bool:
+        """Delete post with one DELETE by primary key
         
+        Tag links, comments, revisions and derived rows go with it through
+        ON DELETE CASCADE. post is the row loaded for the request.
+        """
         # Check permissions
         if post.author_id != current_user.id and not current_user.is_superuser:
             raise UnauthorizedError("Not enough permissions")
         
-        await session.delete(post)
+        tags_changed = post.status == PostStatus.PUBLISHED and bool(post.tags)
+        if tags_changed:
+            await self._adjust_tag_counts(session, {tag.id for tag in post.tags}, -1)
+        
+        await session.execute(
+            delete(Post).where(Post.id == post.id).execution_options(synchronize_session=False)
+        )
         await session.commit()
+        if tags_changed:
+            tag_list_cache.invalidate()
+        post_detail_cache.invalidate(post.id, post.slug)
+        self.forget_deleted_posts([post.id])
+        feed_service.post_changed(post.published_at, post.id)
         return True
     
-    async def increment_view_count(self, session: AsyncSession, post_id: UUID) -> bool:
-        """Increment post view count"""
-        post = await self.get_post_by_id(session, post_id)
-        if not post:
-            return False
+    def forget_deleted_posts(self, post_ids: List[UUID]) -> None:
+        """Drop deleted posts from in-memory caches and indexes"""
+        for post_id in post_ids:
+            autosave_buffer.discard(post_id)
+            post_detail_cache.invalidate(post_id)
+            hot_feed.remove(post_id)
+            duplicate_index.remove(post_id)
+            schedule_related_refresh(post_id)
+        post_count_cache.clear()
+    
+    async def get_related_posts(self, session: AsyncSession, post_id_or_slug: str, limit: int) -> List[dict]:
+        """Get precomputed related posts, best first, in one indexed query"""
+        try:
+            source_id = UUID(post_id_or_slug)
+        except ValueError:
+            source_id = select(Post.id).where(Post.slug == post_id_or_slug).scalar_subquery()
+        
+        result = await session.execute(
+            select(
+                Post.id, Post.title, Post.slug, Post.excerpt, Post.auto_excerpt, Post.published_at,
+                RelatedPost.score
+            )
+            .join(RelatedPost, RelatedPost.related_post_id == Post.id)
+            .where(RelatedPost.post_id == source_id)
+            .order_by(RelatedPost.rank)
+            .limit(limit)
+        )
+        return [dict(row._mapping) for row in result.all()]
+    
+    async def get_hot_posts(self, session: AsyncSession, limit: int = 20) -> List[Post]:
+        """Get the hot feed: ranking is read from memory, posts are loaded by primary key"""
+        post_ids = hot_feed.top(limit)
+        if not post_ids:
+            return []
+        
+        result = await session.execute(
+            select(Post).options(
+                selectinload(Post.author),
+                selectinload(Post.tags)
+            ).where(Post.id.in_(post_ids))
+        )
+        posts = {post.id: post for post in result.scalars().all()}
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+post_service = PostService()
+
+
+class CommentService:
+    async def get_comments(
+        self,
+        session: AsyncSession,
+        post_id: UUID,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Comment], Optional[str]]:
+        """Get approved comments of a post, oldest first, using keyset pagination
+        
+        Returns (comments, next_cursor). Each page is an index range scan on
+        (post_id, created_at), so its cost does not depend on how deep it is.
+        """
+        query = (
+            select(Comment)
+            .options(joinedload(Comment.author))
+            .where(Comment.post_id == post_id, Comment.is_approved == True)
+            .order_by(Comment.created_at, Comment.id)
+            .limit(limit + 1)
+        )
+        
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                raise ValidationError("Invalid cursor")
+            created_at, comment_id = position
+            query = query.where(
+                or_(
+                    Comment.created_at > created_at,
+                    and_(Comment.created_at == created_at, Comment.id > comment_id)
+                )
+            )
+        
+        result = await session.execute(query)
+        comments = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(comments) > limit:
+            comments = comments[:limit]
+            next_cursor = encode_cursor(comments[-1].created_at, comments[-1].id)
+        
+        return comments, next_cursor
+    
+    async def get_comment_by_id(self, session: AsyncSession, comment_id: UUID) -> Optional[Comment]:
+        """Get comment by ID"""
+        result = await session.execute(
+            select(Comment).options(joinedload(Comment.author)).where(Comment.id == comment_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def create_comment(
+        self,
+        session: AsyncSession,
+        post: Post,
+        comment_data: CommentCreateRequest,
+        author: User
+    ) -> Comment:
+        """Create a comment and bump the post's comment counter in the same transaction"""
+        comment = Comment(
+            post_id=post.id,
+            author_id=author.id,
+            content=comment_data.content
+        )
+        session.add(comment)
+        
+        if comment.is_approved:
+            await session.execute(
+                update(Post)
+                .where(Post.id == post.id)
+                .values(comment_count=Post.comment_count + 1)
+                .execution_options(synchronize_session=False)
+            )
+        
+        await session.commit()
+        post_detail_cache.invalidate(post.id, post.slug)
+        if comment.is_approved:
+            hot_feed.record_comment(post.id, 1)
+        return await self.get_comment_by_id(session, comment.id)
+    
+    async def delete_comment(self, session: AsyncSession, comment_id: UUID, current_user: User) -> bool:
+        """Delete comment (comment author, post author or superuser)"""
+        comment = await self.get_comment_by_id(session, comment_id)
+        if not comment:
+            raise NotFoundError("Comment not found")
+        
+        post = await session.get(Post, comment.post_id)
+        if current_user.id not in (comment.author_id, post.author_id) and not current_user.is_superuser:
+            raise UnauthorizedError("Not enough permissions")
+        
+        await session.execute(delete(Comment).where(Comment.id == comment_id))
+        if comment.is_approved:
+            await session.execute(
+                update(Post)
+                .where(Post.id == comment.post_id)
+                .values(comment_count=Post.comment_count - 1)
+                .execution_options(synchronize_session=False)
+            )
         
-        post.view_count += 1
         await session.commit()
+        post_detail_cache.invalidate(post.id, post.slug)
+        if comment.is_approved:
+            hot_feed.record_comment(post.id, -1)
         return True
 
 
-post_service = PostService()
\ No newline at end of file
+comment_service = CommentService()
+
+
+class RevisionService:
+    async def _latest_revision(self, session: AsyncSession, post_id: UUID):
+        result = await session.execute(
+            select(
+                PostRevision.number, PostRevision.kind, PostRevision.base_number,
+                PostRevision.chain_length, PostRevision.title, PostRevision.content_hash
+            )
+            .where(PostRevision.post_id == post_id)
+            .order_by(PostRevision.number.desc())
+            .limit(1)
+        )
+        return result.first()
+    
+    async def record_revision(
+        self,
+        session: AsyncSession,
+        post: Post,
+        author_id: UUID,
+        previous: Optional[Tuple[str, str, datetime]] = None,
+        is_new: bool = False
+    ) -> Optional[PostRevision]:
+        """Append a revision for the post's current title and content (caller commits)
+        
+        Identical content becomes a reference to the earlier revision. Otherwise
+        a delta against the previous content is stored, unless the chain since
+        the last snapshot reached SNAPSHOT_INTERVAL or the delta is not much
+        smaller than a snapshot. previous is (title, content, modified_at)
+        before the change; posts that predate revision history get it stored
+        as their first snapshot.
+        """
+        latest = None if is_new else await self._latest_revision(session, post.id)
+        level = REVISION_SETTINGS["COMPRESSION_LEVEL"]
+        
+        if latest is None and previous is not None:
+            previous_title, previous_content, previous_modified = previous
+            session.add(PostRevision(
+                post_id=post.id,
+                number=1,
+                kind="snapshot",
+                title=previous_title,
+                payload=encode_snapshot(previous_content, level),
+                content_hash=revision_content_hash(previous_content),
+                content_length=len(previous_content),
+                author_id=post.author_id,
+                created_at=previous_modified
+            ))
+            await session.flush()
+            latest = await self._latest_revision(session, post.id)
+        
+        content_hash = revision_content_hash(post.content)
+        if latest is not None and latest.content_hash == content_hash and latest.title == post.title:
+            return None
+        
+        revision = PostRevision(
+            post_id=post.id,
+            number=latest.number + 1 if latest else 1,
+            kind="snapshot",
+            title=post.title,
+            payload=b"",
+            content_hash=content_hash,
+            content_length=len(post.content),
+            author_id=author_id
+        )
+        
+        identical = None
+        if latest is not None:
+            if latest.content_hash == content_hash:
+                identical = latest
+            else:
+                result = await session.execute(
+                    select(PostRevision.number, PostRevision.kind, PostRevision.base_number, PostRevision.chain_length)
+                    .where(PostRevision.post_id == post.id, PostRevision.content_hash == content_hash)
+                    .limit(1)
+                )
+                identical = result.first()
+        
+        if identical is not None:
+            revision.kind = "ref"
+            revision.base_number = identical.base_number if identical.kind == "ref" else identical.number
+            revision.chain_length = identical.chain_length
+        else:
+            revision.payload = encode_snapshot(post.content, level)
+            chain_length = latest.chain_length + 1 if latest is not None else 0
+            if latest is not None and previous is not None and chain_length < REVISION_SETTINGS["SNAPSHOT_INTERVAL"]:
+                delta = encode_delta(previous[1], post.content, level)
+                if len(delta) <= REVISION_SETTINGS["MAX_DELTA_RATIO"] * len(revision.payload):
+                    revision.kind = "delta"
+                    revision.base_number = latest.base_number if latest.kind == "ref" else latest.number
+                    revision.chain_length = chain_length
+                    revision.payload = delta
+        
+        session.add(revision)
+        return revision
+    
+    async def get_revisions(self, session: AsyncSession, post_id: UUID) -> List[dict]:
+        """Get revision metadata of a post, newest first"""
+        result = await session.execute(
+            select(
+                PostRevision.number, PostRevision.kind, PostRevision.base_number, PostRevision.title,
+                PostRevision.content_hash, PostRevision.content_length,
+                func.length(PostRevision.payload).label("stored_size"),
+                PostRevision.author_id, PostRevision.created_at
+            )
+            .where(PostRevision.post_id == post_id)
+            .order_by(PostRevision.number.desc())
+        )
+        return [dict(row._mapping) for row in result.all()]
+    
+    async def get_revision_content(self, session: AsyncSession, post_id: UUID, number: int) -> Optional[Tuple[PostRevision, str]]:
+        """Reconstruct a revision from its snapshot and at most SNAPSHOT_INTERVAL deltas (two queries)"""
+        result = await session.execute(
+            select(PostRevision.number, PostRevision.kind, PostRevision.base_number)
+            .where(PostRevision.post_id == post_id)
+        )
+        revisions = {row.number: row for row in result.all()}
+        if number not in revisions:
+            return None
+        
+        # Walk back to the snapshot: refs point at a stored revision, deltas at their base
+        chain = []
+        current = revisions[number].base_number if revisions[number].kind == "ref" else number
+        while revisions[current].kind == "delta":
+            chain.append(current)
+            current = revisions[current].base_number
+        chain.append(current)
+        
+        result = await session.execute(
+            select(PostRevision).where(PostRevision.post_id == post_id, PostRevision.number.in_(chain + [number]))
+        )
+        loaded = {revision.number: revision for revision in result.scalars().all()}
+        
+        content = decode_snapshot(loaded[chain[-1]].payload)
+        for delta_number in reversed(chain[:-1]):
+            content = apply_delta(content, loaded[delta_number].payload)
+        return loaded[number], content
+
+
+revision_service = RevisionService()
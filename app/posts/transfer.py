@@ -0,0 +1,160 @@
+from collections import defaultdict
+from typing import AsyncIterator, List, Optional, Tuple
+import json
+
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.posts.cache import post_count_cache, tag_list_cache
+from app.posts.constants import TRANSFER_SETTINGS
+from app.feeds.service import feed_service
+from app.posts.jobs import rebuild_hot_feed, rebuild_related_posts, load_duplicate_index
+from app.posts.models import Post, PostStatus, PostTagLink, Tag
+from app.posts.schemas import PostExportRecord, PostImportRecord, PostImportError, PostImportResponse
+from app.posts.service import post_service
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = TRANSFER_SETTINGS["MAX_LINE_BYTES"]
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into (line_number, line) pairs without buffering the whole body
+
+    Lines are yielded undecoded. A line longer than max_line_bytes is not
+    buffered: it is skipped up to its newline and yielded as None.
+    """
+    buffer = bytearray()
+    line_number = 0
+    overlong = False
+    async for chunk in chunks:
+        view = memoryview(chunk)
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            if not overlong:
+                buffer += view[start:end]
+                overlong = len(buffer) > max_line_bytes
+            if overlong:
+                yield line_number, None
+            elif buffer.strip():
+                yield line_number, bytes(buffer)
+            buffer.clear()
+            overlong = False
+            start = end + 1
+
+        if not overlong:
+            buffer += view[start:]
+            if len(buffer) > max_line_bytes:
+                overlong = True
+                buffer.clear()
+
+    if overlong:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, bytes(buffer)
+
+
+async def import_posts_ndjson(lines: AsyncIterator[Tuple[int, Optional[bytes]]], default_author: User) -> PostImportResponse:
+    """Import posts from NDJSON, one transaction per chunk
+
+    Invalid lines are reported and skipped. If a chunk fails to write, all
+    of its posts are reported as failed and the import continues.
+    """
+    chunk_size = TRANSFER_SETTINGS["IMPORT_CHUNK_SIZE"]
+    max_errors = TRANSFER_SETTINGS["MAX_REPORTED_ERRORS"]
+    report = PostImportResponse(created=0, failed=0)
+
+    def record_error(line: int, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < max_errors:
+            report.errors.append(PostImportError(line=line, error=error))
+
+    async with AsyncSessionLocal() as session:
+        async def flush(chunk: List[Tuple[int, PostImportRecord]]) -> None:
+            try:
+                created = await post_service.bulk_create_posts(
+                    session, [record for _, record in chunk], default_author
+                )
+                await session.commit()
+                report.created += len(created)
+            except SQLAlchemyError as e:
+                await session.rollback()
+                report.failed += len(chunk)
+                if len(report.errors) < max_errors:
+                    report.errors.append(PostImportError(
+                        line=chunk[0][0],
+                        error=f"Lines {chunk[0][0]}-{chunk[-1][0]} not imported: {e.__class__.__name__}"
+                    ))
+
+        chunk = []
+        async for line_number, line in lines:
+            if line is None:
+                record_error(line_number, f"Line is longer than {TRANSFER_SETTINGS['MAX_LINE_BYTES']} bytes")
+                continue
+            try:
+                chunk.append((line_number, PostImportRecord.model_validate(json.loads(line.decode("utf-8")))))
+            except UnicodeDecodeError as e:
+                record_error(line_number, f"Invalid UTF-8 at byte {e.start}")
+                continue
+            except json.JSONDecodeError as e:
+                record_error(line_number, f"Invalid JSON: {e.msg}")
+                continue
+            except PydanticValidationError as e:
+                record_error(line_number, "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ))
+                continue
+
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+
+        if chunk:
+            await flush(chunk)
+
+    if report.created:
+        post_count_cache.clear()
+        feed_service.invalidate_all()
+        tag_list_cache.invalidate()
+        await rebuild_hot_feed()
+        await load_duplicate_index()
+        await rebuild_related_posts()
+    return report
+
+
+async def export_posts_ndjson(status: Optional[PostStatus] = None) -> AsyncIterator[bytes]:
+    """Stream posts with their tag names as NDJSON
+
+    Rows come from a server-side cursor in EXPORT_BATCH_SIZE partitions and
+    tags are loaded per partition, so memory use does not grow with the
+    number of posts.
+    """
+    query = select(
+        Post.id, Post.title, Post.content, Post.excerpt, Post.slug, Post.status, Post.is_featured,
+        Post.author_id, Post.view_count, Post.created_at, Post.updated_at, Post.published_at
+    ).order_by(Post.created_at, Post.id)
+    if status:
+        query = query.where(Post.status == status)
+
+    batch_size = TRANSFER_SETTINGS["EXPORT_BATCH_SIZE"]
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            tag_result = await session.execute(
+                select(PostTagLink.post_id, Tag.name)
+                .join(Tag, Tag.id == PostTagLink.tag_id)
+                .where(PostTagLink.post_id.in_([row.id for row in rows]))
+            )
+            tag_names = defaultdict(list)
+            for post_id, name in tag_result.all():
+                tag_names[post_id].append(name)
+
+            yield "".join(
+                PostExportRecord(**row._mapping, tag_names=sorted(tag_names[row.id])).model_dump_json() + "\n"
+                for row in rows
+            ).encode()
@@ -1,8 +1,11 @@
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from datetime import datetime
 from html import escape, unescape
 from urllib.parse import quote, unquote
+from uuid import UUID
+import base64
 import hashlib
 
 from app.posts.constants import (
@@ -69,6 +72,11 @@ def generate_excerpt(content: str, max_length: int = None) -> str:
     # Remove extra whitespace
     text = re.sub(r'\s+', ' ', text).strip()
     
+    return _truncate_excerpt(text, max_length)
+
+
+def _truncate_excerpt(text: str, max_length: int) -> str:
+    """Truncate already-cleaned text to an excerpt on a word boundary"""
     # Truncate to max length
     if len(text) <= max_length:
         return text
@@ -83,36 +91,243 @@ def generate_excerpt(content: str, max_length: int = None) -> str:
     return truncated + "..."
 
 
+# Tokenizer patterns for sanitize_html; each is anchored at a known position
+# and its repeated parts are delimited by characters the neighbouring parts
+# cannot consume, so a failed match backtracks a bounded amount per token
+_TAG_NAME_RE = re.compile(r'[a-zA-Z][a-zA-Z0-9]*')
+# Fast path for well-formed start tags: whitespace-separated attributes with
+# quoted or non-empty unquoted values. Anything else (quotes inside names or
+# unquoted values, empty unquoted values, attributes not separated by
+# whitespace, unterminated tags) does not match and goes through
+# _parse_tag_attributes, which tokenizes those cases the same way
+_START_TAG_RE = re.compile(
+    r'<([a-zA-Z][a-zA-Z0-9]*)'
+    r'((?:\s+[^\s/>="\']+(?:\s*=\s*(?:"[^"]*"|\'[^\']*\'|[^\s>"\']+))?)*)'
+    r'\s*(/?)>'
+)
+_ATTRIBUTE_RE = re.compile(
+    r'\s+([^\s/>="\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>"\']+)))?'
+)
+_ATTR_NAME_RE = re.compile(r'[^\s/>=]+')
+_UNQUOTED_VALUE_RE = re.compile(r'[^\s>]*')
+_WHITESPACE_RE = re.compile(r'\s*')
+_SAFE_ATTR_NAME_RE = re.compile(r'^[a-z][a-z0-9_:.-]*$')
+_URL_IGNORED_CHARS_RE = re.compile(r'[\s\x00-\x1f]+')
+
+# Elements whose content the browser does not parse as markup
+_RAW_TEXT_TAGS = frozenset(['script', 'style'])
+_VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+])
+_URL_ATTRIBUTES = frozenset(['href', 'src', 'action', 'formaction', 'xlink:href'])
+_DANGEROUS_URL_SCHEMES = ('javascript:', 'vbscript:', 'data:')
+
+
+@lru_cache(maxsize=16)
+def _verbatim_run_pattern(allowed: frozenset, forbidden: frozenset) -> re.Pattern:
+    """Text and attribute-less, lower-case allowed tags: the sanitizer copies these unchanged"""
+    names = sorted(tag for tag in allowed - forbidden if _TAG_NAME_RE.fullmatch(tag))
+    if not names:
+        return re.compile(r'[^<]*')
+    # Always matches (possibly empty), so the greedy first attempt is never backtracked
+    return re.compile(r'(?:[^<]+|</?(?:%s)>)*' % '|'.join(map(re.escape, names)))
+
+
+def _parse_tag_attributes(content: str, pos: int) -> tuple[list, int, bool]:
+    """Parse attributes starting after a tag name
+    
+    Returns (attributes, position after '>', self_closing). Position is -1 if the
+    tag is never closed.
+    """
+    attributes = []
+    self_closing = False
+    length = len(content)
+    
+    while True:
+        char = content[pos:pos + 1]
+        if char.isspace():
+            pos = _WHITESPACE_RE.match(content, pos).end()
+            char = content[pos:pos + 1]
+        if not char:
+            return attributes, -1, False
+        
+        if char == '>':
+            return attributes, pos + 1, self_closing
+        if char == '/':
+            self_closing = True
+            pos += 1
+            continue
+        
+        self_closing = False
+        name_match = _ATTR_NAME_RE.match(content, pos)
+        if not name_match:
+            pos += 1  # Stray '=' where a name should be
+            continue
+        name = name_match.group().lower()
+        pos = _WHITESPACE_RE.match(content, name_match.end()).end()
+        
+        value = None
+        if pos < length and content[pos] == '=':
+            pos = _WHITESPACE_RE.match(content, pos + 1).end()
+            if pos < length and content[pos] in '"\'':
+                end = content.find(content[pos], pos + 1)
+                if end < 0:
+                    return attributes, -1, False
+                value = content[pos + 1:end]
+                pos = end + 1
+            else:
+                value_match = _UNQUOTED_VALUE_RE.match(content, pos)
+                value = value_match.group()
+                pos = value_match.end()
+        
+        attributes.append((name, value))
+
+
+def _render_start_tag(name: str, attributes: list, self_closing: bool) -> str:
+    """Render an allowed start tag, dropping event handlers and script URLs"""
+    parts = [name]
+    
+    for attr_name, value in attributes:
+        if attr_name.startswith('on') or not _SAFE_ATTR_NAME_RE.match(attr_name):
+            continue
+        
+        if value is None:
+            parts.append(attr_name)
+            continue
+        
+        value = unescape(value)
+        if attr_name in _URL_ATTRIBUTES:
+            scheme = _URL_IGNORED_CHARS_RE.sub('', value).lower()
+            if scheme.startswith(_DANGEROUS_URL_SCHEMES):
+                continue
+        
+        parts.append(f'{attr_name}="{escape(value, quote=True)}"')
+    
+    return f"<{' '.join(parts)}{' /' if self_closing else ''}>"
+
+
 def sanitize_html(content: str, allowed_tags: List[str] = None) -> str:
-    """Sanitize HTML content by removing dangerous tags"""
+    """Sanitize HTML content by removing dangerous tags
+    
+    Walks the input once: allowed tags are re-emitted with event handler
+    attributes and script URLs removed, forbidden tags are dropped together with
+    their content, and any other markup is dropped while its text is kept.
+    Runs in linear time regardless of how malformed the input is.
+    """
     if not content:
         return content
     
     if allowed_tags is None:
         allowed_tags = CONTENT_SETTINGS["ALLOWED_HTML_TAGS"]
     
-    forbidden_tags = CONTENT_SETTINGS["FORBIDDEN_HTML_TAGS"]
-    
-    # Remove forbidden tags and their content
-    for tag in forbidden_tags:
-        pattern = f'<{tag}[^>]*>.*?</{tag}>'
-        content = re.sub(pattern, '', content, flags=re.IGNORECASE | re.DOTALL)
+    allowed = frozenset(tag.lower() for tag in allowed_tags)
+    forbidden = frozenset(tag.lower() for tag in CONTENT_SETTINGS["FORBIDDEN_HTML_TAGS"]) | _RAW_TEXT_TAGS
+    verbatim_run = _verbatim_run_pattern(allowed, forbidden)
+    lowered = None
+    length = len(content)
+    output = []
+    skip_depth = 0  # Nesting depth inside forbidden elements
+    pos = 0
+    
+    while pos < length:
+        if not skip_depth:
+            # Copy text and plain allowed tags in one C-level scan
+            run_end = verbatim_run.match(content, pos).end()
+            if run_end > pos:
+                output.append(content[pos:run_end])
+                pos = run_end
+                if pos >= length:
+                    break
         
-        # Also remove self-closing versions
-        pattern = f'<{tag}[^>]*/>'
-        content = re.sub(pattern, '', content, flags=re.IGNORECASE)
-    
-    # Remove any remaining script/style content
-    content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
-    content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.IGNORECASE | re.DOTALL)
-    
-    # Remove dangerous attributes
-    dangerous_attrs = ['onclick', 'onload', 'onerror', 'onmouseover', 'onfocus', 'onblur']
-    for attr in dangerous_attrs:
-        pattern = f'{attr}\s*=\s*["\'][^"\'>]*["\']'
-        content = re.sub(pattern, '', content, flags=re.IGNORECASE)
+        lt = content.find('<', pos)
+        if lt < 0:
+            if not skip_depth:
+                output.append(content[pos:])
+            break
+        
+        if lt > pos and not skip_depth:
+            output.append(content[pos:lt])
+        pos = lt
+        marker = content[pos + 1:pos + 2]
+        
+        # Comments, doctype and processing instructions are dropped
+        if marker == '!' and content.startswith('<!--', pos):
+            end = content.find('-->', pos + 4)
+            pos = length if end < 0 else end + 3
+            continue
+        
+        if marker == '!' or marker == '?':
+            end = content.find('>', pos + 2)
+            pos = length if end < 0 else end + 1
+            continue
+        
+        # End tag
+        if marker == '/':
+            name_match = _TAG_NAME_RE.match(content, pos + 2)
+            end = content.find('>', pos + 2)
+            pos = length if end < 0 else end + 1
+            if end < 0 or not name_match:
+                continue
+            
+            name = name_match.group().lower()
+            if name in forbidden:
+                skip_depth = max(0, skip_depth - 1)
+            elif name in allowed and not skip_depth:
+                output.append(f'</{name}>')
+            continue
+        
+        # Start tag
+        tag_match = _START_TAG_RE.match(content, pos)
+        if tag_match:
+            name = tag_match.group(1).lower()
+            attribute_text = tag_match.group(2)
+            self_closing = bool(tag_match.group(3))
+            pos = tag_match.end()
+            attributes = None
+        else:
+            name_match = _TAG_NAME_RE.match(content, pos + 1)
+            if not name_match:
+                if not skip_depth:
+                    output.append('&lt;')
+                pos += 1
+                continue
+            
+            name = name_match.group().lower()
+            if content.find('>', name_match.end()) < 0:
+                break  # Unterminated tag: drop the remainder
+            attributes, end, self_closing = _parse_tag_attributes(content, name_match.end())
+            if end < 0:
+                break  # Unterminated tag: drop the remainder
+            pos = end
+        
+        if name in _RAW_TEXT_TAGS:
+            # Script/style bodies are not markup; jump straight past the end tag
+            if lowered is None:
+                lowered = content.lower()
+            close = lowered.find(f'</{name}', pos)
+            close_end = content.find('>', close) if close >= 0 else -1
+            pos = length if close_end < 0 else close_end + 1
+            continue
+        
+        if name in forbidden:
+            if not self_closing and name not in _VOID_TAGS:
+                skip_depth += 1
+            continue
+        
+        if name in allowed and not skip_depth:
+            if attributes is None:
+                # Attributes are only split out for tags that are kept
+                attributes = [
+                    (match.group(1).lower(), match.group(match.lastindex) if match.lastindex > 1 else None)
+                    for match in _ATTRIBUTE_RE.finditer(attribute_text)
+                ]
+            if attributes or self_closing:
+                output.append(_render_start_tag(name, attributes, self_closing))
+            else:
+                output.append(f'<{name}>')
     
-    return content
+    return ''.join(output)
 
 
 def extract_text_from_html(html_content: str) -> str:
@@ -161,6 +376,24 @@ def generate_content_hash(content: str) -> str:
     return hashlib.md5(normalized.encode()).hexdigest()
 
 
+def compute_content_fields(content: str, words_per_minute: int = 200) -> dict:
+    """Derive plain text, word count, reading time, excerpt and hash from HTML content
+    
+    The HTML is stripped once and every other value is computed from that text,
+    so posts can store the results instead of re-parsing content on read.
+    """
+    text = extract_text_from_html(content)
+    word_count = len(text.split())
+    
+    return {
+        "plain_text": text,
+        "word_count": word_count,
+        "reading_time": max(1, round(word_count / words_per_minute)) if content else 0,
+        "auto_excerpt": _truncate_excerpt(text, CONTENT_SETTINGS["EXCERPT_AUTO_LENGTH"]),
+        "content_hash": generate_content_hash(content)
+    }
+
+
 def validate_tag_name(tag_name: str) -> bool:
     """Validate tag name format"""
     if not tag_name:
@@ -292,4 +525,20 @@ def is_recent_post(publish_date: datetime, days: int = 7) -> bool:
     now = datetime.utcnow()
     diff = now - publish_date
     
-    return diff.days <= days
\ No newline at end of file
+    return diff.days <= days
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, UUID]]:
+    """Decode a cursor produced by encode_cursor, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
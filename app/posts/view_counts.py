@@ -0,0 +1,55 @@
+from typing import Dict
+from uuid import UUID
+
+from sqlalchemy import bindparam, update
+
+from app.database import AsyncSessionLocal
+from app.posts.constants import VIEW_COUNT_SETTINGS
+from app.posts.feed import hot_feed
+from app.posts.models import Post
+
+
+class ViewCountBuffer:
+    """Count post views in memory and add them to posts.view_count once per interval
+
+    A view costs no database round trip; the counts gathered since the last
+    flush are written with one batched UPDATE. Views of a post deleted in
+    the meantime match no row and are dropped.
+    """
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: Dict[UUID, int] = {}
+
+    def record(self, post_id: UUID) -> None:
+        self._pending[post_id] = self._pending.get(post_id, 0) + 1
+        hot_feed.record_view(post_id)
+
+    def pending(self, post_id: UUID) -> int:
+        """Views of a post not written to the database yet"""
+        return self._pending.get(post_id, 0)
+
+    async def flush(self) -> int:
+        """Write the buffered views; returns the number of posts updated"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        table = Post.__table__
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('post_id'))
+                    .values(view_count=table.c.view_count + bindparam('views')),
+                    [{"post_id": post_id, "views": views} for post_id, views in pending.items()]
+                )
+                await session.commit()
+        except Exception:
+            # Keep the views for the next flush
+            for post_id, views in pending.items():
+                self._pending[post_id] = self._pending.get(post_id, 0) + views
+            raise
+        return len(pending)
+
+
+view_count_buffer = ViewCountBuffer(flush_interval=VIEW_COUNT_SETTINGS["FLUSH_INTERVAL_SECONDS"])
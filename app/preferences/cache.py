@@ -0,0 +1,9 @@
+from app.cache import TTLCache
+from app.preferences.constants import STATUS_CACHE_SETTINGS
+
+
+# PreferencesStatus per user id, rewritten on every preferences write
+preferences_status_cache = TTLCache(
+    ttl=STATUS_CACHE_SETTINGS["TTL"],
+    max_entries=STATUS_CACHE_SETTINGS["MAX_ENTRIES"]
+)
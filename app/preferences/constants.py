@@ -0,0 +1,67 @@
+# Preferences constants
+
+# Questions that must be answered for each questionnaire part to count as completed
+BASIC_REQUIRED_FIELDS = (
+    'gender', 'age', 'age_min', 'age_max', 'location',
+    'education', 'occupation', 'income', 'religion',
+    'smoking', 'drinking', 'exercise', 'relationship_type'
+)
+
+TEXT_REQUIRED_FIELDS = (
+    'communication_style', 'love_language', 'conflict_resolution',
+    'social_preference', 'travel_preference', 'food_preference',
+    'weekend_activity', 'financial_approach', 'future_goals'
+)
+
+# Derived from the answers on every write, never taken from the client
+COMPLETION_FLAGS = ('basic_completed', 'text_completed', 'all_completed')
+
+# Encoded from the answers on every write, never taken from the client
+ENCODED_FIELDS = ('feature_vector', 'feature_version', 'visual_vector')
+
+# Answers encoded into each row's packed feature vector (see app.preferences.encoding).
+# Bump VERSION whenever FIELDS change: vectors of older versions are re-encoded
+# by `python migrate.py encode-preferences` and skipped by the bulk loader until then.
+FEATURE_VECTOR_SETTINGS = {
+    "VERSION": 1,
+    "FIELDS": (
+        # (field, kind, vocabulary): category -> 1 byte code, number -> 1 byte value, multi -> bitmask bytes
+        ('gender', 'category', ('male', 'female')),
+        ('age', 'number', None),
+        ('age_min', 'number', None),
+        ('age_max', 'number', None),
+        ('education', 'category', ('smp', 'sma', 'sarjana', 'magister', 'doktoral')),
+        ('religion', 'category', ('islam', 'protestan', 'katolik', 'buddha', 'hindu', 'konghucu')),
+        ('smoking', 'category', ('yes', 'no')),
+        ('drinking', 'category', ('yes', 'no')),
+        ('exercise', 'number', None),
+        ('relationship_type', 'category', ('casual', 'serious')),
+        ('hobbies', 'multi', (
+            'reading', 'sports', 'music', 'cooking', 'traveling', 'gaming', 'photography',
+            'movies', 'art', 'gardening', 'dancing', 'writing', 'others'
+        )),
+        ('love_language', 'multi', (
+            'words_of_affirmation', 'quality_time', 'acts_of_service', 'receiving_gifts', 'physical_touch'
+        )),
+    ),
+    "LOAD_BATCH_SIZE": 10000,
+}
+
+# Visual test: each answer rates one image of the test set from MIN_SCORE to MAX_SCORE
+VISUAL_TEST_SETTINGS = {
+    "ITEM_COUNT": 24,
+    "MIN_SCORE": 1,
+    "MAX_SCORE": 5,
+    "FORMAT_VERSION": 1,  # First byte of the packed binary encoding
+}
+
+# Completion status served to login and navigation checks
+STATUS_CACHE_SETTINGS = {
+    "TTL": 600,  # 10 minutes
+    "MAX_ENTRIES": 50000
+}
+
+# Bulk import (python -m app.preferences.importer)
+IMPORT_SETTINGS = {
+    "CHUNK_SIZE": 20000
+}
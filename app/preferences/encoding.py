@@ -0,0 +1,232 @@
+import json
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import select, update, or_, cast, func, literal, LargeBinary
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.preferences.constants import FEATURE_VECTOR_SETTINGS, VISUAL_TEST_SETTINGS
+from app.preferences.models import UserPreferences, VisualTestResults
+from app.preferences.visual import encode_visual_vector
+
+
+def split_answers(value: Any) -> List[str]:
+    """Multi-choice answers stored as a JSON list or comma-separated string"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(item).strip().lower() for item in value]
+
+    value = str(value).strip()
+    if value.startswith('['):
+        try:
+            return [str(item).strip().lower() for item in json.loads(value)]
+        except ValueError:
+            pass
+    return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+
+class FeatureEncoder:
+    """Pack questionnaire answers into a fixed-width uint8 vector
+
+    Each category or number takes one byte: categories are coded 1..n in
+    vocabulary order (n + 1 for an unrecognised answer), numbers are
+    clipped to 1..255, and 0 means unanswered. Multi-choice answers are a
+    bitmask of ceil(n / 8) bytes. Every vector has `width` bytes, so a set
+    of them is one NumPy matrix, and each field owns a fixed byte range.
+    """
+    def __init__(self, fields: Sequence[Tuple[str, str, Optional[Sequence[str]]]], version: int):
+        self.fields = fields
+        self.version = version
+        self.columns: List[str] = []  # Field name of each byte
+        self.codes: Dict[str, Dict[str, int]] = {}  # Answer -> code per field
+        self.spans: List[Tuple[str, int, int]] = []  # (field, first byte, byte count)
+        for field, kind, vocabulary in fields:
+            size = (len(vocabulary) + 7) // 8 if kind == 'multi' else 1
+            self.spans.append((field, len(self.columns), size))
+            self.columns.extend([field] * size)
+            if vocabulary is not None:
+                self.codes[field] = {answer: code for code, answer in enumerate(vocabulary, start=1)}
+        self.width = len(self.columns)
+
+    def encode(self, preferences: Any) -> bytes:
+        """Encode a UserPreferences row (or any object with the same attributes)"""
+        vector = bytearray(self.width)
+        position = 0
+        for field, kind, vocabulary in self.fields:
+            value = getattr(preferences, field, None)
+            if kind == 'multi':
+                size = (len(vocabulary) + 7) // 8
+                mask = 0
+                for answer in split_answers(value):
+                    code = self.codes[field].get(answer)
+                    if code is not None:
+                        mask |= 1 << (code - 1)
+                vector[position:position + size] = mask.to_bytes(size, 'little')
+                position += size
+                continue
+
+            if value is not None:
+                if kind == 'category':
+                    codes = self.codes[field]
+                    vector[position] = codes.get(str(value).strip().lower(), len(codes) + 1)
+                else:
+                    try:
+                        vector[position] = min(max(int(value), 1), 255)
+                    except (TypeError, ValueError):
+                        pass
+            position += 1
+        return bytes(vector)
+
+    def splice(self, column, vector: bytes, written: Collection[str]):
+        """SQL for the stored vector in column with the byte ranges of the written fields taken from vector
+
+        Adjacent ranges are merged, so the expression alternates between
+        substrings of the stored value and literal bytes.
+        """
+        runs: List[Tuple[bool, int, int]] = []  # (from vector, first byte, byte count)
+        for field, start, size in self.spans:
+            from_vector = field in written
+            if runs and runs[-1][0] == from_vector:
+                runs[-1] = (from_vector, runs[-1][1], runs[-1][2] + size)
+            else:
+                runs.append((from_vector, start, size))
+
+        parts = [
+            literal(vector[start:start + size], LargeBinary) if from_vector else func.substr(column, start + 1, size)
+            for from_vector, start, size in runs
+        ]
+        expression = parts[0]
+        for part in parts[1:]:
+            expression = expression.concat(part)
+        # SQLite concatenates blobs as text
+        return cast(expression, LargeBinary)
+
+
+feature_encoder = FeatureEncoder(FEATURE_VECTOR_SETTINGS["FIELDS"], FEATURE_VECTOR_SETTINGS["VERSION"])
+
+
+async def _load_matrix(session: AsyncSession, column, width: int, *conditions) -> Tuple[List[UUID], np.ndarray]:
+    """Stream (user_id, packed bytes) pairs and join them into one (users x width) uint8 matrix"""
+    user_ids: List[UUID] = []
+    vectors: List[bytes] = []
+    result = await session.stream(
+        select(UserPreferences.user_id, column)
+        .where(column.is_not(None), *conditions)
+        .execution_options(yield_per=FEATURE_VECTOR_SETTINGS["LOAD_BATCH_SIZE"])
+    )
+    async for partition in result.partitions():
+        for user_id, vector in partition:
+            user_ids.append(user_id)
+            vectors.append(vector)
+
+    matrix = np.frombuffer(b"".join(vectors), dtype=np.uint8).reshape(len(vectors), width)
+    return user_ids, matrix
+
+
+async def load_feature_matrix(session: AsyncSession) -> Tuple[List[UUID], np.ndarray]:
+    """Load every current feature vector as a (users x width) uint8 matrix
+
+    Only the user id and packed bytes are selected, streamed in batches and
+    joined into one buffer, so no ORM objects are built. Rows encoded with
+    an older vocabulary are left out until re-encoded.
+    """
+    return await _load_matrix(
+        session, UserPreferences.feature_vector, feature_encoder.width,
+        UserPreferences.feature_version == feature_encoder.version
+    )
+
+
+async def load_visual_matrix(session: AsyncSession) -> Tuple[List[UUID], np.ndarray]:
+    """Load visual test scores as a (users x ITEM_COUNT) uint8 matrix, without touching the results JSON"""
+    return await _load_matrix(session, UserPreferences.visual_vector, VISUAL_TEST_SETTINGS["ITEM_COUNT"])
+
+
+async def reencode_feature_vectors(batch_size: int = 1000) -> int:
+    """Encode rows written before the current vocabulary version, in keyset-paginated batches"""
+    processed = 0
+    last_id = None
+    async with AsyncSessionLocal() as session:
+        while True:
+            query = (
+                select(UserPreferences)
+                .where(or_(
+                    UserPreferences.feature_version.is_(None),
+                    UserPreferences.feature_version != feature_encoder.version
+                ))
+                .order_by(UserPreferences.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(UserPreferences.id > last_id)
+
+            rows = (await session.execute(query)).scalars().all()
+            if not rows:
+                break
+
+            await session.execute(update(UserPreferences), [
+                {
+                    "id": row.id,
+                    "feature_vector": feature_encoder.encode(row),
+                    "feature_version": feature_encoder.version
+                }
+                for row in rows
+            ])
+            await session.commit()
+            session.expunge_all()
+
+            processed += len(rows)
+            last_id = rows[-1].id
+
+    return processed
+
+
+async def encode_visual_vectors(batch_size: int = 1000) -> int:
+    """Validate every stored visual result and (re)encode its visual_vector
+
+    Results that do not match VisualTestResults (written while the endpoint
+    took any JSON, or before it required an answer to every item) are
+    cleared, and the visual test is marked as not taken. This runs from
+    migrate.py, outside the server, so completion status the server has
+    cached catches up within the status cache TTL.
+    """
+    processed = 0
+    last_id = None
+    async with AsyncSessionLocal() as session:
+        while True:
+            query = (
+                select(UserPreferences.id, UserPreferences.visual_preferences)
+                .where(UserPreferences.visual_preferences.is_not(None))
+                .order_by(UserPreferences.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(UserPreferences.id > last_id)
+
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+
+            values = []
+            for row in rows:
+                try:
+                    results = VisualTestResults.model_validate(row.visual_preferences).model_dump()
+                except ValidationError:
+                    values.append({
+                        "id": row.id, "visual_preferences": None, "visual_vector": None,
+                        "visual_test_completed": False, "all_completed": False
+                    })
+                    continue
+                values.append({
+                    "id": row.id, "visual_preferences": results, "visual_vector": encode_visual_vector(results)
+                })
+            await session.execute(update(UserPreferences), values)
+            await session.commit()
+
+            processed += len(rows)
+            last_id = rows[-1].id
+
+    return processed
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Bulk import of user preferences from CSV or Parquet (survey exports, synthetic populations)
+
+Usage: python -m app.preferences.importer FILE [--chunk-size N]
+
+Rows are matched to existing users by a `user_id` (or `email`) column and
+upserted: an imported row replaces all of the user's questionnaire answers
+(columns missing from the file become unanswered); visual test results are kept.
+
+The import runs outside the server, so the server's cached completion status
+catches up within the status cache TTL and matching picks up the imported
+answers at its next periodic reload.
+"""
+
+import argparse
+import asyncio
+import typing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from uuid import UUID, uuid4
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, text, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal, dialect_insert, engine
+from app.preferences.constants import BASIC_REQUIRED_FIELDS, TEXT_REQUIRED_FIELDS, IMPORT_SETTINGS
+from app.preferences.encoding import feature_encoder
+from app.preferences.models import UserPreferences, UserPreferencesCreate
+
+# Answer columns and whether they hold integers, taken from the create schema
+# (visual results are nested JSON and are not imported from flat files)
+ANSWER_COLUMNS: Dict[str, bool] = {
+    name: int in typing.get_args(field.annotation)
+    for name, field in UserPreferencesCreate.model_fields.items()
+    if name != 'visual_preferences'
+}
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Read a CSV or Parquet file as DataFrames of at most chunk_size rows, all values as strings"""
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq  # Only needed for Parquet input
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas().astype(object)
+    else:
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+
+def normalize_chunk(frame: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """Validate and normalize answer columns column-wise; returns (valid rows, rejected count)
+
+    Blank values become NULL, encoded categorical answers are lower-cased and
+    integer columns are parsed. Rows with an unparseable integer are rejected.
+    """
+    frame = frame.rename(columns=lambda column: str(column).strip().lower())
+    columns = [column for column in frame.columns if column in ANSWER_COLUMNS or column in ('user_id', 'email')]
+    frame = frame[columns].apply(lambda column: column.astype("string").str.strip().replace("", pd.NA))
+
+    valid = pd.Series(True, index=frame.index)
+    for column, is_integer in ANSWER_COLUMNS.items():
+        if column not in frame:
+            continue
+        if is_integer:
+            numbers = pd.to_numeric(frame[column], errors='coerce')
+            valid &= frame[column].isna() | (numbers.notna() & (numbers == numbers.round()))
+            frame[column] = numbers.astype("Int64")
+        elif column in feature_encoder.codes:
+            frame[column] = frame[column].str.lower()
+
+    return frame[valid], int((~valid).sum())
+
+
+def encode_feature_frame(frame: pd.DataFrame) -> np.ndarray:
+    """Vectorized FeatureEncoder.encode over a normalized chunk: one uint8 row per answer row"""
+    matrix = np.zeros((len(frame), feature_encoder.width), dtype=np.uint8)
+    missing = pd.Series(pd.NA, index=frame.index, dtype="string")
+    position = 0
+    for field, kind, vocabulary in feature_encoder.fields:
+        column = frame[field] if field in frame else missing
+        if kind == 'multi':
+            size = (len(vocabulary) + 7) // 8
+            answers = (
+                column.str.lower()
+                .str.replace(r'[\[\]"]', '', regex=True)
+                .str.replace(r'\s*,\s*', ',', regex=True)
+                .str.strip()
+                .fillna('')
+                .str.get_dummies(sep=',')
+            )
+            mask = np.zeros(len(frame), dtype=np.int64)
+            for answer, code in feature_encoder.codes[field].items():
+                if answer in answers:
+                    mask |= answers[answer].to_numpy(dtype=np.int64) << (code - 1)
+            for offset in range(size):
+                matrix[:, position + offset] = (mask >> (8 * offset)) & 0xFF
+            position += size
+            continue
+
+        if kind == 'category':
+            codes = feature_encoder.codes[field]
+            values = column.astype("string").str.strip().str.lower().map(codes)
+            values = values.where(column.isna(), values.fillna(len(codes) + 1))
+        else:
+            values = pd.to_numeric(column, errors='coerce')
+            values = values.where(values == values.round()).clip(1, 255)
+        matrix[:, position] = values.fillna(0).to_numpy(dtype=np.float64).astype(np.uint8)
+        position += 1
+    return matrix
+
+
+def build_rows(frame: pd.DataFrame, user_ids: List[UUID]) -> pd.DataFrame:
+    """Add ids, completion flags and encoded vectors to normalized answers"""
+    now = datetime.utcnow()
+    rows = frame.reindex(columns=list(ANSWER_COLUMNS))
+    rows.insert(0, 'user_id', user_ids)
+    rows.insert(0, 'id', [uuid4() for _ in range(len(rows))])
+
+    answered = lambda fields: rows.reindex(columns=list(fields)).notna().all(axis=1)
+    rows['basic_completed'] = answered(BASIC_REQUIRED_FIELDS)
+    rows['text_completed'] = answered(TEXT_REQUIRED_FIELDS)
+    rows['visual_test_completed'] = False
+    rows['all_completed'] = False
+    rows['feature_vector'] = [vector.tobytes() for vector in encode_feature_frame(frame)]
+    rows['feature_version'] = feature_encoder.version
+    rows['created_at'] = now
+    return rows.astype(object).where(rows.notna(), None)
+
+
+async def resolve_user_ids(session: AsyncSession, frame: pd.DataFrame) -> Tuple[pd.DataFrame, List[UUID]]:
+    """Keep rows that belong to an existing user and return them with their user ids"""
+    if 'user_id' in frame:
+        parsed = {}
+        for key in frame['user_id'].dropna().unique():
+            try:
+                parsed[key] = UUID(key)
+            except ValueError:
+                continue
+        result = await session.execute(select(User.id).where(User.id.in_(list(parsed.values()))))
+        known = set(result.scalars())
+        user_ids = frame['user_id'].map(lambda key: parsed[key] if parsed.get(key) in known else None)
+    elif 'email' in frame:
+        keys = frame['email'].str.lower()
+        result = await session.execute(
+            select(User.email, User.id).where(User.email.in_(list(keys.dropna().unique())))
+        )
+        known = {email.lower(): user_id for email, user_id in result.all()}
+        user_ids = keys.map(known)
+    else:
+        raise ValueError("Input needs a user_id or email column")
+
+    found = user_ids.notna()
+    return frame[found], list(user_ids[found])
+
+
+# Written on insert only; all_completed on conflict also depends on the stored visual test
+_INSERT_ONLY_COLUMNS = ('id', 'user_id', 'created_at', 'visual_test_completed', 'all_completed')
+
+
+async def _copy_rows(session: AsyncSession, rows: pd.DataFrame) -> None:
+    """PostgreSQL: COPY into a temporary table, then upsert from it in one statement"""
+    columns = list(rows.columns)
+    column_list = ", ".join(columns)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column not in _INSERT_ONLY_COLUMNS)
+
+    await session.execute(text(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS user_preferences_import "
+        "(LIKE user_preferences INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        'user_preferences_import', records=rows.itertuples(index=False, name=None), columns=columns
+    )
+    await session.execute(text(
+        f"INSERT INTO user_preferences ({column_list}) "
+        f"SELECT {column_list} FROM user_preferences_import "
+        f"ON CONFLICT (user_id) DO UPDATE SET {updates}, updated_at = now(), "
+        f"all_completed = EXCLUDED.basic_completed AND EXCLUDED.text_completed AND user_preferences.visual_test_completed"
+    ))
+
+
+async def _insert_rows(session: AsyncSession, rows: pd.DataFrame) -> None:
+    """Other databases: one executemany upsert
+    
+    The Core table insert keeps every row in a single executemany (the ORM
+    bulk path would split rows by which values are NULL).
+    """
+    table = UserPreferences.__table__
+    statement = dialect_insert(session, table)
+    updates = {
+        column: statement.excluded[column]
+        for column in rows.columns if column not in _INSERT_ONLY_COLUMNS
+    }
+    all_completed = and_(statement.excluded.basic_completed, statement.excluded.text_completed, table.c.visual_test_completed)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={**updates, 'updated_at': datetime.utcnow(), 'all_completed': all_completed}
+    )
+    columns = list(rows.columns)
+    connection = await session.connection()
+    await connection.execute(statement, [dict(zip(columns, values)) for values in rows.itertuples(index=False, name=None)])
+
+
+async def import_preferences(path: Path, chunk_size: int = IMPORT_SETTINGS["CHUNK_SIZE"]) -> Dict[str, int]:
+    """Import a file chunk by chunk, committing once per chunk; returns row counts"""
+    counts = {"imported": 0, "rejected": 0, "unknown_users": 0}
+    async with AsyncSessionLocal() as session:
+        write_rows = _copy_rows if session.bind.dialect.name == "postgresql" else _insert_rows
+        for chunk in read_chunks(path, chunk_size):
+            frame, rejected = normalize_chunk(chunk)
+            matched, user_ids = await resolve_user_ids(session, frame)
+            counts["rejected"] += rejected
+            counts["unknown_users"] += len(frame) - len(matched)
+
+            # A user listed twice in one chunk keeps the last row
+            matched = matched.assign(_user_id=user_ids).drop_duplicates('_user_id', keep='last')
+            user_ids = list(matched.pop('_user_id'))
+            if user_ids:
+                await write_rows(session, build_rows(matched, user_ids))
+                await session.commit()
+            counts["imported"] += len(user_ids)
+
+    return counts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Import user preferences from CSV or Parquet")
+    parser.add_argument("path", type=Path, help="CSV or Parquet file with a user_id or email column")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_SETTINGS["CHUNK_SIZE"], help="Rows per chunk")
+    args = parser.parse_args()
+
+    print(f"🔄 Importing preferences from {args.path}...")
+    try:
+        counts = await import_preferences(args.path, args.chunk_size)
+        print(
+            f"✅ Imported {counts['imported']} rows "
+            f"({counts['rejected']} rejected, {counts['unknown_users']} without a matching user)"
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,20 +1,46 @@
 from sqlmodel import SQLModel, Field
-from typing import Optional
+from sqlmodel.sql.sqltypes import GUID
+from sqlalchemy import Column, ForeignKey, LargeBinary
+from pydantic import field_validator
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID, uuid4
 from enum import Enum
 
+from app.preferences.constants import VISUAL_TEST_SETTINGS
+from app.preferences.visual import VisualResultsType
+
 
 class GenderEnum(str, Enum):
     MALE = "male"
     FEMALE = "female"
 
 
+class VisualTestAnswer(SQLModel):
+    item_id: int = Field(ge=0, lt=VISUAL_TEST_SETTINGS["ITEM_COUNT"])
+    score: int = Field(ge=VISUAL_TEST_SETTINGS["MIN_SCORE"], le=VISUAL_TEST_SETTINGS["MAX_SCORE"])
+    response_ms: Optional[int] = Field(default=None, ge=0, lt=0xFFFF)
+
+
+class VisualTestResults(SQLModel):
+    # Every item answered exactly once (with the uniqueness check below)
+    answers: List[VisualTestAnswer] = Field(
+        min_length=VISUAL_TEST_SETTINGS["ITEM_COUNT"], max_length=VISUAL_TEST_SETTINGS["ITEM_COUNT"]
+    )
+    
+    @field_validator('answers')
+    @classmethod
+    def validate_unique_items(cls, answers):
+        if len({answer.item_id for answer in answers}) != len(answers):
+            raise ValueError('Each visual test item can only be answered once')
+        return answers
+
+
 class UserPreferences(SQLModel, table=True):
     __tablename__ = "user_preferences"
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    user_id: UUID = Field(foreign_key="users.id", unique=True)
+    user_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True))
     
     # Basic Info
     gender: Optional[str] = Field(default=None)
@@ -22,6 +48,7 @@ class UserPreferences(SQLModel, table=True):
     age_min: Optional[int] = Field(default=None)
     age_max: Optional[int] = Field(default=None)
     location: Optional[str] = Field(default=None)
+    same_location: Optional[str] = Field(default=None)
     
     # Lifestyle
     education: Optional[str] = Field(default=None)
@@ -56,13 +83,18 @@ class UserPreferences(SQLModel, table=True):
     
     # Visual Test Results
     visual_test_completed: bool = Field(default=False)
-    visual_preferences: Optional[str] = Field(default=None)  # JSON string
+    visual_preferences: Optional[dict] = Field(default=None, sa_column=Column(VisualResultsType, nullable=True))
+    visual_vector: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary, nullable=True))  # Score per test item
     
     # Completion Status
     basic_completed: bool = Field(default=False)
     text_completed: bool = Field(default=False)
     all_completed: bool = Field(default=False)
     
+    # Packed answers for bulk loading (app.preferences.encoding), rewritten on every write
+    feature_vector: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+    feature_version: Optional[int] = Field(default=None)
+    
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = Field(default=None)
 
@@ -74,6 +106,7 @@ class UserPreferencesCreate(SQLModel):
     age_min: Optional[int] = None
     age_max: Optional[int] = None
     location: Optional[str] = None
+    same_location: Optional[str] = None
     
     # Lifestyle
     education: Optional[str] = None
@@ -107,7 +140,7 @@ class UserPreferencesCreate(SQLModel):
     future_goals: Optional[str] = None
     
     # Visual Test
-    visual_preferences: Optional[str] = None
+    visual_preferences: Optional[VisualTestResults] = None
 
 
 class UserPreferencesRead(SQLModel):
@@ -120,6 +153,7 @@ class UserPreferencesRead(SQLModel):
     age_min: Optional[int] = None
     age_max: Optional[int] = None
     location: Optional[str] = None
+    same_location: Optional[str] = None
     
     # Lifestyle
     education: Optional[str] = None
@@ -154,7 +188,7 @@ class UserPreferencesRead(SQLModel):
     
     # Visual Test
     visual_test_completed: bool = False
-    visual_preferences: Optional[str] = None
+    visual_preferences: Optional[VisualTestResults] = None
     
     # Completion Status
     basic_completed: bool = False
@@ -172,6 +206,7 @@ class UserPreferencesUpdate(SQLModel):
     age_min: Optional[int] = None
     age_max: Optional[int] = None
     location: Optional[str] = None
+    same_location: Optional[str] = None
     
     # Lifestyle
     education: Optional[str] = None
@@ -205,10 +240,67 @@ class UserPreferencesUpdate(SQLModel):
     future_goals: Optional[str] = None
     
     # Visual Test
-    visual_preferences: Optional[str] = None
+    visual_preferences: Optional[VisualTestResults] = None
     visual_test_completed: Optional[bool] = None
     
     # Completion Status
     basic_completed: Optional[bool] = None
     text_completed: Optional[bool] = None
-    all_completed: Optional[bool] = None
\ No newline at end of file
+    all_completed: Optional[bool] = None
+
+
+class BasicPreferencesSection(SQLModel):
+    # Basic Info
+    gender: Optional[GenderEnum] = None
+    age: Optional[int] = Field(default=None, ge=18, le=99)
+    age_min: Optional[int] = Field(default=None, ge=18, le=99)
+    age_max: Optional[int] = Field(default=None, ge=18, le=99)
+    location: Optional[str] = None
+    same_location: Optional[str] = None
+    
+    # Lifestyle
+    education: Optional[str] = None
+    occupation: Optional[str] = None
+    income: Optional[str] = None
+    religion: Optional[str] = None
+    smoking: Optional[str] = None
+    drinking: Optional[str] = None
+    exercise: Optional[str] = None
+    
+    # Relationship Goals
+    relationship_type: Optional[str] = None
+    children: Optional[str] = None
+    pets: Optional[str] = None
+    
+    # Personality & Interests
+    personality_type: Optional[str] = None
+    hobbies: Optional[str] = None
+    music_taste: Optional[str] = None
+    movie_preference: Optional[str] = None
+
+
+class TextPreferencesSection(SQLModel):
+    communication_style: Optional[str] = None
+    love_language: Optional[str] = None
+    conflict_resolution: Optional[str] = None
+    social_preference: Optional[str] = None
+    travel_preference: Optional[str] = None
+    food_preference: Optional[str] = None
+    weekend_activity: Optional[str] = None
+    financial_approach: Optional[str] = None
+    future_goals: Optional[str] = None
+
+
+class PreferencesSubmission(SQLModel):
+    """Whole questionnaire in one request"""
+    basic: BasicPreferencesSection
+    text: TextPreferencesSection
+    visual: Optional[VisualTestResults] = None
+
+
+class PreferencesStatus(SQLModel):
+    has_preferences: bool = False
+    basic_completed: bool = False
+    text_completed: bool = False
+    visual_completed: bool = False
+    all_completed: bool = False
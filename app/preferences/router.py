@@ -3,13 +3,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
 from app.database import get_session
-from app.auth.dependencies import get_current_active_user
+from app.auth.dependencies import get_current_active_user, get_current_superuser
 from app.auth.models import User
 from app.preferences.models import (
     UserPreferencesRead,
     UserPreferencesCreate,
-    UserPreferencesUpdate
+    UserPreferencesUpdate,
+    VisualTestResults,
+    PreferencesSubmission
 )
+from app.preferences.cache import preferences_status_cache
 from app.preferences.service import preferences_service
 
 router = APIRouter()
@@ -36,6 +39,23 @@ async def get_preferences_status(
     }
 
 
+@router.get(
+    "/status/cache-stats",
+    response_model=dict,
+    summary="Get completion status cache statistics",
+    description="Get how many completion status checks were served from cache (superuser only)"
+)
+async def get_status_cache_stats(
+    current_user: Annotated[User, Depends(get_current_superuser)]
+):
+    """Get completion status cache statistics"""
+    return {
+        "message": "Status cache statistics retrieved successfully",
+        "data": {**preferences_status_cache.stats.snapshot(), "entries": len(preferences_status_cache)},
+        "success": True
+    }
+
+
 @router.get(
     "/",
     response_model=dict,
@@ -124,16 +144,13 @@ async def update_text_preferences(
     description="Update visual test preferences"
 )
 async def update_visual_preferences(
-    visual_data: dict,
+    visual_data: VisualTestResults,
     current_user: Annotated[User, Depends(get_current_active_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
     """Update visual test preferences"""
-    import json
-    visual_json = json.dumps(visual_data)
-    
     updated_preferences = await preferences_service.update_visual_preferences(
-        session, current_user.id, visual_json
+        session, current_user.id, visual_data
     )
     
     preferences_response = UserPreferencesRead.model_validate(updated_preferences)
@@ -144,6 +161,29 @@ async def update_visual_preferences(
     }
 
 
+@router.post(
+    "/submit",
+    response_model=dict,
+    status_code=status.HTTP_200_OK,
+    summary="Submit preferences",
+    description="Submit the whole questionnaire (basic, text and optionally visual answers) in one request"
+)
+async def submit_preferences(
+    submission: PreferencesSubmission,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    """Submit preferences"""
+    status_data = await preferences_service.submit_preferences(
+        session, current_user.id, submission
+    )
+    return {
+        "message": "Preferences submitted successfully",
+        "data": status_data,
+        "success": True
+    }
+
+
 @router.put(
     "/",
     response_model=dict,
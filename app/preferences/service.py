@@ -1,13 +1,26 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_, case
+from types import SimpleNamespace
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
+from datetime import datetime
 
 from app.preferences.models import (
     UserPreferences,
     UserPreferencesCreate,
-    UserPreferencesUpdate
+    UserPreferencesUpdate,
+    VisualTestResults,
+    PreferencesSubmission,
+    PreferencesStatus
 )
+from app.preferences.constants import (
+    BASIC_REQUIRED_FIELDS, TEXT_REQUIRED_FIELDS, COMPLETION_FLAGS, ENCODED_FIELDS, FEATURE_VECTOR_SETTINGS
+)
+from app.preferences.cache import preferences_status_cache
+from app.preferences.encoding import feature_encoder
+from app.preferences.visual import encode_visual_vector
+from app.matching.service import matching_service
+from app.database import dialect_insert
 from app.exceptions import NotFoundError
 
 
@@ -22,57 +35,82 @@ class PreferencesService:
     
     async def create_user_preferences(self, session: AsyncSession, user_id: UUID, preferences_data: UserPreferencesCreate) -> UserPreferences:
         """Create new user preferences"""
-        preferences = UserPreferences(
-            user_id=user_id,
-            **preferences_data.model_dump(exclude_unset=True)
-        )
-        
-        session.add(preferences)
-        await session.commit()
-        await session.refresh(preferences)
-        return preferences
+        return await self.upsert_user_preferences(session, user_id, preferences_data.model_dump(exclude_unset=True))
     
     async def update_user_preferences(self, session: AsyncSession, user_id: UUID, preferences_data: UserPreferencesUpdate) -> UserPreferences:
-        """Update existing user preferences"""
-        # Get existing preferences
-        existing_preferences = await self.get_user_preferences(session, user_id)
-        
-        if not existing_preferences:
-            # Create new if doesn't exist
-            create_data = UserPreferencesCreate(**preferences_data.model_dump(exclude_unset=True))
-            return await self.create_user_preferences(session, user_id, create_data)
+        """Update existing user preferences (created if missing)"""
+        return await self.upsert_user_preferences(session, user_id, preferences_data.model_dump(exclude_unset=True))
+    
+    async def upsert_user_preferences(self, session: AsyncSession, user_id: UUID, values: dict) -> UserPreferences:
+        """Write preference fields with one INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING
         
-        # Update existing
-        update_data = preferences_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(existing_preferences, field, value)
+        Only the given fields are written. Completion flags are computed in
+        the same statement: given values are checked here, the remaining
+        required fields against the existing row. The feature vector is
+        computed in the statement too: a new row (or one write covering every
+        encoded field) gets the full encoding, otherwise the byte ranges of
+        the written fields are spliced into the stored vector. Vectors of an
+        older version are left for `migrate.py encode-preferences`. Visual
+        results are decoded into visual_vector here, before the write.
+        """
+        values = {
+            field: value for field, value in values.items()
+            if field not in COMPLETION_FLAGS and field not in ENCODED_FIELDS
+        }
+        if values.get('visual_test_completed') is None:
+            values.pop('visual_test_completed', None)
+        if 'visual_preferences' in values:
+            values['visual_vector'] = encode_visual_vector(values['visual_preferences'])
         
-        # Check completion status
-        existing_preferences.basic_completed = self._check_basic_completion(existing_preferences)
-        existing_preferences.text_completed = self._check_text_completion(existing_preferences)
-        existing_preferences.all_completed = (
-            existing_preferences.basic_completed and 
-            existing_preferences.text_completed and 
-            existing_preferences.visual_test_completed
+        now = datetime.utcnow()
+        features = {
+            'feature_vector': feature_encoder.encode(SimpleNamespace(**values)),
+            'feature_version': feature_encoder.version
+        }
+        statement = dialect_insert(session, UserPreferences).values(
+            id=uuid4(),
+            user_id=user_id,
+            created_at=now,
+            **features,
+            **values,
+            **self._completion_values(values)
         )
+        columns = UserPreferences.__table__.c
+        updates = {**values, 'updated_at': now, **self._completion_values(values, columns)}
+        written = {field for field, _, _ in FEATURE_VECTOR_SETTINGS["FIELDS"] if field in values}
+        if len(written) == len(FEATURE_VECTOR_SETTINGS["FIELDS"]):
+            updates.update(features)
+        elif written:
+            current = and_(
+                columns.feature_version == feature_encoder.version, columns.feature_vector.is_not(None)
+            )
+            updates['feature_vector'] = case(
+                (current, feature_encoder.splice(columns.feature_vector, features['feature_vector'], written)),
+                else_=columns.feature_vector
+            )
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserPreferences.user_id],
+            set_=updates
+        ).returning(UserPreferences)
         
+        result = await session.execute(statement, execution_options={"populate_existing": True})
+        preferences = result.scalar_one()
         await session.commit()
-        await session.refresh(existing_preferences)
-        return existing_preferences
+        preferences_status_cache.set(user_id, self._completion_status(preferences))
+        matching_service.preferences_changed(preferences)
+        return preferences
     
     async def update_basic_preferences(self, session: AsyncSession, user_id: UUID, preferences_data: dict) -> UserPreferences:
         """Update basic preferences (Q1-13)"""
         update_data = UserPreferencesUpdate(**preferences_data)
-        update_data.basic_completed = True
         return await self.update_user_preferences(session, user_id, update_data)
     
     async def update_text_preferences(self, session: AsyncSession, user_id: UUID, preferences_data: dict) -> UserPreferences:
         """Update text preferences (Q14-22)"""
         update_data = UserPreferencesUpdate(**preferences_data)
-        update_data.text_completed = True
         return await self.update_user_preferences(session, user_id, update_data)
     
-    async def update_visual_preferences(self, session: AsyncSession, user_id: UUID, visual_data: str) -> UserPreferences:
+    async def update_visual_preferences(self, session: AsyncSession, user_id: UUID, visual_data: VisualTestResults) -> UserPreferences:
         """Update visual test preferences"""
         update_data = UserPreferencesUpdate(
             visual_preferences=visual_data,
@@ -80,52 +118,76 @@ class PreferencesService:
         )
         return await self.update_user_preferences(session, user_id, update_data)
     
-    def _check_basic_completion(self, preferences: UserPreferences) -> bool:
-        """Check if basic preferences (Q1-13) are completed"""
-        required_fields = [
-            'gender', 'age', 'age_min', 'age_max', 'location',
-            'education', 'occupation', 'income', 'religion',
-            'smoking', 'drinking', 'exercise', 'relationship_type'
-        ]
+    async def submit_preferences(self, session: AsyncSession, user_id: UUID, submission: PreferencesSubmission) -> PreferencesStatus:
+        """Write every questionnaire section in one upsert and return the completion status
         
-        for field in required_fields:
-            if getattr(preferences, field) is None:
-                return False
-        return True
+        Unanswered basic and text questions are stored as empty; stored visual
+        results are kept unless new ones are submitted.
+        """
+        values = {**submission.basic.model_dump(mode='json'), **submission.text.model_dump()}
+        if submission.visual is not None:
+            values.update(visual_preferences=submission.visual.model_dump(), visual_test_completed=True)
+        
+        preferences = await self.upsert_user_preferences(session, user_id, values)
+        return self._completion_status(preferences)
     
-    def _check_text_completion(self, preferences: UserPreferences) -> bool:
-        """Check if text preferences (Q14-22) are completed"""
-        required_fields = [
-            'communication_style', 'love_language', 'conflict_resolution',
-            'social_preference', 'travel_preference', 'food_preference',
-            'weekend_activity', 'financial_approach', 'future_goals'
-        ]
+    def _completion_values(self, values: dict, existing=None) -> dict:
+        """Completion flags after writing values
+        
+        existing is the table's columns when updating a row: fields not being
+        written are then checked in SQL. Flags that are already decided come
+        back as plain booleans.
+        """
+        basic = self._all_answered(BASIC_REQUIRED_FIELDS, values, existing)
+        text = self._all_answered(TEXT_REQUIRED_FIELDS, values, existing)
+        if 'visual_test_completed' in values:
+            visual = bool(values['visual_test_completed'])
+        else:
+            visual = False if existing is None else existing.visual_test_completed
+        
+        flags = [basic, text, visual]
+        if any(flag is False for flag in flags):
+            all_completed = False
+        elif all(flag is True for flag in flags):
+            all_completed = True
+        else:
+            all_completed = and_(*[flag for flag in flags if flag is not True])
         
-        for field in required_fields:
-            if getattr(preferences, field) is None:
+        return {'basic_completed': basic, 'text_completed': text, 'all_completed': all_completed}
+    
+    def _all_answered(self, fields, values: dict, existing=None):
+        """True/False if decided by the written values, else a SQL check of the existing row"""
+        pending = []
+        for field in fields:
+            if field in values:
+                if values[field] is None:
+                    return False
+            elif existing is None:
                 return False
-        return True
+            else:
+                pending.append(existing[field].is_not(None))
+        return and_(*pending) if pending else True
     
     async def check_preferences_completion(self, session: AsyncSession, user_id: UUID) -> dict:
-        """Check completion status of user preferences"""
-        preferences = await self.get_user_preferences(session, user_id)
-        
+        """Check completion status of user preferences (cached per user, refreshed on every write)"""
+        status = preferences_status_cache.get(user_id)
+        if status is None:
+            preferences = await self.get_user_preferences(session, user_id)
+            status = self._completion_status(preferences)
+            preferences_status_cache.set(user_id, status)
+        return status.model_dump()
+    
+    def _completion_status(self, preferences: Optional[UserPreferences]) -> PreferencesStatus:
         if not preferences:
-            return {
-                'has_preferences': False,
-                'basic_completed': False,
-                'text_completed': False,
-                'visual_completed': False,
-                'all_completed': False
-            }
+            return PreferencesStatus()
         
-        return {
-            'has_preferences': True,
-            'basic_completed': preferences.basic_completed,
-            'text_completed': preferences.text_completed,
-            'visual_completed': preferences.visual_test_completed,
-            'all_completed': preferences.all_completed
-        }
+        return PreferencesStatus(
+            has_preferences=True,
+            basic_completed=preferences.basic_completed,
+            text_completed=preferences.text_completed,
+            visual_completed=preferences.visual_test_completed,
+            all_completed=preferences.all_completed
+        )
 
 
 # Create service instance
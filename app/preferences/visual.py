@@ -0,0 +1,76 @@
+import json
+import struct
+from typing import Any, Optional
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+from app.preferences.constants import VISUAL_TEST_SETTINGS
+
+# item_id, score, response_ms (NO_RESPONSE_TIME when not measured)
+_ANSWER = struct.Struct("<HBH")
+NO_RESPONSE_TIME = 0xFFFF
+
+
+def pack_visual_results(results: dict) -> bytes:
+    """Compact binary form of visual test results: a format byte then 5 bytes per answer"""
+    parts = [bytes([VISUAL_TEST_SETTINGS["FORMAT_VERSION"]])]
+    for answer in results.get("answers", []):
+        response_ms = answer.get("response_ms")
+        parts.append(_ANSWER.pack(
+            answer["item_id"], answer["score"], NO_RESPONSE_TIME if response_ms is None else response_ms
+        ))
+    return b"".join(parts)
+
+
+def unpack_visual_results(payload: bytes) -> dict:
+    if payload[0] != VISUAL_TEST_SETTINGS["FORMAT_VERSION"]:
+        raise ValueError(f"Unknown visual results format {payload[0]}")
+
+    answers = []
+    for item_id, score, response_ms in _ANSWER.iter_unpack(payload[1:]):
+        answers.append({
+            "item_id": item_id,
+            "score": score,
+            "response_ms": None if response_ms == NO_RESPONSE_TIME else response_ms
+        })
+    return {"answers": answers}
+
+
+def encode_visual_vector(results: Optional[dict]) -> Optional[bytes]:
+    """One byte per test item holding its score (0 when unanswered)"""
+    if results is None:
+        return None
+
+    vector = bytearray(VISUAL_TEST_SETTINGS["ITEM_COUNT"])
+    for answer in results.get("answers", []):
+        vector[answer["item_id"]] = answer["score"]
+    return bytes(vector)
+
+
+class VisualResultsType(TypeDecorator):
+    """Visual test results as a dict: JSONB on PostgreSQL, packed binary elsewhere
+
+    Rows written before the column was typed hold a JSON string, which is
+    still read back.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value: Any, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        return pack_visual_results(value)
+
+    def process_result_value(self, value: Any, dialect):
+        if value is None or isinstance(value, dict):
+            return value
+        if isinstance(value, str):
+            return json.loads(value)
+        return unpack_visual_results(bytes(value))
@@ -0,0 +1,9 @@
+from app.cache import TTLCache
+from app.users.constants import COUNT_CACHE_SETTINGS
+
+
+# Totals for paginated user lists, keyed by normalized filter set
+user_count_cache = TTLCache(
+    ttl=COUNT_CACHE_SETTINGS["TTL"],
+    max_entries=COUNT_CACHE_SETTINGS["MAX_ENTRIES"]
+)
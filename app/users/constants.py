@@ -5,6 +5,13 @@ DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
 MIN_PAGE_SIZE = 1
 
+# Paginated list totals
+COUNT_CACHE_SETTINGS = {
+    "TTL": 30,
+    "MAX_ENTRIES": 100,
+    "ESTIMATE_THRESHOLD": 100000  # Use planner estimates for unfiltered lists above this size
+}
+
 # Profile field limits
 MAX_FIRST_NAME_LENGTH = 50
 MAX_LAST_NAME_LENGTH = 50
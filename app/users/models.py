@@ -3,6 +3,8 @@ from typing import Optional
 from datetime import datetime
 from uuid import UUID
 from sqlmodel import SQLModel, Field
+from sqlmodel.sql.sqltypes import GUID
+from sqlalchemy import Column, ForeignKey
 
 # Re-export User model from auth for consistency
 from app.auth.models import User, UserBase, UserCreate, UserRead, UserUpdate
@@ -12,7 +14,7 @@ class UserProfile(SQLModel, table=True):
     __tablename__ = "user_profiles"
     
     id: UUID = Field(primary_key=True)
-    user_id: UUID = Field(foreign_key="users.id", unique=True)
+    user_id: UUID = Field(sa_column=Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True))
     first_name: Optional[str] = Field(default=None, max_length=50)
     last_name: Optional[str] = Field(default=None, max_length=50)
     bio: Optional[str] = Field(default=None, max_length=500)
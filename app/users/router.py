@@ -47,7 +47,7 @@ async def get_users(
     is_active: Optional[bool] = Query(None, description="Filter by active status")
 ):
     """Get list of users with pagination"""
-    users, total = await user_service.get_users(
+    users, total, total_is_exact = await user_service.get_users(
         session=session,
         skip=pagination.skip,
         limit=pagination.limit,
@@ -59,6 +59,7 @@ async def get_users(
     return UsersListResponse(
         users=[UserListResponse.model_validate(user) for user in users],
         total=total,
+        total_is_exact=total_is_exact,
         page=pagination.page,
         size=pagination.size,
         pages=pages
@@ -116,13 +117,15 @@ async def update_user(
 async def delete_user(
     user_id: UUID,
     session: Annotated[AsyncSession, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_superuser)]
+    current_user: Annotated[User, Depends(get_current_superuser)],
+    hard: bool = Query(False, description="Remove the user and everything they own instead of deactivating")
 ):
-    """Delete user (soft delete)"""
+    """Delete user (soft delete unless hard is set)"""
     await user_service.delete_user(
         session=session,
         user_id=user_id,
-        current_user=current_user
+        current_user=current_user,
+        hard=hard
     )
     
     return MessageResponse(
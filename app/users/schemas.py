@@ -72,6 +72,7 @@ class UserWithProfileResponse(UserDetailResponse):
 class UsersListResponse(BaseModel):
     users: List[UserListResponse]
     total: int
+    total_is_exact: bool = True
     page: int
     size: int
     pages: int
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, delete, func
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
@@ -11,7 +11,17 @@ from app.users.schemas import (
     UserProfileRequest,
     PasswordChangeRequest
 )
+from app.users.cache import user_count_cache
+from app.users.constants import COUNT_CACHE_SETTINGS
 from app.auth.service import auth_service
+from app.posts.cache import post_detail_cache
+from app.posts.models import Comment, Post, PostStatus, PostTagLink
+from app.posts.service import post_service
+from app.posts.jobs import reconcile_tag_counts, reconcile_comment_counts
+from app.feeds.service import feed_service
+from app.preferences.cache import preferences_status_cache
+from app.matching.service import matching_service
+from app.database import count_with_cache
 from app.exceptions import NotFoundError, ConflictError, UnauthorizedError
 
 
@@ -27,8 +37,11 @@ class UserService:
         skip: int = 0,
         limit: int = 100,
         is_active: Optional[bool] = None
-    ) -> tuple[List[User], int]:
-        """Get list of users with pagination"""
+    ) -> tuple[List[User], int, bool]:
+        """Get list of users with pagination
+        
+        Returns (users, total, total_is_exact).
+        """
         query = select(User)
         
         if is_active is not None:
@@ -39,15 +52,18 @@ class UserService:
         if is_active is not None:
             count_query = count_query.where(User.is_active == is_active)
         
-        total_result = await session.execute(count_query)
-        total = total_result.scalar()
+        total, total_is_exact = await count_with_cache(
+            session, user_count_cache, is_active, count_query,
+            estimate_table=User.__tablename__ if is_active is None else None,
+            estimate_threshold=COUNT_CACHE_SETTINGS["ESTIMATE_THRESHOLD"]
+        )
         
         # Get users with pagination
         query = query.offset(skip).limit(limit).order_by(User.created_at.desc())
         result = await session.execute(query)
         users = result.scalars().all()
         
-        return list(users), total
+        return list(users), total, total_is_exact
     
     async def update_user(
         self,
@@ -81,6 +97,13 @@ class UserService:
             
             await session.commit()
             await session.refresh(user)
+            if 'is_active' in update_data:
+                user_count_cache.clear()
+                if user.is_active:
+                    # Reactivated users are picked up by reloading the candidates
+                    matching_service.invalidate()
+                else:
+                    matching_service.user_removed(user.id)
         
         return user
     
@@ -88,23 +111,68 @@ class UserService:
         self,
         session: AsyncSession,
         user_id: UUID,
-        current_user: User
+        current_user: User,
+        hard: bool = False
     ) -> bool:
-        """Delete user (soft delete by setting is_active to False)"""
+        """Delete user (soft delete by setting is_active to False, or remove the row when hard is set)"""
+        # Check permissions (only superuser can delete users)
+        if not current_user.is_superuser:
+            raise UnauthorizedError("Not enough permissions")
+        
+        if hard:
+            return await self._hard_delete_user(session, user_id)
+        
         # Check if user exists
         user = await self.get_user_by_id(session, user_id)
         if not user:
             raise NotFoundError("User not found")
         
-        # Check permissions (only superuser can delete users)
-        if not current_user.is_superuser:
-            raise UnauthorizedError("Not enough permissions")
-        
         # Soft delete
         user.is_active = False
         user.updated_at = datetime.utcnow()
         
         await session.commit()
+        user_count_cache.clear()
+        matching_service.user_removed(user_id)
+        return True
+    
+    async def _hard_delete_user(self, session: AsyncSession, user_id: UUID) -> bool:
+        """Delete the user row; profile, preferences, posts and comments follow by ON DELETE CASCADE
+
+        Counters are recounted afterwards only for the tags of the user's
+        published posts and the other posts the user left approved comments on.
+        """
+        post_ids = (await session.execute(select(Post.id).where(Post.author_id == user_id))).scalars().all()
+        tag_ids = (await session.execute(
+            select(PostTagLink.tag_id).distinct()
+            .join(Post, Post.id == PostTagLink.post_id)
+            .where(Post.author_id == user_id, Post.status == PostStatus.PUBLISHED)
+        )).scalars().all()
+        commented_post_ids = (await session.execute(
+            select(Comment.post_id).distinct()
+            .join(Post, Post.id == Comment.post_id)
+            .where(Comment.author_id == user_id, Comment.is_approved == True, Post.author_id != user_id)
+        )).scalars().all()
+        result = await session.execute(
+            delete(User).where(User.id == user_id).execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            raise NotFoundError("User not found")
+        await session.commit()
+        user_count_cache.clear()
+        preferences_status_cache.invalidate(user_id)
+        matching_service.user_removed(user_id)
+        
+        if post_ids:
+            post_service.forget_deleted_posts(post_ids)
+            feed_service.invalidate_all()
+        if tag_ids:
+            await reconcile_tag_counts(list(tag_ids))
+        # Comments the user left on other posts are gone too
+        if commented_post_ids:
+            await reconcile_comment_counts(list(commented_post_ids))
+            for post_id in commented_post_ids:
+                post_detail_cache.invalidate(post_id)
         return True
     
     async def change_password(
@@ -161,6 +229,7 @@ class UserService:
         session.add(profile)
         await session.commit()
         await session.refresh(profile)
+        matching_service.profile_changed(profile)
         return profile
     
     async def update_user_profile(
@@ -189,6 +258,8 @@ class UserService:
             
             await session.commit()
             await session.refresh(profile)
+            if 'location' in update_data:
+                matching_service.profile_changed(profile)
         
         return profile
     
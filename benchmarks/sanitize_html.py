@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark sanitize_html against the previous regex-based implementation
+
+Usage: python -m benchmarks.sanitize_html
+"""
+
+import re
+import timeit
+
+from app.posts.constants import CONTENT_SETTINGS
+from app.posts.utils import sanitize_html
+
+
+def legacy_sanitize_html(content: str) -> str:
+    """Previous implementation: one regex substitution pass per tag/attribute"""
+    if not content:
+        return content
+
+    for tag in CONTENT_SETTINGS["FORBIDDEN_HTML_TAGS"]:
+        content = re.sub(f'<{tag}[^>]*>.*?</{tag}>', '', content, flags=re.IGNORECASE | re.DOTALL)
+        content = re.sub(f'<{tag}[^>]*/>', '', content, flags=re.IGNORECASE)
+
+    content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
+    content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.IGNORECASE | re.DOTALL)
+
+    for attr in ['onclick', 'onload', 'onerror', 'onmouseover', 'onfocus', 'onblur']:
+        content = re.sub(f'{attr}\\s*=\\s*["\'][^"\'>]*["\']', '', content, flags=re.IGNORECASE)
+
+    return content
+
+
+def _article(size: int) -> str:
+    """Realistic post body of roughly `size` bytes"""
+    block = (
+        '<h2>Section</h2><p>Some <strong>bold</strong> and <em>italic</em> text with '
+        '<a href="https://example.com/page?x=1&amp;y=2" onclick="track()">a link</a>.</p>'
+        '<ul><li>One</li><li>Two</li></ul><img src="/static/img/a.png" onerror="x()">'
+        '<script>alert(1)</script><blockquote>Quoted words</blockquote>\n'
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+
+INPUTS = {
+    "1 KB article": _article(1024),
+    "50 KB article": _article(50 * 1024),
+    "adversarial: unclosed <script> x 2000": "<script>" * 2000,
+    "adversarial: unclosed <iframe x 2000": "<iframe " * 2000,
+    "adversarial: dangling onclick quotes x 5000": '<p onclick="' * 5000,
+    "adversarial: '<a ' x 20000": "<a " * 20000,
+}
+
+
+def main():
+    print(f"{'input':45} {'legacy (ms)':>12} {'tokenizer (ms)':>15}")
+    for label, content in INPUTS.items():
+        runs = 3
+        legacy = min(timeit.repeat(lambda: legacy_sanitize_html(content), number=1, repeat=runs))
+        current = min(timeit.repeat(lambda: sanitize_html(content), number=1, repeat=runs))
+        print(f"{label:45} {legacy * 1000:12.2f} {current * 1000:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Database migration script for PostgreSQL setup
 import asyncio
 import sys
 from sqlmodel import SQLModel
+from sqlalchemy import text
 from app.database import engine
 from app.config import settings
 
@@ -13,6 +14,44 @@ from app.config import settings
 from app.auth.models import User
 from app.posts.models import Post
 from app.users.models import UserProfile
+from app.preferences.models import UserPreferences
+
+
+# Columns added to existing tables after they were first created (create_all does not alter tables)
+ADDED_COLUMNS = {
+    "posts": (
+        "plain_text VARCHAR",
+        "word_count INTEGER NOT NULL DEFAULT 0",
+        "reading_time INTEGER NOT NULL DEFAULT 0",
+        "auto_excerpt VARCHAR(500)",
+        "content_hash VARCHAR(32)",
+        "comment_count INTEGER NOT NULL DEFAULT 0",
+        "version INTEGER NOT NULL DEFAULT 1"
+    ),
+    "tags": (
+        "post_count INTEGER NOT NULL DEFAULT 0",
+    ),
+    "user_preferences": (
+        "feature_vector BYTEA",
+        "feature_version INTEGER",
+        "visual_vector BYTEA",
+        "same_location VARCHAR"
+    )
+}
+
+
+async def add_columns(conn, table: str, columns) -> None:
+    """Add missing columns to an existing table (PostgreSQL or SQLite)"""
+    if engine.dialect.name == "postgresql":
+        await conn.execute(text(
+            f"ALTER TABLE {table} " + ", ".join(f"ADD COLUMN IF NOT EXISTS {column}" for column in columns)
+        ))
+    elif engine.dialect.name == "sqlite":
+        # SQLite has no IF NOT EXISTS for columns and adds one column per statement
+        existing = {row[1] for row in (await conn.execute(text(f"PRAGMA table_info({table})"))).all()}
+        for column in columns:
+            if column.split()[0] not in existing:
+                await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column}"))
 
 
 async def create_tables():
@@ -56,6 +95,134 @@ async def drop_tables():
         await engine.dispose()
 
 
+async def backfill_posts():
+    """Add columns introduced since the posts tables were created and fill in derived fields and counters"""
+    from app.posts.jobs import backfill_content_fields, reconcile_tag_counts, reconcile_comment_counts
+    
+    print("🔄 Backfilling derived post content fields...")
+    
+    try:
+        async with engine.begin() as conn:
+            for table, columns in ADDED_COLUMNS.items():
+                await add_columns(conn, table, columns)
+        
+        processed = await backfill_content_fields()
+        print(f"✅ Backfilled {processed} posts!")
+        
+        tags = await reconcile_tag_counts()
+        print(f"✅ Recounted posts of {tags} tags!")
+        
+        posts = await reconcile_comment_counts()
+        print(f"✅ Recounted comments of {posts} posts!")
+        
+    except Exception as e:
+        print(f"❌ Error backfilling posts: {e}")
+        sys.exit(1)
+    
+    finally:
+        await engine.dispose()
+
+
+async def cluster_duplicates():
+    """Sign existing posts and group near-duplicates into clusters"""
+    from app.posts.jobs import load_duplicate_index, cluster_duplicate_posts
+    
+    print("🔄 Clustering near-duplicate posts...")
+    
+    try:
+        await load_duplicate_index()
+        clusters = await cluster_duplicate_posts()
+        print(f"✅ Found {clusters} near-duplicate clusters!")
+        
+    except Exception as e:
+        print(f"❌ Error clustering posts: {e}")
+        sys.exit(1)
+    
+    finally:
+        await engine.dispose()
+
+
+async def add_cascades():
+    """Recreate foreign keys of existing tables with their ON DELETE rules and add missing indexes (PostgreSQL)"""
+    print("🔄 Updating foreign keys and indexes...")
+    
+    try:
+        async with engine.begin() as conn:
+            for table in SQLModel.metadata.sorted_tables:
+                for foreign_key in table.foreign_keys:
+                    if foreign_key.ondelete is None:
+                        continue
+                    
+                    column = foreign_key.parent.name
+                    name = f"{table.name}_{column}_fkey"
+                    await conn.execute(text(
+                        f'ALTER TABLE {table.name} DROP CONSTRAINT IF EXISTS "{name}", '
+                        f'ADD CONSTRAINT "{name}" FOREIGN KEY ({column}) '
+                        f'REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name}) '
+                        f'ON DELETE {foreign_key.ondelete}'
+                    ))
+                
+                # Cascades look up dependent rows by their foreign key columns
+                for index in table.indexes:
+                    await conn.run_sync(lambda sync_conn: index.create(sync_conn, checkfirst=True))
+        
+        print("✅ Foreign keys and indexes updated!")
+        
+    except Exception as e:
+        print(f"❌ Error updating foreign keys: {e}")
+        sys.exit(1)
+    
+    finally:
+        await engine.dispose()
+
+
+async def encode_preferences():
+    """Encode preference feature vectors written with an older (or no) vocabulary version"""
+    from app.preferences.encoding import reencode_feature_vectors
+    
+    print("🔄 Encoding preference feature vectors...")
+    
+    try:
+        async with engine.begin() as conn:
+            await add_columns(conn, "user_preferences", ADDED_COLUMNS["user_preferences"])
+        
+        processed = await reencode_feature_vectors()
+        print(f"✅ Encoded {processed} preference rows!")
+        
+    except Exception as e:
+        print(f"❌ Error encoding preferences: {e}")
+        sys.exit(1)
+    
+    finally:
+        await engine.dispose()
+
+
+async def convert_visual_results():
+    """Store visual test results as JSONB (PostgreSQL) and decode them into visual vectors"""
+    from app.preferences.encoding import encode_visual_vectors
+    
+    print("🔄 Converting visual test results...")
+    
+    try:
+        async with engine.begin() as conn:
+            await add_columns(conn, "user_preferences", ADDED_COLUMNS["user_preferences"])
+            if engine.dialect.name == "postgresql":
+                await conn.execute(text(
+                    "ALTER TABLE user_preferences "
+                    "ALTER COLUMN visual_preferences TYPE JSONB USING visual_preferences::jsonb"
+                ))
+        
+        processed = await encode_visual_vectors()
+        print(f"✅ Converted {processed} visual test results!")
+        
+    except Exception as e:
+        print(f"❌ Error converting visual test results: {e}")
+        sys.exit(1)
+    
+    finally:
+        await engine.dispose()
+
+
 async def reset_database():
     """Reset database by dropping and recreating all tables"""
     print("🔄 Resetting database...")
@@ -70,8 +237,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Database migration script")
     parser.add_argument(
         "action", 
-        choices=["create", "drop", "reset"], 
-        help="Action to perform: create, drop, or reset tables"
+        choices=["create", "drop", "reset", "backfill-posts", "cluster-duplicates", "add-cascades", "encode-preferences", "convert-visual-results"], 
+        help="Action to perform: create, drop, or reset tables, backfill-posts, cluster-duplicates, add-cascades, encode-preferences or convert-visual-results"
     )
     
     args = parser.parse_args()
@@ -81,4 +248,14 @@ if __name__ == "__main__":
     elif args.action == "drop":
         asyncio.run(drop_tables())
     elif args.action == "reset":
-        asyncio.run(reset_database())
\ No newline at end of file
+        asyncio.run(reset_database())
+    elif args.action == "backfill-posts":
+        asyncio.run(backfill_posts())
+    elif args.action == "cluster-duplicates":
+        asyncio.run(cluster_duplicates())
+    elif args.action == "add-cascades":
+        asyncio.run(add_cascades())
+    elif args.action == "encode-preferences":
+        asyncio.run(encode_preferences())
+    elif args.action == "convert-visual-results":
+        asyncio.run(convert_visual_results())
\ No newline at end of file
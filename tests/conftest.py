@@ -0,0 +1,30 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when app.database is first imported, so point them at a scratch database before any test module loads
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DEBUG"] = "False"
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine against the test database in a fresh event loop"""
+    from app.database import create_tables, engine
+    # Every table (and relationship target) must be registered, whichever test module runs alone
+    import app.auth.models  # noqa: F401
+    import app.posts.models  # noqa: F401
+    import app.preferences.models  # noqa: F401
+    import app.users.models  # noqa: F401
+
+    async def with_database(coroutine):
+        await create_tables()
+        try:
+            return await coroutine
+        finally:
+            # Pooled connections belong to this event loop
+            await engine.dispose()
+
+    return lambda coroutine: asyncio.run(with_database(coroutine))
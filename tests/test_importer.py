@@ -0,0 +1,164 @@
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.preferences.encoding import feature_encoder
+from app.preferences.importer import (
+    build_rows, encode_feature_frame, import_preferences, normalize_chunk, read_chunks
+)
+from app.preferences.models import UserPreferences
+from app.preferences.service import preferences_service
+
+BASIC = dict(
+    gender="female", age="25", age_min="22", age_max="30", location="Jakarta", education="sarjana",
+    occupation="dev", income="mid", religion="islam", smoking="no", drinking="no", exercise="3",
+    relationship_type="serious"
+)
+TEXT = dict(
+    communication_style="a", love_language="quality_time", conflict_resolution="c", social_preference="d",
+    travel_preference="e", food_preference="f", weekend_activity="g", financial_approach="h", future_goals="i"
+)
+
+
+def _frame(*rows):
+    return pd.DataFrame(list(rows), dtype=str).fillna("")
+
+
+def test_normalize_chunk_cleans_columns_and_values():
+    frame, rejected = normalize_chunk(pd.DataFrame({
+        " Email ": ["a@example.com"],
+        "Religion": [" ISLAM "],
+        "occupation": [" Software Engineer "],
+        "age": [" 25 "],
+        "location": ["  "],
+        "not_a_question": ["x"],
+    }, dtype=str))
+
+    assert rejected == 0
+    assert list(frame.columns) == ["email", "religion", "occupation", "age", "location"]
+    row = frame.iloc[0]
+    assert row["religion"] == "islam"  # Encoded answers are lower-cased
+    assert row["occupation"] == "Software Engineer"  # Free text keeps its case
+    assert row["age"] == 25
+    assert pd.isna(row["location"])
+
+
+def test_normalize_chunk_rejects_unparseable_integers():
+    frame, rejected = normalize_chunk(_frame(
+        {"user_id": "1", "age": "25"},
+        {"user_id": "2", "age": "25.0"},
+        {"user_id": "3", "age": ""},
+        {"user_id": "4", "age": "twenty"},
+        {"user_id": "5", "age": "25.5"},
+        {"user_id": "6", "age_min": "x"},
+    ))
+
+    assert rejected == 3
+    assert list(frame["user_id"]) == ["1", "2", "3"]
+    assert list(frame["age"].astype(object).where(frame["age"].notna(), None)) == [25, 25, None]
+
+
+def test_encoded_frame_matches_the_row_encoder():
+    rows = [
+        {**BASIC, **TEXT, "hobbies": "Music, gaming"},
+        {"gender": "MALE", "age": "300", "religion": "unknown faith", "hobbies": '["reading", "others"]'},
+        {"age": "0", "exercise": "5", "love_language": "quality_time,physical_touch,nonsense"},
+        {},
+    ]
+    frame, rejected = normalize_chunk(_frame(*rows))
+    assert rejected == 0
+
+    matrix = encode_feature_frame(frame)
+    for vector, row in zip(matrix, rows):
+        answers = {field: value.strip() or None for field, value in row.items()}
+        for field in ("age", "age_min", "age_max"):
+            if answers.get(field) is not None:
+                answers[field] = int(answers[field])
+        assert vector.tobytes() == feature_encoder.encode(SimpleNamespace(**answers))
+
+
+def test_build_rows_sets_completion_flags():
+    frame, _ = normalize_chunk(_frame({**BASIC, **TEXT}, dict(BASIC), {**BASIC, "age": ""}))
+    user_ids = [uuid4() for _ in range(3)]
+    rows = build_rows(frame, user_ids)
+
+    assert list(rows["user_id"]) == user_ids
+    assert list(rows["basic_completed"]) == [True, True, False]
+    assert list(rows["text_completed"]) == [True, False, False]
+    assert not rows["all_completed"].any()
+    assert rows.iloc[2]["age"] is None
+    assert rows.iloc[0]["hobbies"] is None  # Columns missing from the file become unanswered
+
+
+def test_read_chunks_splits_csv(tmp_path):
+    path = tmp_path / "preferences.csv"
+    pd.DataFrame({"email": [f"{i}@example.com" for i in range(5)], "age": ["", "1", "2", "3", "4"]}).to_csv(
+        path, index=False
+    )
+    chunks = list(read_chunks(path, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[0]["age"].tolist() == ["", "1"]  # Read as strings, blanks kept for normalize_chunk
+
+
+def test_read_chunks_splits_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "preferences.parquet"
+    pd.DataFrame({"email": [f"{i}@example.com" for i in range(5)], "age": [None, 1, 2, 3, 4]}).to_parquet(path)
+
+    assert [len(chunk) for chunk in read_chunks(path, chunk_size=2)] == [2, 2, 1]
+
+
+def test_import_upserts_by_email(run, tmp_path):
+    async def import_file():
+        async with AsyncSessionLocal() as session:
+            users = []
+            for _ in range(2):
+                user = User(
+                    email=f"{uuid4()}@example.com", hashed_password="x", first_name="A", last_name="B",
+                    date_of_birth=datetime(1995, 1, 1), gender="female"
+                )
+                session.add(user)
+                users.append(user)
+            await session.commit()
+            existing, new = users
+            await preferences_service.upsert_user_preferences(
+                session, existing.id, {"hobbies": "music", "visual_test_completed": True}
+            )
+            emails = [existing.email, new.email]
+            user_ids = [existing.id, new.id]
+
+        path = tmp_path / "preferences.csv"
+        pd.DataFrame([
+            {"email": emails[0].upper(), **BASIC, **TEXT},
+            {"email": emails[1], **BASIC, "age": "forty"},
+            {"email": "nobody@example.com", **BASIC},
+            {"email": emails[1], **BASIC, "religion": "Hindu"},
+        ]).to_csv(path, index=False)
+        counts = await import_preferences(path, chunk_size=3)
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(UserPreferences).where(UserPreferences.user_id.in_(user_ids))
+            )).scalars().all()
+            return counts, {row.user_id: row for row in rows}, user_ids
+
+    counts, rows, (existing, new) = run(import_file())
+    assert counts == {"imported": 2, "rejected": 1, "unknown_users": 1}
+
+    # The imported row replaces the answers, the visual test is kept
+    assert rows[existing].hobbies is None
+    assert rows[existing].visual_test_completed
+    assert (rows[existing].basic_completed, rows[existing].text_completed, rows[existing].all_completed) == (
+        True, True, True
+    )
+    assert rows[new].religion == "hindu"
+    assert (rows[new].basic_completed, rows[new].text_completed) == (True, False)
+    for row in rows.values():
+        assert row.feature_vector == feature_encoder.encode(row)
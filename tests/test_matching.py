@@ -0,0 +1,209 @@
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.matching.index import CandidateIndex
+from app.matching.scoring import CandidateMatrix
+from app.preferences.encoding import feature_encoder
+from app.preferences.visual import encode_visual_vector
+
+
+def _born(age: int) -> date:
+    # 1 January: the birthday has passed whatever today is
+    return date(date.today().year - age, 1, 1)
+
+
+class _Users:
+    """A candidate index with users added by name"""
+    def __init__(self, capacity: int = 8, merge_threshold: int = 512):
+        self.index = CandidateIndex(capacity=capacity, merge_threshold=merge_threshold)
+        self.ids = {}
+
+    def add(self, name, gender="female", age=30, location=None, same_location=False, age_min=None, age_max=None):
+        self.ids.setdefault(name, uuid4())
+        position = self.index.add_user(self.ids[name], gender, _born(age) if age else None)
+        self.index.set_profile_location(position, location)
+        self.index.set_preferences(position, None, same_location, age_min, age_max)
+        self.index.set_scored(position, True)
+        return position
+
+    def candidates(self, name):
+        positions = self.index.candidates(self.index.position(self.ids[name]))
+        names = {self.index.position(user_id): name for name, user_id in self.ids.items()}
+        return sorted(names[int(position)] for position in positions)
+
+
+def test_gender_is_matched_both_ways():
+    users = _Users()
+    users.add("man", gender="male")
+    users.add("woman", gender="female")
+    users.add("other", gender="other")
+    users.add("other2", gender="other")
+
+    assert users.candidates("man") == ["other", "other2", "woman"]
+    assert users.candidates("woman") == ["man", "other", "other2"]
+    assert users.candidates("other") == ["man", "woman"]
+
+
+def test_same_location_is_required_both_ways():
+    users = _Users()
+    users.add("strict", gender="male", location="Jakarta", same_location=True)
+    users.add("near", location="  JAKARTA ")
+    users.add("far", location="Bandung")
+    users.add("nowhere")
+
+    assert users.candidates("strict") == ["near"]
+    assert users.candidates("near") == ["strict"]
+    # Neither is in the strict user's location
+    assert users.candidates("far") == []
+    assert users.candidates("nowhere") == []
+
+
+def test_preferred_location_overrides_profile_location():
+    users = _Users()
+    strict = users.add("strict", gender="male", location="Jakarta", same_location=True)
+    users.add("candidate", location="Bandung")
+    assert users.candidates("strict") == []
+
+    users.index.set_preferences(strict, "bandung", True, None, None)
+    assert users.candidates("strict") == ["candidate"]
+
+
+def test_age_range_is_required_both_ways():
+    users = _Users()
+    users.add("picky", gender="male", age=28, age_min=25, age_max=30)
+    users.add("young", age=24)
+    users.add("lower", age=25)
+    users.add("upper", age=30)
+    users.add("old", age=31)
+    users.add("wants_older", age=27, age_min=35)
+    users.add("wants_younger", age=27, age_max=26)
+    users.add("unknown", age=None)
+
+    assert users.candidates("picky") == ["lower", "upper"]
+    # The picky user is outside their range
+    assert users.candidates("young") == []
+    assert "picky" not in users.candidates("wants_older")
+
+
+def test_unscored_users_are_not_candidates():
+    users = _Users()
+    users.add("man", gender="male")
+    woman = users.add("woman")
+    users.index.set_scored(woman, False)
+
+    assert users.candidates("man") == []
+
+
+def test_removed_position_is_reused():
+    users = _Users(capacity=8)
+    users.add("man", gender="male")
+    removed = users.add("removed", location="Jakarta", same_location=True, age_min=50)
+    users.index.remove(users.ids.pop("removed"))
+    assert users.candidates("man") == []
+
+    # The new user inherits no constraints from the position's previous owner
+    assert users.add("new") == removed
+    assert users.candidates("man") == ["new"]
+    assert users.candidates("new") == ["man"]
+    assert len(users.index) == 2
+
+
+def test_index_grows_past_capacity():
+    users = _Users(capacity=8)
+    for i in range(20):
+        users.add(f"woman{i}", location="Jakarta")
+    users.add("man", gender="male", location="Jakarta", same_location=True, age_min=18, age_max=40)
+
+    assert users.index.capacity >= 21
+    assert len(users.candidates("man")) == 20
+
+
+@pytest.mark.parametrize("merge_threshold", [0, 3, 512])
+def test_birth_range_before_and_after_merge(merge_threshold):
+    users = _Users(capacity=16, merge_threshold=merge_threshold)
+    ages = {f"woman{age}": age for age in range(20, 40)}
+    for name, age in ages.items():
+        users.add(name, age=age)
+    picky = users.add("picky", gender="male", age=30, age_min=25, age_max=29)
+    expected = sorted(name for name, age in ages.items() if 25 <= age <= 29)
+    assert users.candidates("picky") == expected
+
+    # Changed birth dates are seen whether or not the sorted array has been rebuilt
+    users.add("woman20", age=26)
+    users.add("woman27", age=35)
+    users.index.remove(users.ids.pop("woman28"))
+    expected = sorted(set(expected) - {"woman27", "woman28"} | {"woman20"})
+    assert users.candidates("picky") == expected
+
+    users.index.set_preferences(picky, None, False, 35, None)
+    assert users.candidates("picky") == sorted(
+        ["woman27"] + [name for name, age in ages.items() if age >= 35]
+    )
+
+
+def _features(**answers):
+    return feature_encoder.encode(SimpleNamespace(**answers))
+
+
+def _scores(me, *candidates, visual=None):
+    visual = visual or [None] * (len(candidates) + 1)
+    matrix = CandidateMatrix(capacity=len(candidates) + 1)
+    for position, (answers, scores) in enumerate(zip((me, *candidates), visual)):
+        matrix.set(position, _features(**answers), scores)
+    positions = np.arange(1, len(candidates) + 1)
+    return matrix, positions, matrix.score(0, positions)
+
+
+def test_unanswered_components_are_skipped():
+    me = dict(religion="islam", smoking="no", hobbies="music, gaming")
+    _, _, scores = _scores(
+        me,
+        dict(religion="islam", smoking="no", hobbies="music, gaming"),  # All the same
+        dict(smoking="yes"),  # Only smoking is answered, and differs
+        dict(religion="hindu", smoking="no"),  # Religion differs, smoking is the same, no hobbies
+        dict(hobbies="music"),  # Half the hobbies
+        dict(),  # Nothing to compare
+        dict(education="sarjana", drinking="no"),  # Nothing I answered
+    )
+    assert scores.tolist() == pytest.approx([1.0, 0.0, 1.5 / 4.5, 0.5, 0.0, 0.0], abs=1e-6)
+
+
+def test_ordinal_answers_score_by_distance():
+    _, _, scores = _scores(
+        dict(education="sarjana", exercise=5),
+        dict(education="sarjana", exercise=5),
+        dict(education="magister", exercise=4),
+        dict(education="smp", exercise=1),
+    )
+    # Education weighs 1.5 and exercise 1.0; each is 1 - distance / 4
+    assert scores.tolist() == pytest.approx([1.0, 0.75, (0.5 * 1.5 + 0.0 * 1.0) / 2.5], abs=1e-6)
+
+
+def test_visual_scores_count_only_when_both_took_the_test():
+    def visual(score):
+        return encode_visual_vector({"answers": [{"item_id": i, "score": score} for i in range(24)]})
+
+    _, _, scores = _scores(
+        dict(religion="islam"),
+        dict(religion="islam"),
+        dict(religion="islam"),
+        dict(religion="hindu"),
+        visual=[visual(5), visual(5), None, visual(1)],
+    )
+    # Same religion and visual taste; no visual answers; opposite religion and taste
+    assert scores.tolist() == pytest.approx([1.0, 1.0, 0.0], abs=1e-6)
+
+
+def test_top_returns_the_best_scores_in_order():
+    matrix = CandidateMatrix(capacity=1)
+    candidates = np.array([10, 11, 12, 13, 14])
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.1], dtype=np.float32)
+
+    assert [position for position, _ in matrix.top(scores, candidates, 3)] == [11, 13, 12]
+    assert [position for position, _ in matrix.top(scores, candidates, 10)] == [11, 13, 12, 10, 14]
+    assert matrix.top(scores, candidates, 0) == []
+    assert matrix.top(scores[:0], candidates[:0], 3) == []
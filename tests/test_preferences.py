@@ -0,0 +1,76 @@
+from datetime import datetime
+from uuid import uuid4
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.preferences.encoding import feature_encoder
+from app.preferences.service import preferences_service
+
+BASIC = dict(
+    gender="female", age=25, age_min=22, age_max=30, location="Jakarta", education="sarjana",
+    occupation="dev", income="mid", religion="islam", smoking="no", drinking="no", exercise="3",
+    relationship_type="serious"
+)
+TEXT = dict(
+    communication_style="a", love_language="quality_time", conflict_resolution="c", social_preference="d",
+    travel_preference="e", food_preference="f", weekend_activity="g", financial_approach="h", future_goals="i"
+)
+
+
+async def _user(session) -> User:
+    user = User(
+        email=f"{uuid4()}@example.com", hashed_password="x", first_name="A", last_name="B",
+        date_of_birth=datetime(1995, 1, 1), gender="female"
+    )
+    session.add(user)
+    await session.commit()
+    return user
+
+
+def _flags(preferences):
+    return preferences.basic_completed, preferences.text_completed, preferences.all_completed
+
+
+def test_completion_flags_follow_each_step(run):
+    async def steps():
+        async with AsyncSessionLocal() as session:
+            user = await _user(session)
+            upsert = preferences_service.upsert_user_preferences
+            return [
+                _flags(await upsert(session, user.id, {**BASIC, "age": None})),
+                _flags(await upsert(session, user.id, {"age": 26})),
+                _flags(await upsert(session, user.id, dict(TEXT))),
+                _flags(await upsert(session, user.id, {"visual_test_completed": True})),
+                _flags(await upsert(session, user.id, {"love_language": None})),
+                # Flags sent by the client are ignored
+                _flags(await upsert(session, user.id, {"text_completed": True, "all_completed": True})),
+            ]
+
+    assert run(steps()) == [
+        (False, False, False),
+        (True, False, False),
+        (True, True, False),
+        (True, True, True),
+        (True, False, False),
+        (True, False, False),
+    ]
+
+
+def test_partial_writes_keep_the_feature_vector_in_sync(run):
+    async def steps():
+        async with AsyncSessionLocal() as session:
+            user = await _user(session)
+            results = []
+            for values in (
+                {"gender": "male", "age": 30, "hobbies": "music, gaming"},
+                {"love_language": "quality_time,physical_touch"},
+                {"age": 41, "religion": "hindu"},
+                {"hobbies": None},
+                {"location": "Bandung"},
+            ):
+                preferences = await preferences_service.upsert_user_preferences(session, user.id, values)
+                results.append((preferences.feature_vector, feature_encoder.encode(preferences)))
+            return results
+
+    for stored, expected in run(steps()):
+        assert stored == expected
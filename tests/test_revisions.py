@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.posts.autosave import autosave_buffer
+from app.posts.schemas import AutosaveRequest, PostCreateRequest, PostUpdateRequest
+from app.posts.service import post_service, revision_service
+
+
+async def _edit_with_autosaves():
+    async with AsyncSessionLocal() as session:
+        author = User(
+            email="author@example.com", hashed_password="x", first_name="A", last_name="B",
+            date_of_birth=datetime(1990, 1, 1), gender="other"
+        )
+        session.add(author)
+        await session.commit()
+
+        contents = ["<p>First draft of the post body</p>"]
+        post = await post_service.create_post(
+            session, PostCreateRequest(title="Draft", content=contents[0]), author
+        )
+        for i in range(12):
+            # Alternate buffered autosaves with full updates so both write paths record revisions
+            contents.append(f"<p>First draft of the post body, autosaved edit {i}</p>")
+            await autosave_buffer.submit(
+                post.id, AutosaveRequest(version=post.version, content=contents[-1]), author
+            )
+            await autosave_buffer.flush(post.id)
+
+            contents.append(f"<p>First draft of the post body, full edit {i}</p>")
+            post = await post_service.get_post_by_id(session, post.id)
+            post = await post_service.update_post(
+                session, post, PostUpdateRequest(content=contents[-1]), author
+            )
+
+        revisions = await revision_service.get_revisions(session, post.id)
+        restored = []
+        for number in sorted(revision["number"] for revision in revisions):
+            _, content = await revision_service.get_revision_content(session, post.id, number)
+            restored.append(content)
+        return contents, restored
+
+
+def test_every_revision_round_trips(run):
+    contents, restored = run(_edit_with_autosaves())
+    assert restored == contents
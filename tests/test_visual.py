@@ -0,0 +1,91 @@
+import random
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.auth.models import User
+from app.database import AsyncSessionLocal
+from app.preferences.constants import VISUAL_TEST_SETTINGS
+from app.preferences.models import UserPreferences, VisualTestResults
+from app.preferences.service import preferences_service
+from app.preferences.visual import encode_visual_vector, pack_visual_results, unpack_visual_results
+
+ITEM_COUNT = VISUAL_TEST_SETTINGS["ITEM_COUNT"]
+
+
+def _results(seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    items = list(range(ITEM_COUNT))
+    rng.shuffle(items)
+    return {"answers": [
+        {
+            "item_id": item_id,
+            "score": rng.randint(VISUAL_TEST_SETTINGS["MIN_SCORE"], VISUAL_TEST_SETTINGS["MAX_SCORE"]),
+            "response_ms": rng.choice([None, 0, rng.randint(1, 0xFFFE)])
+        }
+        for item_id in items
+    ]}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_packed_results_round_trip(seed):
+    results = _results(seed)
+    payload = pack_visual_results(results)
+
+    assert len(payload) == 1 + 5 * ITEM_COUNT
+    assert unpack_visual_results(payload) == results
+
+
+def test_unknown_format_is_rejected():
+    payload = bytes([VISUAL_TEST_SETTINGS["FORMAT_VERSION"] + 1]) + pack_visual_results(_results())[1:]
+    with pytest.raises(ValueError):
+        unpack_visual_results(payload)
+
+
+def test_visual_vector_holds_the_score_of_each_item():
+    results = _results()
+    vector = encode_visual_vector(results)
+
+    assert len(vector) == ITEM_COUNT
+    assert {item_id: vector[item_id] for item_id in range(ITEM_COUNT)} == {
+        answer["item_id"]: answer["score"] for answer in results["answers"]
+    }
+    assert encode_visual_vector({"answers": []}) == bytes(ITEM_COUNT)
+    assert encode_visual_vector(None) is None
+
+
+@pytest.mark.parametrize("answers", [
+    _results()["answers"][:-1],  # An item left unanswered
+    _results()["answers"][:-1] + _results()["answers"][:1],  # An item answered twice
+])
+def test_incomplete_results_are_rejected(answers):
+    with pytest.raises(ValidationError):
+        VisualTestResults(answers=answers)
+
+
+def test_stored_results_round_trip(run):
+    results = VisualTestResults(**_results())
+
+    async def store_and_load():
+        async with AsyncSessionLocal() as session:
+            user = User(
+                email=f"{uuid4()}@example.com", hashed_password="x", first_name="A", last_name="B",
+                date_of_birth=datetime(1995, 1, 1), gender="female"
+            )
+            session.add(user)
+            await session.commit()
+            await preferences_service.update_visual_preferences(session, user.id, results)
+            user_id = user.id
+
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(
+                select(UserPreferences).where(UserPreferences.user_id == user_id)
+            )).scalar_one()
+
+    preferences = run(store_and_load())
+    assert preferences.visual_test_completed
+    assert preferences.visual_preferences == results.model_dump()
+    assert preferences.visual_vector == encode_visual_vector(results.model_dump())